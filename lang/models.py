@@ -20,7 +20,6 @@
 
 from django.db import models
 from django.utils.translation import ugettext as _, pgettext_lazy
-from django.db.models import Sum
 from translate.lang.data import languages
 from lang import data
 
@@ -337,6 +336,13 @@ class Language(models.Model):
     class Meta:
         ordering = ['name']
 
+    def __init__(self, *args, **kwargs):
+        '''
+        Constructor to initialize some cache properties.
+        '''
+        super(Language, self).__init__(*args, **kwargs)
+        self._aggregate = None
+
     def __unicode__(self):
         if not '(' in self.name and ('_' in self.code or '-' in self.code):
             return '%s (%s)' % (_(self.name), self.code)
@@ -367,26 +373,20 @@ class Language(models.Model):
             'lang': self.code
         })
 
+    def get_stats(self):
+        '''
+        Returns aggregated statistics of translations in this language.
+        '''
+        from trans.models.stats import AggregateStats
+        if self._aggregate is None:
+            self._aggregate = AggregateStats.objects.get_stats(self)
+        return self._aggregate
+
     def get_translated_percent(self):
         '''
         Returns status of translations in this language.
         '''
-        from trans.models import Translation
-
-        translations = Translation.objects.filter(
-            language=self
-        ).aggregate(
-            Sum('translated'),
-            Sum('total')
-        )
-
-        translated = translations['translated__sum']
-        total = translations['total__sum']
-
-        # Prevent division by zero on no translations
-        if total == 0:
-            return 0
-        return round(translated * 100.0 / total, 1)
+        return self.get_stats().get_translated_percent()
 
     def get_html(self):
         '''
@@ -21,7 +21,7 @@
 from django.contrib import admin
 from trans.models import (
     Project, SubProject, Translation,
-    Unit, Suggestion, Comment, Check, Dictionary, Change
+    Unit, Suggestion, Comment, Check, Dictionary, Change, Job
 )
 
 
@@ -43,13 +43,11 @@ class ProjectAdmin(admin.ModelAdmin):
         '''
         Recalculates checks for selected resources.
         '''
-        cnt = 0
         units = Unit.objects.filter(
             translation__subproject__project__in=queryset
         )
-        for unit in units.iterator():
-            unit.check()
-            cnt += 1
+        cnt = units.count()
+        Unit.objects.update_checks(units)
         self.message_user(request, "Updated checks for %d units." % cnt)
 
     def force_commit(self, request, queryset):
@@ -85,13 +83,11 @@ class SubProjectAdmin(admin.ModelAdmin):
         '''
         Recalculates checks for selected resources.
         '''
-        cnt = 0
         units = Unit.objects.filter(
             translation__subproject__in=queryset
         )
-        for unit in units.iterator():
-            unit.check()
-            cnt += 1
+        cnt = units.count()
+        Unit.objects.update_checks(units)
         self.message_user(
             request,
             "Updated checks for %d units." % cnt
@@ -202,3 +198,14 @@ class ChangeAdmin(admin.ModelAdmin):
     ]
 
 admin.site.register(Change, ChangeAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = [
+        'subproject', 'translation', 'action', 'state', 'attempts',
+        'created', 'finished'
+    ]
+    list_filter = ['state', 'action', 'subproject__project']
+    search_fields = ['subproject__slug', 'result']
+
+admin.site.register(Job, JobAdmin)
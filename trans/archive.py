@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+'''
+ZIP archives of translation files.
+
+The archive is generated file by file directly from Git working trees, so
+only single translation file is kept in memory at once. Archives of
+committed content are cached on disk keyed by the commit hashes.
+'''
+
+from weblate import appsettings
+import weblate
+import itertools
+import tempfile
+import hashlib
+import zipfile
+import time
+import glob
+import os
+
+
+class ChunkBuffer(object):
+    '''
+    Write only file like object collecting data for streaming.
+
+    ZipFile needs just write, tell and flush when adding content using
+    writestr, so the archive can be written without seeking.
+    '''
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(data)
+        self.position += len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        '''
+        Returns data written since last call.
+        '''
+        data = ''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class TranslationArchive(object):
+    '''
+    ZIP archive of set of translations.
+
+    The name identifies archive in the cache, so it has to be unique for
+    given set of translations.
+    '''
+    def __init__(self, translations, name, filename):
+        self.translations = list(translations.select_related(
+            'subproject', 'subproject__project', 'language'
+        ).order_by(
+            'subproject__project__slug', 'subproject__slug', 'language__code'
+        ))
+        self.name = name
+        self.filename = filename
+
+    def get_filename(self):
+        '''
+        Returns file name for the download.
+        '''
+        return '%s.zip' % self.filename
+
+    def get_arcname(self, translation):
+        '''
+        Returns name of translation file inside archive.
+        '''
+        return '%s/%s/%s' % (
+            translation.subproject.project.slug,
+            translation.subproject.slug,
+            translation.filename,
+        )
+
+    def has_pending(self):
+        '''
+        Checks whether there are changes not written to translation files.
+        '''
+        from trans.models.unitdata import PendingWrite
+        return PendingWrite.objects.filter(
+            unit__translation__in=self.translations
+        ).exists()
+
+    def flush_pending(self):
+        '''
+        Writes pending changes to translation files.
+        '''
+        from trans.models.unitdata import PendingWrite
+        ids = set(PendingWrite.objects.filter(
+            unit__translation__in=self.translations
+        ).values_list('unit__translation', flat=True))
+        for translation in self.translations:
+            if translation.id in ids:
+                translation.flush_pending()
+
+    def get_key(self):
+        '''
+        Returns key identifying archive content.
+
+        The key is based on commits in all involved repositories, None is
+        returned when there are changes which are not committed.
+        '''
+        if self.has_pending():
+            return None
+        heads = {}
+        items = [weblate.VERSION]
+        for translation in self.translations:
+            subproject = translation.subproject
+            path = subproject.get_path()
+            if not path in heads:
+                heads[path] = subproject.git_state.get_head()
+            if translation.git_needs_commit():
+                return None
+            items.append('%s:%s' % (
+                self.get_arcname(translation),
+                heads[path]
+            ))
+        return hashlib.sha1('\n'.join(items)).hexdigest()
+
+    def get_cache_path(self, key):
+        '''
+        Returns path to cached archive.
+        '''
+        return os.path.join(
+            appsettings.ZIP_CACHE_DIR,
+            '%s-%s.zip' % (self.name, key)
+        )
+
+    def get_cached(self, key):
+        '''
+        Returns opened cached archive or None if it does not exist.
+        '''
+        if key is None:
+            return None
+        try:
+            return open(self.get_cache_path(key), 'rb')
+        except IOError:
+            return None
+
+    def generate_files(self):
+        '''
+        Yields ZIP chunks, each containing single translation file.
+        '''
+        buf = ChunkBuffer()
+        archive = zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED, True)
+
+        groups = itertools.groupby(
+            self.translations, lambda x: x.subproject
+        )
+        for subproject, translations in groups:
+            for translation in translations:
+                filename = translation.get_filename()
+                # Read file under shared lock to get consistent content
+                with subproject.get_git_lock(shared=True):
+                    try:
+                        with open(filename, 'rb') as handle:
+                            content = handle.read()
+                        mtime = os.path.getmtime(filename)
+                    except IOError:
+                        # Missing file, should not happen
+                        continue
+                info = zipfile.ZipInfo(
+                    self.get_arcname(translation),
+                    time.localtime(mtime)[:6]
+                )
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                archive.writestr(info, content)
+                yield buf.pop()
+
+        archive.close()
+        yield buf.pop()
+
+    def generate(self, key=None):
+        '''
+        Yields ZIP archive in chunks.
+
+        When key is given, the archive is also stored in cache, replacing
+        older archives of same translations.
+        '''
+        if key is None:
+            for chunk in self.generate_files():
+                yield chunk
+            return
+
+        if not os.path.exists(appsettings.ZIP_CACHE_DIR):
+            os.makedirs(appsettings.ZIP_CACHE_DIR)
+        handle, tempname = tempfile.mkstemp(
+            suffix='.tmp', dir=appsettings.ZIP_CACHE_DIR
+        )
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                for chunk in self.generate_files():
+                    output.write(chunk)
+                    yield chunk
+            path = self.get_cache_path(key)
+            os.rename(tempname, path)
+        except:
+            # Incomplete archive (for example client has disconnected)
+            os.unlink(tempname)
+            raise
+
+        # Remove archives of older content
+        for oldname in glob.glob(self.get_cache_path('[0-9a-f]' * 40)):
+            if oldname != path:
+                try:
+                    os.unlink(oldname)
+                except OSError:
+                    pass
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+'''
+Exporting of translations into various formats.
+
+The exports are generated from units stored in database and are produced
+by generators, so that even huge translations can be streamed.
+'''
+
+from django.utils.translation import ugettext_lazy as _
+from translate.storage.po import pofile, pounit
+from translate.misc.multistring import multistring
+from xml.sax.saxutils import escape, quoteattr
+from cStringIO import StringIO
+import weblate
+import json
+import csv
+
+EXPORTERS = {}
+
+
+def register_exporter(exporter):
+    '''
+    Registers exporter in dictionary.
+    '''
+    EXPORTERS[exporter.format_id] = exporter
+
+
+def get_exporter(format_id):
+    '''
+    Returns exporter class for given format or None if it does not exist.
+    '''
+    return EXPORTERS.get(format_id)
+
+
+def split_list(value):
+    '''
+    Splits comma separated list as stored in the database.
+    '''
+    return [item.strip() for item in value.split(',') if item.strip() != '']
+
+
+class Exporter(object):
+    '''
+    Generic exporter, subclasses define header, footer and unit
+    serialization.
+    '''
+    name = ''
+    format_id = ''
+    mimetype = 'text/plain'
+    extension = 'txt'
+
+    def __init__(self, translation):
+        self.translation = translation
+        self.language = translation.language
+        self.subproject = translation.subproject
+
+    def get_filename(self):
+        '''
+        Returns file name for the download.
+        '''
+        return '%s-%s-%s.%s' % (
+            self.subproject.project.slug,
+            self.subproject.slug,
+            self.language.code,
+            self.extension,
+        )
+
+    def header(self):
+        return u''
+
+    def footer(self):
+        return u''
+
+    def unit(self, unit):
+        raise NotImplementedError()
+
+    def generate(self):
+        '''
+        Yields exported translation in UTF-8 encoded chunks.
+        '''
+        yield self.header().encode('utf-8')
+        units = self.translation.unit_set.order_by('position')
+        for unit in units.iterator():
+            yield self.unit(unit).encode('utf-8')
+        yield self.footer().encode('utf-8')
+
+
+class PoExporter(Exporter):
+    name = _('Gettext PO file')
+    format_id = 'po'
+    mimetype = 'text/x-po'
+    extension = 'po'
+
+    def header(self):
+        store = pofile()
+        store.updateheader(
+            add=True,
+            language=self.language.code,
+            plural_forms=self.language.get_plural_form(),
+            x_generator='Weblate %s' % weblate.VERSION,
+            project_id_version='%s (%s)' % (
+                self.subproject.__unicode__(),
+                self.language.name
+            ),
+        )
+        return str(store).decode('utf-8')
+
+    def unit(self, unit):
+        if unit.is_plural():
+            output = pounit(multistring(unit.get_source_plurals()))
+            output.target = multistring(unit.get_target_plurals())
+        else:
+            output = pounit(unit.source)
+            output.target = unit.target
+        if unit.context != '':
+            output.setcontext(unit.context)
+        if unit.comment != '':
+            output.addnote(unit.comment, 'developer')
+        for location in split_list(unit.location):
+            output.addlocation(location)
+        for flag in split_list(unit.flags):
+            output.settypecomment(flag)
+        if unit.fuzzy:
+            output.markfuzzy(True)
+        return u'\n%s' % str(output).decode('utf-8')
+
+register_exporter(PoExporter)
+
+
+class XliffExporter(Exporter):
+    name = _('XLIFF Translation File')
+    format_id = 'xliff'
+    mimetype = 'application/x-xliff+xml'
+    extension = 'xlf'
+
+    def header(self):
+        return (
+            u'<?xml version="1.0" encoding="utf-8"?>\n'
+            u'<xliff version="1.1" '
+            u'xmlns="urn:oasis:names:tc:xliff:document:1.1">\n'
+            u'<file original=%s source-language="en" '
+            u'target-language=%s datatype="po">\n'
+            u'<body>\n'
+        ) % (
+            quoteattr(self.translation.filename),
+            quoteattr(self.language.code),
+        )
+
+    def footer(self):
+        return u'</body>\n</file>\n</xliff>\n'
+
+    def trans_unit(self, unit_id, source, target, unit):
+        '''
+        Serializes single trans-unit element.
+        '''
+        if unit.translated:
+            attrs = u' approved="yes"'
+            state = u''
+        else:
+            attrs = u''
+            if unit.fuzzy:
+                state = u' state="needs-review-translation"'
+            else:
+                state = u' state="new"'
+        output = [
+            u'<trans-unit id=%s%s>' % (quoteattr(unit_id), attrs),
+            u'<source>%s</source>' % escape(source),
+            u'<target%s>%s</target>' % (state, escape(target)),
+        ]
+        if unit.context != '':
+            output.append(
+                u'<context-group><context context-type="x-gettext-msgctxt">'
+                u'%s</context></context-group>' % escape(unit.context)
+            )
+        if unit.comment != '':
+            output.append(
+                u'<note from="developer">%s</note>' % escape(unit.comment)
+            )
+        output.append(u'</trans-unit>\n')
+        return u''.join(output)
+
+    def unit(self, unit):
+        if not unit.is_plural():
+            return self.trans_unit(
+                unit.checksum, unit.source, unit.target, unit
+            )
+
+        sources = unit.get_source_plurals()
+        targets = unit.get_target_plurals()
+        output = [
+            u'<group id=%s restype="x-gettext-plurals">\n' %
+            quoteattr(unit.checksum)
+        ]
+        for i, target in enumerate(targets):
+            output.append(self.trans_unit(
+                u'%s[%d]' % (unit.checksum, i),
+                sources[min(i, len(sources) - 1)],
+                target,
+                unit
+            ))
+        output.append(u'</group>\n')
+        return u''.join(output)
+
+register_exporter(XliffExporter)
+
+
+class TSExporter(Exporter):
+    name = _('Qt Linguist Translation File')
+    format_id = 'ts'
+    mimetype = 'application/x-linguist'
+    extension = 'ts'
+
+    def __init__(self, translation):
+        super(TSExporter, self).__init__(translation)
+        self.context = None
+
+    def header(self):
+        return (
+            u'<?xml version="1.0" encoding="utf-8"?>\n'
+            u'<!DOCTYPE TS>\n'
+            u'<TS version="2.0" language=%s>\n'
+        ) % quoteattr(self.language.code)
+
+    def footer(self):
+        if self.context is None:
+            return u'</TS>\n'
+        return u'</context>\n</TS>\n'
+
+    def unit(self, unit):
+        output = []
+
+        # Messages are grouped by context
+        if unit.context != self.context:
+            if self.context is not None:
+                output.append(u'</context>\n')
+            output.append(
+                u'<context>\n<name>%s</name>\n' % escape(unit.context)
+            )
+            self.context = unit.context
+
+        if unit.is_plural():
+            output.append(u'<message numerus="yes">\n')
+        else:
+            output.append(u'<message>\n')
+        for location in split_list(unit.location):
+            filename, dummy, line = location.rpartition(':')
+            if filename != '' and line.isdigit():
+                output.append(u'<location filename=%s line="%s"/>\n' % (
+                    quoteattr(filename), line
+                ))
+        output.append(
+            u'<source>%s</source>\n' % escape(unit.get_source_plurals()[0])
+        )
+        if unit.comment != '':
+            output.append(u'<comment>%s</comment>\n' % escape(unit.comment))
+
+        if unit.translated:
+            output.append(u'<translation>')
+        else:
+            output.append(u'<translation type="unfinished">')
+        if unit.is_plural():
+            for target in unit.get_target_plurals():
+                output.append(
+                    u'<numerusform>%s</numerusform>' % escape(target)
+                )
+        else:
+            output.append(escape(unit.target))
+        output.append(u'</translation>\n</message>\n')
+        return u''.join(output)
+
+register_exporter(TSExporter)
+
+
+class CSVExporter(Exporter):
+    name = _('CSV file')
+    format_id = 'csv'
+    mimetype = 'text/csv'
+    extension = 'csv'
+
+    def row(self, values):
+        '''
+        Formats single CSV row.
+        '''
+        output = StringIO()
+        csv.writer(output).writerow(
+            [value.encode('utf-8') for value in values]
+        )
+        return output.getvalue().decode('utf-8')
+
+    def header(self):
+        return self.row([
+            u'location', u'source', u'target', u'context', u'comment',
+            u'fuzzy'
+        ])
+
+    def unit(self, unit):
+        if unit.fuzzy:
+            fuzzy = u'1'
+        else:
+            fuzzy = u'0'
+        return self.row([
+            unit.location, unit.source, unit.target, unit.context,
+            unit.comment, fuzzy
+        ])
+
+register_exporter(CSVExporter)
+
+
+class JSONExporter(Exporter):
+    name = _('JSON file')
+    format_id = 'json'
+    mimetype = 'application/json'
+    extension = 'json'
+
+    def __init__(self, translation):
+        super(JSONExporter, self).__init__(translation)
+        self.separator = u'\n'
+
+    def header(self):
+        return u'['
+
+    def footer(self):
+        return u'\n]\n'
+
+    def unit(self, unit):
+        if unit.is_plural():
+            source = unit.get_source_plurals()
+            target = unit.get_target_plurals()
+        else:
+            source = unit.source
+            target = unit.target
+        output = self.separator + json.dumps({
+            'checksum': unit.checksum,
+            'context': unit.context,
+            'source': source,
+            'target': target,
+            'comment': unit.comment,
+            'location': unit.location,
+            'flags': unit.flags,
+            'fuzzy': unit.fuzzy,
+            'translated': unit.translated,
+        }, sort_keys=True)
+        self.separator = u',\n'
+        return output
+
+register_exporter(JSONExporter)
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+'''
+File locking based on flock.
+
+Unlike FileLock, waiting for the lock is done by kernel and the lock is
+released automatically when the process dies, so there are no stale
+locks.
+
+The timeout is implemented by waiting in separate thread, so it does not
+interfere with signals or timers used by the process.
+'''
+
+from trans.filelock import FileLockException
+import threading
+import errno
+import os
+
+try:
+    import fcntl
+    HAS_FLOCK = True
+except ImportError:
+    HAS_FLOCK = False
+
+
+class FlockState(object):
+    '''
+    Opened lock file together with number of shared and exclusive locks
+    held on it.
+    '''
+    def __init__(self, lockfile):
+        self.lockfile = lockfile
+        self.handle = None
+        self.depth = {True: 0, False: 0}
+
+
+class FlockWaiter(threading.Thread):
+    '''
+    Thread waiting for flock on separate file descriptor.
+
+    The blocking call can not be interrupted without signals, so on timeout
+    the wait is abandoned and the lock is released once it is acquired.
+    '''
+    def __init__(self, lockfile, operation):
+        super(FlockWaiter, self).__init__()
+        self.daemon = True
+        self.handle = os.open(lockfile, os.O_CREAT | os.O_RDWR)
+        self.operation = operation
+        self.mutex = threading.Lock()
+        self.acquired = False
+        self.abandoned = False
+        self.error = None
+
+    def run(self):
+        try:
+            fcntl.flock(self.handle, self.operation)
+        except IOError as error:
+            self.error = error
+        with self.mutex:
+            if self.abandoned or self.error is not None:
+                os.close(self.handle)
+            else:
+                self.acquired = True
+
+    def wait(self, timeout):
+        '''
+        Waits for the lock at most timeout seconds, returns locked file
+        descriptor.
+        '''
+        self.start()
+        self.join(timeout)
+        with self.mutex:
+            if self.acquired:
+                return self.handle
+            self.abandoned = True
+            if self.error is not None:
+                raise self.error
+        raise FileLockException('Timeout occured.')
+
+
+class FlockLock(object):
+    '''
+    Lock using flock on a lock file, compatible with FileLock.
+
+    The shared lock can be held by several processes at once, but not
+    together with exclusive lock. The lock is reentrant within single
+    instance.
+
+    Locks created using get_variant use same file descriptor, so nesting
+    shared and exclusive lock upgrades or downgrades the lock instead of
+    waiting for itself. Note that upgrading is not atomic, other process
+    can get exclusive lock meanwhile.
+    '''
+    def __init__(self, file_name, timeout=10, shared=False, state=None):
+        self.lockfile = os.path.join(os.getcwd(), '%s.flock' % file_name)
+        self.file_name = file_name
+        self.timeout = timeout
+        self.shared = shared
+        if state is None:
+            state = FlockState(self.lockfile)
+        self.state = state
+
+    @property
+    def is_locked(self):
+        return self.state.depth[self.shared] > 0
+
+    def get_variant(self, shared):
+        '''
+        Returns shared or exclusive lock using same lock file descriptor.
+        '''
+        return FlockLock(self.file_name, self.timeout, shared, self.state)
+
+    def lock(self, operation):
+        '''
+        Changes lock on the file, waiting at most timeout seconds.
+        '''
+        state = self.state
+        try:
+            fcntl.flock(state.handle, operation | fcntl.LOCK_NB)
+            return
+        except IOError as error:
+            if error.errno not in (errno.EAGAIN, errno.EACCES):
+                raise
+
+        if self.timeout is None:
+            fcntl.flock(state.handle, operation)
+            return
+
+        # Waiting on other descriptor would block on our own shared lock
+        # when upgrading, the upgrade is not atomic anyway
+        if state.depth[True] > 0:
+            fcntl.flock(state.handle, fcntl.LOCK_UN)
+
+        handle = FlockWaiter(self.lockfile, operation).wait(self.timeout)
+        os.close(state.handle)
+        state.handle = handle
+
+    def acquire(self):
+        '''
+        Acquires the lock, raises FileLockException on timeout.
+        '''
+        state = self.state
+
+        # Exclusive lock covers shared one as well
+        if state.depth[False] > 0 or (self.shared and state.depth[True] > 0):
+            state.depth[self.shared] += 1
+            return
+
+        if state.handle is None:
+            state.handle = os.open(self.lockfile, os.O_CREAT | os.O_RDWR)
+
+        try:
+            if self.shared:
+                self.lock(fcntl.LOCK_SH)
+            else:
+                self.lock(fcntl.LOCK_EX)
+        except:
+            if state.depth[True] > 0:
+                # Failed upgrade might have removed shared lock
+                self.lock(fcntl.LOCK_SH)
+            else:
+                os.close(state.handle)
+                state.handle = None
+            raise
+        state.depth[self.shared] += 1
+
+    def release(self):
+        '''
+        Releases the lock.
+        '''
+        state = self.state
+        if state.depth[self.shared] == 0:
+            return
+        state.depth[self.shared] -= 1
+
+        if state.depth[False] > 0:
+            # Still holding exclusive lock
+            return
+        if state.depth[True] > 0:
+            if not self.shared:
+                # Downgrade to shared lock
+                fcntl.flock(state.handle, fcntl.LOCK_SH)
+            return
+
+        # Closing the file releases the lock, the file is kept to avoid
+        # races with other processes opening it
+        os.close(state.handle)
+        state.handle = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, typ, value, traceback):
+        self.release()
+
+    def __del__(self):
+        while self.is_locked:
+            self.release()
@@ -22,6 +22,7 @@ File format specific behavior.
 '''
 from django.utils.translation import ugettext_lazy as _
 from translate.storage import factory
+from trans.util import get_source, get_context, msg_checksum
 import importlib
 import __builtin__
 
@@ -198,3 +199,45 @@ def ttkit(storefile, file_format='auto'):
     format_obj = FILE_FORMATS[file_format]()
 
     return format_obj.load(storefile)
+
+
+class StoreIndex(object):
+    '''
+    Lookup structure for units in ttkit store.
+    '''
+    def __init__(self, store):
+        self.ids = {}
+        self.sources = {}
+        self.checksums = {}
+        for unit in store.units:
+            self.add(unit)
+
+    def add(self, unit):
+        '''
+        Adds unit to the index, first unit wins in case of duplicates.
+        '''
+        source = get_source(unit)
+        self.ids.setdefault(unit.getid(), unit)
+        self.sources.setdefault(source, unit)
+        self.checksums.setdefault(
+            msg_checksum(source, get_context(unit)),
+            unit
+        )
+
+    def find_id(self, unitid):
+        '''
+        Finds unit by ID.
+        '''
+        return self.ids.get(unitid)
+
+    def find_source(self, source):
+        '''
+        Finds unit by source string.
+        '''
+        return self.sources.get(source)
+
+    def find_checksum(self, checksum):
+        '''
+        Finds unit by checksum of source and context.
+        '''
+        return self.checksums.get(checksum)
@@ -151,6 +151,19 @@ class TranslationForm(forms.Form):
     )
 
 
+class ZenTranslationForm(TranslationForm):
+    '''
+    Form used for translation of string in zen mode.
+
+    Several strings are submitted at once, so the fields are prefixed by
+    unit checksum.
+    '''
+    def __init__(self, checksum, *args, **kwargs):
+        kwargs['prefix'] = checksum
+        super(ZenTranslationForm, self).__init__(*args, **kwargs)
+        del self.fields['checksum']
+
+
 class AntispamForm(forms.Form):
     '''
     Honeypot based spam protection form.
@@ -273,6 +286,11 @@ class AutoForm(forms.Form):
         required=False,
         initial=''
     )
+    memory = forms.BooleanField(
+        label=_('Use translation memory of all projects'),
+        required=False,
+        initial=False
+    )
 
     def __init__(self, obj, *args, **kwargs):
         '''
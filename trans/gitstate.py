@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+'''
+Cheap access to state of Git repositories.
+
+The state is read directly from refs and index files, so checking it does
+not need to spawn git.
+'''
+
+import os
+import threading
+import hashlib
+import git
+
+
+def read_packed_ref(git_dir, name):
+    '''
+    Looks up reference in packed-refs file.
+    '''
+    path = os.path.join(git_dir, 'packed-refs')
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        for line in handle:
+            if line.startswith('#') or line.startswith('^'):
+                continue
+            parts = line.split()
+            if len(parts) == 2 and parts[1] == name:
+                return parts[0]
+    return None
+
+
+def read_ref(git_dir, name):
+    '''
+    Resolves reference to commit sha, returns None if it does not exist.
+    '''
+    # Follow symbolic references (limited to avoid loops)
+    for dummy in range(5):
+        path = os.path.join(git_dir, name)
+        if not os.path.isfile(path):
+            return read_packed_ref(git_dir, name)
+        with open(path) as handle:
+            value = handle.read().strip()
+        if not value.startswith('ref: '):
+            return value
+        name = value[5:]
+    return None
+
+
+def hash_file(path):
+    '''
+    Calculates Git blob hash of a file.
+    '''
+    if os.path.islink(path):
+        data = os.readlink(path)
+    else:
+        with open(path, 'rb') as handle:
+            data = handle.read()
+    return hashlib.sha1('blob %d\0%s' % (len(data), data)).hexdigest()
+
+
+class GitState(object):
+    '''
+    State of Git repository (HEAD, remote heads, tree and index).
+
+    Tree is cached for current HEAD, index is cached until the index file
+    is changed and results of ancestry checks are cached for given commits,
+    so all values are refreshed automatically once git changes them.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.git_dir = os.path.join(path, '.git')
+        self._lock = threading.Lock()
+        self._repo = None
+        self._tree_head = None
+        self._tree = {}
+        self._index_stat = None
+        self._index_mtime = 0
+        self._index = {}
+        self._merge_cache = {}
+
+    @property
+    def repo(self):
+        if self._repo is None:
+            self._repo = git.Repo(self.path)
+        return self._repo
+
+    def invalidate(self):
+        '''
+        Drops cached tree and index, used after changing the repository.
+        '''
+        with self._lock:
+            self._tree_head = None
+            self._index_stat = None
+
+    def get_head(self):
+        '''
+        Returns sha of current HEAD.
+        '''
+        return read_ref(self.git_dir, 'HEAD')
+
+    def get_remote_head(self, branch):
+        '''
+        Returns sha of remote branch head.
+        '''
+        return read_ref(self.git_dir, 'refs/remotes/origin/%s' % branch)
+
+    def get_tree(self):
+        '''
+        Returns dictionary of blob hashes in current HEAD keyed by path.
+        '''
+        head = self.get_head()
+        with self._lock:
+            if self._tree_head is None or self._tree_head != head:
+                tree = {}
+                if head is not None:
+                    for item in self.repo.commit(head).tree.traverse():
+                        if item.type == 'blob':
+                            tree[item.path] = item.hexsha
+                self._tree = tree
+                self._tree_head = head
+            return self._tree
+
+    def get_index(self):
+        '''
+        Returns dictionary of index entries keyed by path.
+
+        Entries are tuples of modification time, size and blob hash, hash
+        is None for unmerged entries.
+        '''
+        path = os.path.join(self.git_dir, 'index')
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return {}
+        index_stat = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            if self._index_stat != index_stat:
+                index = {}
+                entries = git.IndexFile(self.repo, path).entries
+                for key, entry in entries.items():
+                    filename, stage = key
+                    if stage != 0:
+                        index[filename] = (None, None, None)
+                    else:
+                        index[filename] = (
+                            entry.mtime[0],
+                            entry.size,
+                            entry.hexsha,
+                        )
+                self._index = index
+                self._index_stat = index_stat
+                self._index_mtime = int(stat.st_mtime)
+            return self._index
+
+    def get_blob_hash(self, filename):
+        '''
+        Returns blob hash of file in current HEAD.
+
+        Raises KeyError if file is not in the tree.
+        '''
+        return self.get_tree()[filename]
+
+    def is_dirty(self, filename):
+        '''
+        Checks whether file has not committed changes.
+        '''
+        tree = self.get_tree()
+        index = self.get_index()
+        fullname = os.path.join(self.path, filename)
+
+        if not filename in index:
+            # Removed or not yet added file
+            return filename in tree or os.path.lexists(fullname)
+
+        mtime, size, hexsha = index[filename]
+
+        # Staged changes or merge conflict
+        if hexsha is None or hexsha != tree.get(filename):
+            return True
+
+        try:
+            stat = os.lstat(fullname)
+        except OSError:
+            # Removed file
+            return True
+
+        # Same check as git does, files changed in same second as index
+        # was written need to be hashed
+        if (int(stat.st_mtime) == mtime and stat.st_size == size
+                and mtime < self._index_mtime):
+            return False
+
+        return hash_file(fullname) != hexsha
+
+    def needs_commit(self):
+        '''
+        Checks whether there are not committed changes in tracked files.
+        '''
+        filenames = set(self.get_tree()) | set(self.get_index())
+        for filename in filenames:
+            if self.is_dirty(filename):
+                return True
+        return False
+
+    def check_merge(self, base, target, revision):
+        '''
+        Checks whether there are commits in target which are not in base,
+        revision is used for git log when any of the commits is unknown.
+        '''
+        if base is None or target is None:
+            # Let git complain about missing reference
+            return self.repo.git.log(revision, '--') != ''
+        key = (base, target)
+        if not key in self._merge_cache:
+            # Ancestry changes only with new commits, so this is computed
+            # only once for each pair of commits
+            if len(self._merge_cache) > 100:
+                self._merge_cache.clear()
+            self._merge_cache[key] = (
+                self.repo.git.log('%s..%s' % key, '--') != ''
+            )
+        return self._merge_cache[key]
+
+    def needs_merge(self, branch):
+        '''
+        Checks whether there are remote commits to merge.
+        '''
+        return self.check_merge(
+            self.get_head(),
+            self.get_remote_head(branch),
+            '..origin/%s' % branch
+        )
+
+    def needs_push(self, branch):
+        '''
+        Checks whether there are local commits to push.
+        '''
+        return self.check_merge(
+            self.get_remote_head(branch),
+            self.get_head(),
+            'origin/%s..' % branch
+        )
+
+
+GIT_STATES = {}
+GIT_STATES_LOCK = threading.Lock()
+
+
+def get_git_state(path):
+    '''
+    Returns shared GitState object for repository.
+    '''
+    path = os.path.abspath(path)
+    with GIT_STATES_LOCK:
+        if not path in GIT_STATES:
+            GIT_STATES[path] = GitState(path)
+        return GIT_STATES[path]
@@ -22,8 +22,47 @@ Helper classes for management commands.
 '''
 
 from django.core.management.base import BaseCommand, CommandError
+from django.core.management import call_command
+from django.db import connection
 from optparse import make_option
+from weblate import appsettings
 from trans.models import Unit, SubProject
+import multiprocessing
+
+# Option for commands which can process subprojects in parallel
+JOBS_OPTION = make_option(
+    '--jobs',
+    action='store',
+    type='int',
+    dest='jobs',
+    default=1,
+    help='Number of parallel worker processes (default is 1)'
+)
+
+
+def init_worker():
+    '''
+    Initializes worker process.
+    '''
+    # Whoosh index can not be written from several processes at once, so
+    # record index updates in the database and process them afterwards
+    appsettings.OFFLOAD_INDEXING = True
+
+
+def process_worker(params):
+    '''
+    Processes group of subprojects in worker process.
+
+    Returns list of processed subproject IDs and list of failures.
+    '''
+    function, ids, options = params
+    errors = []
+    for subproject in SubProject.objects.filter(id__in=ids):
+        try:
+            function(subproject, options)
+        except Exception as error:
+            errors.append((subproject.__unicode__(), str(error)))
+    return ids, errors
 
 
 class WeblateCommand(BaseCommand):
@@ -87,6 +126,94 @@ class WeblateCommand(BaseCommand):
 
         return result
 
+    def get_group_keys(self, subproject):
+        '''
+        Returns list of keys identifying resources used by processing of
+        subproject, subprojects sharing any of them are processed by single
+        worker.
+
+        Operations on the repository are serialized by default, commands
+        working with data shared within project (eg. checks) should group
+        by project as well.
+        '''
+        return [subproject.get_path()]
+
+    def get_groups(self, subprojects):
+        '''
+        Groups subproject IDs so that subprojects sharing some key are in
+        same group.
+        '''
+        groups = []
+        owners = {}
+        for subproject in subprojects:
+            group = [subproject.id]
+            for key in self.get_group_keys(subproject):
+                owner = owners.get(key)
+                if owner is None or owner is group:
+                    owners[key] = group
+                    continue
+                # Merge group already owning the key
+                group.extend(owner)
+                groups.remove(owner)
+                for other, value in owners.items():
+                    if value is owner:
+                        owners[other] = group
+            groups.append(group)
+        return groups
+
+    def process_subprojects(self, function, *args, **options):
+        '''
+        Calls function(subproject, options) for all subprojects matching
+        parameters.
+
+        With --jobs the work is distributed to process pool, subprojects
+        sharing same repository (or other key, see get_group_keys) are
+        always processed by single worker to keep their processing
+        serialized.
+        '''
+        subprojects = self.get_subprojects(*args, **options)
+        jobs = options.get('jobs', 1)
+        verbosity = int(options.get('verbosity', 1))
+
+        # Process sequentially
+        if jobs <= 1:
+            for subproject in subprojects:
+                function(subproject, options)
+            return
+
+        groups = self.get_groups(subprojects)
+        total = sum([len(ids) for ids in groups])
+
+        # Workers need own database connection, so close ours before
+        # forking them
+        connection.close()
+
+        pool = multiprocessing.Pool(jobs, init_worker)
+        failures = []
+        done = 0
+        try:
+            params = [(function, ids, options) for ids in groups]
+            for ids, errors in pool.imap_unordered(process_worker, params):
+                done += len(ids)
+                failures.extend(errors)
+                if verbosity >= 1:
+                    print 'Processed %d of %d subprojects' % (done, total)
+        finally:
+            pool.close()
+            pool.join()
+
+        # Process index updates recorded by workers
+        if not appsettings.OFFLOAD_INDEXING:
+            call_command('update_index')
+
+        # Report failures
+        for name, error in failures:
+            print 'Failed to process %s: %s' % (name, error)
+        if len(failures) > 0:
+            raise CommandError(
+                'Processing of %d subprojects failed!' % len(failures)
+            )
+
     def handle(self, *args, **options):
         """
         The actual logic of the command. Subclasses must implement
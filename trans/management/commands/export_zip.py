@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from trans.management.commands import WeblateLangCommand
+from trans.models import Translation
+from trans.archive import TranslationArchive
+from django.core.management.base import CommandError
+from optparse import make_option
+import sys
+
+
+class Command(WeblateLangCommand):
+    help = 'exports translation files as ZIP archive'
+    option_list = WeblateLangCommand.option_list + (
+        make_option(
+            '--output',
+            action='store',
+            type='string',
+            dest='output',
+            default=None,
+            help='File where to write the archive (use - for stdout)'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if options['output'] is None:
+            raise CommandError('Please specify output file using --output!')
+
+        translations = Translation.objects.filter(
+            subproject__in=self.get_subprojects(*args, **options),
+            enabled=True
+        )
+        if options['lang'] is not None:
+            translations = translations.filter(
+                language__code__in=options['lang'].split(',')
+            )
+
+        archive = TranslationArchive(translations, 'export', 'export')
+        archive.flush_pending()
+
+        if options['output'] == '-':
+            output = sys.stdout
+        else:
+            output = open(options['output'], 'wb')
+
+        try:
+            for chunk in archive.generate():
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from optparse import make_option
+from trans.models import IndexUpdate, Unit
+from trans.models.unit import BULK_BATCH
+from trans.search import (
+    FULLTEXT_INDEX, update_source_index, update_target_index,
+    get_index_languages
+)
+import time
+
+
+class Command(BaseCommand):
+    help = 'continuously updates index for fulltext search'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--interval',
+            type='int',
+            dest='interval',
+            default=10,
+            help='maximal time in seconds before commiting index changes'
+        ),
+        make_option(
+            '--batch',
+            type='int',
+            dest='batch',
+            default=1000,
+            help='maximal number of updates before commiting index changes'
+        ),
+        make_option(
+            '--poll',
+            type='float',
+            dest='poll',
+            default=1.0,
+            help='time in seconds to wait for new updates'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        self.writers = {}
+        # Last processed IndexUpdate ID and IDs processed since last commit
+        self.last_id = 0
+        self.processed = []
+        pending = 0
+        started = None
+
+        try:
+            while True:
+                # Grab next batch of updates
+                update_ids = list(
+                    IndexUpdate.objects.filter(
+                        id__gt=self.last_id
+                    ).order_by(
+                        'id'
+                    ).values_list(
+                        'id', flat=True
+                    )[:options['batch']]
+                )
+
+                if len(update_ids) > 0:
+                    if started is None:
+                        started = time.time()
+                    self.process_updates(update_ids)
+                    pending += len(update_ids)
+
+                # Commit on reaching size or time threshold
+                if started is not None and (
+                        pending >= options['batch'] or
+                        time.time() - started >= options['interval']):
+                    self.commit()
+                    pending = 0
+                    started = None
+
+                reset_queries()
+
+                # Wait for new updates, closing connection to see them
+                if len(update_ids) < options['batch']:
+                    connection.close()
+                    time.sleep(options['poll'])
+        except KeyboardInterrupt:
+            self.commit()
+
+    def get_writer(self, lang=None):
+        '''
+        Returns writer for given index, which is kept open until commit.
+        '''
+        if not lang in self.writers:
+            if lang is None:
+                writer = FULLTEXT_INDEX.source_writer(buffered=False)
+            else:
+                writer = FULLTEXT_INDEX.target_writer(lang, buffered=False)
+            self.writers[lang] = writer
+        return self.writers[lang]
+
+    def process_updates(self, update_ids):
+        '''
+        Writes updates up to last of update_ids to index writers.
+        '''
+        last_id = update_ids[-1]
+        units = Unit.objects.filter(
+            indexupdate__id__gt=self.last_id,
+            indexupdate__id__lte=last_id,
+        )
+        source_units = Unit.objects.filter(
+            indexupdate__id__gt=self.last_id,
+            indexupdate__id__lte=last_id,
+            indexupdate__source=True,
+        )
+
+        update_source_index(source_units, self.get_writer())
+        for lang in get_index_languages(units):
+            update_target_index(units, lang, self.get_writer(lang))
+
+        self.last_id = last_id
+        self.processed.extend(update_ids)
+
+    def commit(self):
+        '''
+        Commits index writers and removes processed updates.
+        '''
+        for writer in self.writers.values():
+            writer.commit()
+        self.writers = {}
+
+        # Remove only updates we have seen, transaction adding update with
+        # lower ID might have been commited after we've read later ones
+        for start in xrange(0, len(self.processed), BULK_BATCH):
+            IndexUpdate.objects.filter(
+                id__in=self.processed[start:start + BULK_BATCH]
+            ).delete()
+        self.processed = []
+
+        # Start from beginning again to pick up such late updates
+        self.last_id = 0
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from optparse import make_option
+from trans.models import Job
+import threading
+import time
+
+# Interval in seconds for cleaning up jobs
+CLEANUP_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = 'processes queued git jobs'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--jobs',
+            type='int',
+            dest='jobs',
+            default=4,
+            help='maximal number of jobs running at once (default is 4)'
+        ),
+        make_option(
+            '--retries',
+            type='int',
+            dest='retries',
+            default=2,
+            help='number of retries of failed job (default is 2)'
+        ),
+        make_option(
+            '--poll',
+            type='float',
+            dest='poll',
+            default=1.0,
+            help='time in seconds to wait for new jobs'
+        ),
+        make_option(
+            '--timeout',
+            type='int',
+            dest='timeout',
+            default=3600,
+            help='time in seconds after which running job is restarted'
+        ),
+        make_option(
+            '--keep',
+            type='int',
+            dest='keep',
+            default=7,
+            help='number of days to keep finished jobs'
+        ),
+        make_option(
+            '--once',
+            action='store_true',
+            dest='once',
+            default=False,
+            help='exit once there are no jobs to start'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.cleanup()
+
+        threads = [
+            threading.Thread(target=self.worker)
+            for dummy in range(options['jobs'])
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            # Keep main thread responsive to interrupts and periodically
+            # requeue jobs of died workers
+            last_cleanup = time.time()
+            while len([t for t in threads if t.is_alive()]) > 0:
+                time.sleep(options['poll'])
+                if time.time() - last_cleanup >= CLEANUP_INTERVAL:
+                    self.cleanup()
+                    last_cleanup = time.time()
+        except KeyboardInterrupt:
+            pass
+
+    def cleanup(self):
+        '''
+        Removes old finished jobs and requeues stuck ones.
+        '''
+        Job.objects.cleanup(self.options['keep'], self.options['timeout'])
+        connection.close()
+
+    def worker(self):
+        '''
+        Claims and runs jobs until interrupted.
+        '''
+        while True:
+            job = Job.objects.claim(self.options['jobs'])
+            if job is not None:
+                job.run(self.options['retries'])
+                continue
+
+            if self.options['once']:
+                if not Job.objects.filter(state=Job.STATE_PENDING).exists():
+                    break
+
+            # Wait for new jobs, closing connection to see them
+            connection.close()
+            time.sleep(self.options['poll'])
+
+        connection.close()
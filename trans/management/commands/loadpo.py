@@ -18,10 +18,20 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from trans.management.commands import WeblateLangCommand
+from trans.management.commands import WeblateLangCommand, JOBS_OPTION
 from optparse import make_option
 
 
+def load_translations(subproject, options):
+    '''
+    Loads translations for subproject.
+    '''
+    langs = None
+    if options['lang'] is not None:
+        langs = options['lang'].split(',')
+    subproject.create_translations(options['force'], langs)
+
+
 class Command(WeblateLangCommand):
     help = '(re)loads translations from disk'
     option_list = WeblateLangCommand.option_list + (
@@ -32,11 +42,15 @@ class Command(WeblateLangCommand):
             default=False,
             help='Force rereading files even when they should be up to date'
         ),
+        JOBS_OPTION,
     )
 
+    def get_group_keys(self, subproject):
+        '''
+        Loading uses the repository and updates checks, which are shared
+        by all subprojects in project.
+        '''
+        return [subproject.get_path(), subproject.project_id]
+
     def handle(self, *args, **options):
-        langs = None
-        if options['lang'] is not None:
-            langs = options['lang'].split(',')
-        for subproject in self.get_subprojects(*args, **options):
-            subproject.create_translations(options['force'], langs)
+        self.process_subprojects(load_translations, *args, **options)
@@ -18,12 +18,64 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from trans.management.commands import WeblateCommand
+from django.db import connection
+from trans.management.commands import WeblateCommand, JOBS_OPTION
+from trans.models import Unit
 from lang.models import Language
 from trans.search import (
-    update_index, create_source_index, create_target_index
+    FULLTEXT_INDEX, update_source_index, update_target_index,
+    create_source_index, create_target_index
 )
+from weblate import appsettings
 from optparse import make_option
+import multiprocessing
+import itertools
+import json
+import os
+
+
+def get_checkpoint_path():
+    '''
+    Returns path to file with state of interrupted rebuild.
+    '''
+    return os.path.join(appsettings.WHOOSH_INDEX, 'rebuild-checkpoint.json')
+
+
+def load_checkpoint(key):
+    '''
+    Returns list of already rebuilt indices for rebuild identified by key.
+    '''
+    try:
+        with open(get_checkpoint_path()) as handle:
+            checkpoint = json.load(handle)
+    except (IOError, ValueError):
+        return []
+    if checkpoint.get('key') != key:
+        return []
+    return checkpoint.get('done', [])
+
+
+def save_checkpoint(key, done):
+    '''
+    Stores list of already rebuilt indices.
+    '''
+    path = get_checkpoint_path()
+    with open(path + '.tmp', 'w') as handle:
+        json.dump({'key': key, 'done': done}, handle)
+    os.rename(path + '.tmp', path)
+
+
+def rebuild_target(params):
+    '''
+    Rebuilds target index for single language.
+    '''
+    lang, ids, clean = params
+    if clean:
+        create_target_index(lang=lang)
+    units = Unit.objects.filter(translation__subproject__id__in=ids)
+    with FULLTEXT_INDEX.target_writer(lang, buffered=False) as writer:
+        update_target_index(units, lang, writer)
+    return lang
 
 
 class Command(WeblateCommand):
@@ -36,15 +88,69 @@ class Command(WeblateCommand):
             default=False,
             help='removes also all words from database'
         ),
+        make_option(
+            '--restart',
+            action='store_true',
+            dest='restart',
+            default=False,
+            help='ignores state of previously interrupted rebuild'
+        ),
+        JOBS_OPTION,
     )
 
     def handle(self, *args, **options):
-        # Optionally rebuild indices from scratch
+        subprojects = self.get_subprojects(*args, **options)
+        ids = list(subprojects.values_list('id', flat=True))
+        jobs = options['jobs']
+
+        # Resume interrupted rebuild with same parameters
+        key = '%s %s %s' % (options['all'], options['clean'], sorted(args))
+        if options['restart']:
+            done = []
+        else:
+            done = load_checkpoint(key)
+
+        # Source index, processed in single writer (using several processes
+        # and not merging segments when parallel processing is requested)
+        if not 'source' in done:
+            if options['clean']:
+                create_source_index()
+            units = Unit.objects.filter(translation__subproject__id__in=ids)
+            writer = FULLTEXT_INDEX.source_writer(buffered=False, procs=jobs)
+            with writer:
+                update_source_index(units, writer)
+            done.append('source')
+            save_checkpoint(key, done)
+
+        # Target indices, each language is processed separately
         if options['clean']:
-            create_source_index()
-            for lang in Language.objects.have_translation():
-                create_target_index(lang=lang.code)
+            languages = Language.objects.have_translation()
+        else:
+            languages = Language.objects.filter(
+                translation__subproject__id__in=ids
+            ).distinct()
+        params = [
+            (lang, ids, options['clean'])
+            for lang in languages.values_list('code', flat=True)
+            if not lang in done
+        ]
+
+        if jobs <= 1:
+            results = itertools.imap(rebuild_target, params)
+        else:
+            # Workers need own database connection
+            connection.close()
+            pool = multiprocessing.Pool(jobs)
+            results = pool.imap_unordered(rebuild_target, params)
 
-        units = self.get_units(*args, **options)
+        try:
+            for lang in results:
+                done.append(lang)
+                save_checkpoint(key, done)
+        finally:
+            if jobs > 1:
+                pool.close()
+                pool.join()
 
-        update_index(units)
+        # Rebuild is complete
+        os.unlink(get_checkpoint_path())
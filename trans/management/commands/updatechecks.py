@@ -18,15 +18,32 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from trans.management.commands import WeblateCommand
+from trans.management.commands import WeblateCommand, JOBS_OPTION
+from trans.models import Unit
+
+
+def update_checks(subproject, options):
+    '''
+    Updates checks for all translated units in subproject.
+    '''
+    units = Unit.objects.filter(
+        translation__subproject=subproject,
+        translated=True
+    )
+    Unit.objects.update_checks(units)
 
 
 class Command(WeblateCommand):
     help = 'updates checks for units'
+    option_list = WeblateCommand.option_list + (
+        JOBS_OPTION,
+    )
 
-    def handle(self, *args, **options):
-        units = self.get_units(*args, **options).filter(translated=True)
+    def get_group_keys(self, subproject):
+        '''
+        Checks are shared by all subprojects in project.
+        '''
+        return [subproject.project_id]
 
-        # Invoke check for every unit
-        for unit in units.iterator():
-            unit.check()
+    def handle(self, *args, **options):
+        self.process_subprojects(update_checks, *args, **options)
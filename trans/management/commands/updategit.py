@@ -19,11 +19,25 @@
 #
 
 from trans.management.commands import WeblateCommand
+from trans.models import SubProject
+from optparse import make_option
 
 
 class Command(WeblateCommand):
     help = 'updates git repos'
+    option_list = WeblateCommand.option_list + (
+        make_option(
+            '--jobs',
+            action='store',
+            type='int',
+            dest='jobs',
+            default=None,
+            help='Number of parallel fetches (default is UPDATE_JOBS)'
+        ),
+    )
 
     def handle(self, *args, **options):
-        for subproject in self.get_subprojects(*args, **options):
-            subproject.do_update()
+        SubProject.objects.do_update(
+            self.get_subprojects(*args, **options),
+            jobs=options['jobs']
+        )
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from trans.management.commands import WeblateCommand, JOBS_OPTION
+from trans.models import TranslationCount
+
+
+def update_stats(subproject, options):
+    '''
+    Recalculates statistics for all translations in subproject.
+    '''
+    for translation in subproject.translation_set.all():
+        translation.update_stats()
+        TranslationCount.objects.update_counts(translation)
+
+
+class Command(WeblateCommand):
+    help = 'recalculates translation statistics'
+    option_list = WeblateCommand.option_list + (
+        JOBS_OPTION,
+    )
+
+    def handle(self, *args, **options):
+        self.process_subprojects(update_stats, *args, **options)
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''
+Translation memory based on Whoosh.
+'''
+
+import whoosh
+import difflib
+import hashlib
+from whoosh.fields import Schema, TEXT, ID, STORED
+from whoosh.index import create_in, open_dir
+from whoosh.query import And, Or, Term
+from weblate import appsettings
+
+MEMORY_SCHEMA = Schema(
+    unit=ID(unique=True),
+    project=ID,
+    subproject=ID,
+    key=ID,
+    language=ID,
+    source=TEXT(stored=True),
+    target=STORED,
+    origin=STORED,
+)
+
+
+def get_hash(*parts):
+    '''
+    Returns hash of given strings.
+    '''
+    md5 = hashlib.md5()
+    for part in parts:
+        md5.update(part.encode('utf-8'))
+        md5.update('\0')
+    return unicode(md5.hexdigest())
+
+
+def create_memory_index():
+    return create_in(
+        appsettings.WHOOSH_INDEX,
+        schema=MEMORY_SCHEMA,
+        indexname='memory'
+    )
+
+
+def get_memory_index():
+    '''
+    Returns translation memory index.
+    '''
+    try:
+        return open_dir(appsettings.WHOOSH_INDEX, indexname='memory')
+    except whoosh.index.EmptyIndexError:
+        return create_memory_index()
+
+
+def update_memory(units, writer):
+    '''
+    Replaces translations of subprojects of given units in translation
+    memory.
+
+    All existing entries of the subprojects are removed first, so changed
+    or deleted translations do not stay in the memory. Translations from
+    projects with access control are not included.
+    '''
+    subprojects = units.values_list(
+        'translation__subproject_id', flat=True
+    ).order_by().distinct()
+    for subproject in subprojects:
+        writer.delete_by_term('subproject', unicode(subproject))
+
+    units = units.filter(
+        translated=True,
+        translation__subproject__project__enable_acl=False,
+    ).values_list(
+        'id',
+        'source',
+        'target',
+        'translation__language__code',
+        'translation__subproject__project_id',
+        'translation__subproject_id',
+        'translation__subproject__project__name',
+        'translation__subproject__name',
+    ).order_by()
+    for item in units.iterator():
+        unit, source, target, language = item[:4]
+        project, subproject, project_name, subproject_name = item[4:]
+        writer.add_document(
+            unit=unicode(unit),
+            project=unicode(project),
+            subproject=unicode(subproject),
+            key=get_hash(language, source),
+            language=language,
+            source=source,
+            target=target,
+            origin=u'%s/%s' % (project_name, subproject_name),
+        )
+
+
+def delete_project_memory(project):
+    '''
+    Removes all translations of given project from translation memory.
+    '''
+    with get_memory_index().writer() as writer:
+        writer.delete_by_term('project', unicode(project.pk))
+
+
+def lookup_exact(language, sources):
+    '''
+    Returns dictionary of translations into given language for given
+    source strings.
+
+    When there are several translations of a string, the most frequent one
+    is used (ties are decided by the translation text).
+    '''
+    result = {}
+    with get_memory_index().searcher() as searcher:
+        for source in sources:
+            key = get_hash(language, source)
+            counts = {}
+            for docnum in searcher.document_numbers(key=key):
+                fields = searcher.stored_fields(docnum)
+                if fields['source'] == source:
+                    target = fields['target']
+                    counts[target] = counts.get(target, 0) + 1
+            if len(counts) > 0:
+                result[source] = max(
+                    counts, key=lambda item: (counts[item], item)
+                )
+    return result
+
+
+def lookup_fuzzy(language, source, limit=10, threshold=0.75):
+    '''
+    Returns list of (similarity, source, target, origin) tuples for
+    translations into given language of strings similar to source.
+    '''
+    result = []
+    with get_memory_index().searcher() as searcher:
+        # Key terms can not be calculated on empty index
+        if searcher.doc_count() == 0:
+            return result
+        key_terms = searcher.key_terms_from_text(
+            'source',
+            source,
+            numterms=10
+        )
+        query = And([
+            Term('language', language),
+            Or([Term('source', kw[0]) for kw in key_terms]),
+        ])
+        seen = set()
+        for hit in searcher.search(query, limit=limit * 10):
+            # Same translation can be stored for several units
+            if (hit['source'], hit['target']) in seen:
+                continue
+            seen.add((hit['source'], hit['target']))
+            similarity = difflib.SequenceMatcher(
+                None,
+                source,
+                hit['source']
+            ).ratio()
+            if similarity >= threshold:
+                result.append((
+                    similarity,
+                    hit['source'],
+                    hit['target'],
+                    hit['origin'],
+                ))
+    result.sort(reverse=True)
+    return result[:limit]
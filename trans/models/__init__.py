@@ -23,5 +23,7 @@ from trans.models.subproject import SubProject
 from trans.models.translation import Translation
 from trans.models.unit import Unit
 from trans.models.unitdata import Check, Suggestion, Comment, Change
-from trans.models.unitdata import IndexUpdate
+from trans.models.unitdata import IndexUpdate, PendingWrite
 from trans.models.dictionary import Dictionary
+from trans.models.stats import TranslationCount, AggregateStats
+from trans.models.jobs import Job
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from django.db import models
+from django.utils.translation import ugettext_lazy
+from django.utils import timezone
+from trans.models.project import Project
+from trans.models.subproject import SubProject
+from trans.models.translation import Translation
+from datetime import timedelta
+import logging
+
+logger = logging.getLogger('weblate')
+
+
+class JobManager(models.Manager):
+    def enqueue(self, subproject, action, translation=None):
+        '''
+        Adds job to the queue, pending job for same action is reused.
+        '''
+        pending = self.filter(
+            subproject=subproject,
+            translation=translation,
+            action=action,
+            state=Job.STATE_PENDING,
+        )
+        for job in pending[:1]:
+            return job
+        logger.info('queued %s of %s', action, subproject)
+        return self.create(
+            subproject=subproject,
+            translation=translation,
+            action=action,
+            repo=subproject.get_path(),
+        )
+
+    def enqueue_object(self, obj, action):
+        '''
+        Adds jobs for project, subproject or translation to the queue.
+        '''
+        if isinstance(obj, Project):
+            for subproject in obj.subproject_set.all():
+                self.enqueue(subproject, action)
+        elif isinstance(obj, Translation):
+            # Only commit and writing pending changes is done on
+            # translation level, other operations work on whole repository
+            if action in (Job.ACTION_COMMIT, Job.ACTION_FLUSH):
+                self.enqueue(obj.subproject, action, obj)
+            else:
+                self.enqueue(obj.subproject, action)
+        else:
+            self.enqueue(obj, action)
+
+    def claim(self, limit):
+        '''
+        Marks next pending job as running and returns it.
+
+        Jobs are not started for repositories which are already being
+        processed and no more than limit jobs can be running at once.
+        '''
+        running = self.filter(state=Job.STATE_RUNNING)
+        if running.count() >= limit:
+            return None
+
+        pending = self.filter(
+            state=Job.STATE_PENDING
+        ).exclude(
+            repo__in=running.values_list('repo', flat=True)
+        ).order_by('id')
+
+        for job in pending[:10]:
+            # Atomically take the job, it might be claimed by other worker
+            claimed = self.filter(
+                pk=job.pk,
+                state=Job.STATE_PENDING
+            ).update(
+                state=Job.STATE_RUNNING,
+                started=timezone.now()
+            )
+            if not claimed:
+                continue
+
+            # Other worker could start job on same repository in meantime,
+            # the older job wins in such case
+            if self.filter(
+                    state=Job.STATE_RUNNING,
+                    repo=job.repo,
+                    pk__lt=job.pk).exists():
+                self.filter(pk=job.pk).update(state=Job.STATE_PENDING)
+                continue
+
+            return self.get(pk=job.pk)
+
+        return None
+
+    def cleanup(self, days, timeout):
+        '''
+        Removes finished jobs older than given number of days and requeues
+        jobs running longer than timeout seconds (their worker has most
+        likely died).
+        '''
+        now = timezone.now()
+        self.filter(
+            state__in=(Job.STATE_DONE, Job.STATE_FAILED),
+            finished__lt=now - timedelta(days=days)
+        ).delete()
+        self.filter(
+            state=Job.STATE_RUNNING,
+            started__lt=now - timedelta(seconds=timeout)
+        ).update(
+            state=Job.STATE_PENDING
+        )
+
+
+class Job(models.Model):
+    ACTION_UPDATE = 'update'
+    ACTION_COMMIT = 'commit'
+    ACTION_PUSH = 'push'
+    ACTION_FLUSH = 'flush'
+
+    ACTION_CHOICES = (
+        (ACTION_UPDATE, ugettext_lazy('Update')),
+        (ACTION_COMMIT, ugettext_lazy('Commit')),
+        (ACTION_PUSH, ugettext_lazy('Push')),
+        (ACTION_FLUSH, ugettext_lazy('Write pending changes')),
+    )
+
+    STATE_PENDING = 'pending'
+    STATE_RUNNING = 'running'
+    STATE_DONE = 'done'
+    STATE_FAILED = 'failed'
+
+    STATE_CHOICES = (
+        (STATE_PENDING, ugettext_lazy('Pending')),
+        (STATE_RUNNING, ugettext_lazy('Running')),
+        (STATE_DONE, ugettext_lazy('Done')),
+        (STATE_FAILED, ugettext_lazy('Failed')),
+    )
+
+    subproject = models.ForeignKey(SubProject)
+    translation = models.ForeignKey(Translation, null=True, blank=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    state = models.CharField(
+        max_length=10,
+        choices=STATE_CHOICES,
+        default=STATE_PENDING,
+        db_index=True
+    )
+    # Path to repository used to serialize jobs on same repository
+    repo = models.CharField(max_length=200, db_index=True)
+    attempts = models.IntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    result = models.TextField(blank=True)
+
+    objects = JobManager()
+
+    class Meta:
+        ordering = ['-created']
+        app_label = 'trans'
+
+    def __unicode__(self):
+        return '%s of %s' % (self.get_action_display(), self.get_target())
+
+    def get_target(self):
+        '''
+        Returns object the job operates on.
+        '''
+        if self.translation is not None:
+            return self.translation
+        return self.subproject
+
+    def execute(self):
+        '''
+        Performs the action.
+        '''
+        target = self.get_target()
+        if self.action == Job.ACTION_UPDATE:
+            return target.do_update()
+        elif self.action == Job.ACTION_COMMIT:
+            return target.commit_pending()
+        elif self.action == Job.ACTION_PUSH:
+            return target.do_push()
+        elif self.action == Job.ACTION_FLUSH:
+            return target.flush_pending()
+        raise ValueError('Unknown action: %s' % self.action)
+
+    def run(self, retries=0):
+        '''
+        Runs claimed job and records result, failed job is queued again
+        until it fails more than retries times.
+        '''
+        self.attempts += 1
+        try:
+            self.result = repr(self.execute())
+            self.state = Job.STATE_DONE
+        except Exception as error:
+            logger.error('job %s failed: %s', self, str(error))
+            self.result = str(error)
+            self.state = Job.STATE_FAILED
+            if self.attempts <= retries and not Job.objects.filter(
+                    subproject=self.subproject,
+                    translation=self.translation,
+                    action=self.action,
+                    state=Job.STATE_PENDING).exists():
+                self.state = Job.STATE_PENDING
+        self.finished = timezone.now()
+        self.save()
@@ -20,7 +20,6 @@
 
 from django.db import models
 from weblate import appsettings
-from django.db.models import Sum
 from django.utils.translation import ugettext as _, ugettext_lazy
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.contrib import messages
@@ -34,6 +33,7 @@ from trans.validators import (
     validate_commit_message,
 )
 from trans.util import get_site_url
+from trans.memory import delete_project_memory
 
 
 DEFAULT_COMMIT_MESSAGE = (
@@ -153,6 +153,14 @@ class Project(models.Model):
         ordering = ['name']
         app_label = 'trans'
 
+    def __init__(self, *args, **kwargs):
+        '''
+        Constructor to initialize some cache properties.
+        '''
+        super(Project, self).__init__(*args, **kwargs)
+        self._aggregate = None
+        self._language_aggregate = None
+
     def has_acl(self, user):
         '''
         Checks whether current user is allowed to access this
@@ -254,8 +262,19 @@ class Project(models.Model):
         if not os.path.exists(path):
             os.makedirs(path)
 
+        # Check whether access control is being enabled
+        acl_enabled = self.enable_acl and not Project.objects.filter(
+            pk=self.pk,
+            enable_acl=True
+        ).exists()
+
         super(Project, self).save(*args, **kwargs)
 
+        # Strings of project with access control must not be offered to
+        # others by translation memory
+        if acl_enabled:
+            delete_project_memory(self)
+
         # Create ACL permissions on save
         if self.enable_acl:
             content_type = ContentType.objects.get(
@@ -281,36 +300,41 @@ class Project(models.Model):
                     content_type=content_type
                 )
 
-    def get_translated_percent(self, lang=None):
-        from trans.models.translation import Translation
-        # Filter all translations
-        translations = Translation.objects.filter(subproject__project=self)
-        # Filter by language
+    def get_stats(self, lang=None):
+        '''
+        Returns aggregated statistics of project, optionally limited to
+        language.
+        '''
+        from trans.models.stats import AggregateStats
         if lang is not None:
-            translations = translations.filter(language=lang)
-        # Aggregate
-        translations = translations.aggregate(Sum('translated'), Sum('total'))
-        total = translations['total__sum']
-        translated = translations['translated__sum']
-        # Catch no translations
-        if total == 0 or total is None:
-            return 0
-        # Return percent
-        return round(translated * 100.0 / total, 1)
+            # Statistics for all languages are loaded at once
+            if self._language_aggregate is None:
+                self._language_aggregate = \
+                    AggregateStats.objects.load_language_stats(self)
+            if not lang.pk in self._language_aggregate:
+                self._language_aggregate[lang.pk] = \
+                    AggregateStats.objects.get_stats(self, lang)
+            return self._language_aggregate[lang.pk]
+        if self._aggregate is None:
+            self._aggregate = AggregateStats.objects.get_stats(self)
+        return self._aggregate
+
+    def get_translated_percent(self, lang=None):
+        return self.get_stats(lang).get_translated_percent()
 
     def get_total(self):
         '''
         Calculates total number of strings to translate. This is done based on
         assumption that all languages have same number of strings.
         '''
-        from trans.models.translation import Translation
-        total = 0
-        for resource in self.subproject_set.all():
-            try:
-                total += resource.translation_set.all()[0].total
-            except Translation.DoesNotExist:
-                pass
-        return total
+        from trans.models.stats import AggregateStats
+        subprojects = AggregateStats.objects.load_stats(
+            self.subproject_set.all()
+        )
+        return sum([
+            subproject.get_stats().get_strings()
+            for subproject in subprojects
+        ])
 
     def get_languages(self):
         '''
@@ -358,10 +382,8 @@ class Project(models.Model):
         '''
         Updates all git repos.
         '''
-        ret = False
-        for resource in self.subproject_set.all():
-            ret &= resource.do_update(request)
-        return ret
+        from trans.models.subproject import SubProject
+        return SubProject.objects.do_update(self.subproject_set.all(), request)
 
     def do_push(self, request=None):
         '''
@@ -0,0 +1,664 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import Q, F, Sum, Count
+from django.db.models.sql import DeleteQuery
+from django.db.models.signals import (
+    pre_save, post_save, pre_delete, post_delete
+)
+from django.dispatch import receiver
+from trans.checks import CHECKS
+from lang.models import Language
+from trans.models.project import Project
+from trans.models.subproject import SubProject
+from trans.models.translation import Translation
+from trans.models.unit import Unit, BULK_BATCH
+from trans.models.unitdata import Check, Suggestion, Comment
+
+# Translation fields matching project, subproject and language of
+# aggregated statistics scope
+SCOPE_FIELDS = ('subproject__project', 'subproject', 'language')
+
+# Counters which are not related to single check
+EXTRA_COUNTS = (
+    'allchecks',
+    'sourcechecks',
+    'suggestions',
+    'sourcecomments',
+    'targetcomments',
+)
+
+
+def delete_without_signals(queryset):
+    '''
+    Deletes checks, suggestions or comments matching queryset without
+    invoking per object signal handlers.
+
+    Counters are not updated, caller is expected to recalculate them for
+    affected translations once all objects are removed.
+    '''
+    ids = list(queryset.values_list('id', flat=True))
+    DeleteQuery(queryset.model).delete_batch(ids, queryset.db)
+    return len(ids)
+
+
+def get_count_types():
+    '''
+    Returns list of all counter types.
+    '''
+    return list(EXTRA_COUNTS) + list(CHECKS)
+
+
+def needs_translated(rqtype):
+    '''
+    Checks whether counter includes only translated units (see
+    UnitManager.filter_checks).
+    '''
+    if rqtype == 'allchecks':
+        return True
+    if rqtype in CHECKS:
+        return CHECKS[rqtype].target and not CHECKS[rqtype].source
+    return False
+
+
+def get_checksum_types(language_id, checks, suggestions, comments):
+    '''
+    Returns set of counters matching unit with given checksum in
+    translation to given language.
+
+    The checks is list of (language_id, check) tuples of active checks,
+    suggestions and comments are lists of language ids.
+    '''
+    result = set()
+
+    for check_language, check in checks:
+        if check_language == language_id:
+            result.add('allchecks')
+        elif check_language is None:
+            result.add('sourcechecks')
+        else:
+            continue
+
+        if not check in CHECKS:
+            continue
+        check_obj = CHECKS[check]
+        if check_obj.source and check_obj.target:
+            result.add(check)
+        elif check_obj.source and check_language is None:
+            result.add(check)
+        elif check_obj.target and check_language == language_id:
+            result.add(check)
+
+    if language_id in suggestions:
+        result.add('suggestions')
+    if None in comments:
+        result.add('sourcecomments')
+    if language_id in comments:
+        result.add('targetcomments')
+
+    return result
+
+
+def get_checksum_data(project, checksum):
+    '''
+    Returns checks, suggestions and comments for given checksum in format
+    expected by get_checksum_types.
+    '''
+    checks = Check.objects.filter(
+        project=project,
+        checksum=checksum,
+        ignore=False
+    ).values_list('language_id', 'check')
+    suggestions = Suggestion.objects.filter(
+        project=project,
+        checksum=checksum
+    ).values_list('language_id', flat=True)
+    comments = Comment.objects.filter(
+        project=project,
+        checksum=checksum
+    ).values_list('language_id', flat=True)
+    return list(checks), list(suggestions), list(comments)
+
+
+class TranslationCountManager(models.Manager):
+    def get_counts(self, translation):
+        '''
+        Returns dictionary with all counters for translation, calculating
+        them if needed.
+        '''
+        counts = dict(
+            self.filter(translation=translation).values_list('rqtype', 'count')
+        )
+        for rqtype in get_count_types():
+            if not rqtype in counts:
+                return self.update_counts(translation)
+        return counts
+
+    def get_bulk_counts(self, translations, rqtype):
+        '''
+        Returns dictionary with counter for all translations keyed by
+        translation id, calculating them if needed.
+        '''
+        counts = dict(self.filter(
+            translation__in=translations,
+            rqtype=rqtype
+        ).values_list('translation', 'count'))
+        for translation in translations:
+            if not translation.id in counts:
+                counts[translation.id] = self.update_counts(translation)[rqtype]
+        return counts
+
+    def update_counts(self, translation):
+        '''
+        Recalculates all counters for translation.
+        '''
+        project = translation.subproject.project
+        language = translation.language
+
+        checks = {}
+        for checksum, language_id, check in Check.objects.filter(
+                Q(language=language) | Q(language=None),
+                project=project,
+                ignore=False).values_list('checksum', 'language_id', 'check'):
+            checks.setdefault(checksum, []).append((language_id, check))
+
+        suggestions = set(Suggestion.objects.filter(
+            project=project,
+            language=language
+        ).values_list('checksum', flat=True))
+
+        comments = {}
+        for checksum, language_id in Comment.objects.filter(
+                Q(language=language) | Q(language=None),
+                project=project).values_list('checksum', 'language_id'):
+            comments.setdefault(checksum, []).append(language_id)
+
+        counts = dict([(rqtype, 0) for rqtype in get_count_types()])
+        units = translation.unit_set.values_list('checksum', 'translated')
+        for checksum, translated in units.iterator():
+            if checksum in suggestions:
+                unit_suggestions = [language.id]
+            else:
+                unit_suggestions = []
+            rqtypes = get_checksum_types(
+                language.id,
+                checks.get(checksum, []),
+                unit_suggestions,
+                comments.get(checksum, [])
+            )
+            for rqtype in rqtypes:
+                if translated or not needs_translated(rqtype):
+                    counts[rqtype] += 1
+
+        # Store counters
+        counters = [
+            TranslationCount(
+                translation=translation,
+                rqtype=rqtype,
+                count=counts[rqtype]
+            )
+            for rqtype in counts
+        ]
+        with transaction.commit_on_success():
+            self.filter(translation=translation).delete()
+            for start in xrange(0, len(counters), BULK_BATCH):
+                self.bulk_create(counters[start:start + BULK_BATCH])
+
+        return counts
+
+    def apply_deltas(self, deltas):
+        '''
+        Applies dictionary of changes keyed by (translation_id, rqtype).
+        '''
+        for key in deltas:
+            if deltas[key] == 0:
+                continue
+            translation_id, rqtype = key
+            # Counters which do not exist yet will be calculated on first
+            # access
+            self.filter(
+                translation_id=translation_id,
+                rqtype=rqtype
+            ).update(
+                count=F('count') + deltas[key]
+            )
+
+    def update_checksum(self, project, checksum, before, after):
+        '''
+        Updates counters of all translations affected by change of checks,
+        suggestions or comments for given checksum.
+
+        The before and after are tuples as returned by get_checksum_data.
+        '''
+        units = Unit.objects.filter(
+            translation__subproject__project=project,
+            checksum=checksum
+        ).values_list('translation_id', 'translation__language_id', 'translated')
+
+        deltas = {}
+        for translation_id, language_id, translated in units.iterator():
+            old = get_checksum_types(language_id, *before)
+            new = get_checksum_types(language_id, *after)
+            for rqtype in old ^ new:
+                if not translated and needs_translated(rqtype):
+                    continue
+                key = (translation_id, rqtype)
+                if rqtype in new:
+                    deltas[key] = deltas.get(key, 0) + 1
+                else:
+                    deltas[key] = deltas.get(key, 0) - 1
+
+        self.apply_deltas(deltas)
+
+    def update_unit(self, unit, translated):
+        '''
+        Updates counters after change of translated flag of an unit.
+        '''
+        if unit.translated == translated:
+            return
+        project = unit.translation.subproject.project
+        rqtypes = get_checksum_types(
+            unit.translation.language_id,
+            *get_checksum_data(project, unit.checksum)
+        )
+        if unit.translated:
+            delta = 1
+        else:
+            delta = -1
+        self.apply_deltas(dict([
+            ((unit.translation_id, rqtype), delta)
+            for rqtype in rqtypes if needs_translated(rqtype)
+        ]))
+
+
+class TranslationCount(models.Model):
+    '''
+    Number of units matching given filter in translation (see
+    UnitManager.filter_type).
+    '''
+    translation = models.ForeignKey(Translation)
+    rqtype = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    objects = TranslationCountManager()
+
+    class Meta:
+        unique_together = ('translation', 'rqtype')
+        app_label = 'trans'
+
+
+def get_scope(obj, language=None):
+    '''
+    Returns project, subproject and language ids identifying aggregated
+    statistics of project (optionally limited to language), subproject or
+    language.
+    '''
+    if isinstance(obj, Project):
+        if language is None:
+            return (obj.pk, None, None)
+        return (obj.pk, None, language.pk)
+    elif isinstance(obj, SubProject):
+        return (obj.project_id, obj.pk, None)
+    return (None, None, obj.pk)
+
+
+def get_scope_key(project_id, subproject_id, language_id):
+    '''
+    Returns string identifying scope of aggregated statistics.
+
+    It is used as unique key, nullable columns can not be used for that as
+    NULL values are never equal.
+    '''
+    return 'p:%s/s:%s/l:%s' % tuple([
+        '-' if item is None else item
+        for item in (project_id, subproject_id, language_id)
+    ])
+
+
+class AggregateStatsManager(models.Manager):
+    def get_stats(self, obj, language=None):
+        '''
+        Returns statistics for project, subproject, language or project and
+        language, calculating them if needed.
+        '''
+        scope = get_scope(obj, language)
+        return self.get_scopes([scope])[scope]
+
+    def load_stats(self, objects):
+        '''
+        Loads statistics for list of projects, subprojects or languages
+        using single query, missing ones are calculated at once.
+
+        The statistics are stored in the objects, so their methods like
+        get_translated_percent do not need to access database.
+        '''
+        objects = list(objects)
+        scopes = [get_scope(obj) for obj in objects]
+        stats = self.get_scopes(scopes)
+        for obj, scope in zip(objects, scopes):
+            obj._aggregate = stats[scope]
+        return objects
+
+    def load_language_stats(self, project):
+        '''
+        Loads statistics of project limited to each of its languages using
+        single query, missing ones are calculated at once.
+
+        Returns dictionary keyed by language id.
+        '''
+        scopes = [
+            (project.pk, None, language.pk)
+            for language in project.get_languages()
+        ]
+        stats = self.get_scopes(scopes)
+        return dict([(scope[2], stats[scope]) for scope in scopes])
+
+    def get_scopes(self, scopes):
+        '''
+        Returns dictionary of statistics keyed by scope for list of scopes
+        of same kind, missing ones are calculated.
+        '''
+        if len(scopes) == 0:
+            return {}
+        keys = dict([(get_scope_key(*scope), scope) for scope in scopes])
+        result = dict([
+            (keys[stats.scope], stats)
+            for stats in self.filter(scope__in=keys.keys())
+        ])
+        missing = [scope for scope in keys.values() if not scope in result]
+        if len(missing) > 0:
+            result.update(self.calculate_scopes(missing))
+        return result
+
+    def sum_scopes(self, scopes):
+        '''
+        Sums statistics of translations for list of scopes of same kind
+        using single query.
+
+        Returns dictionary with aggregated values keyed by scope, scopes
+        without any translation are not included.
+        '''
+        translations = Translation.objects.all()
+        fields = []
+        for pos, field in enumerate(SCOPE_FIELDS):
+            if scopes[0][pos] is None:
+                continue
+            fields.append(field)
+            translations = translations.filter(**{
+                '%s__in' % field: set([scope[pos] for scope in scopes])
+            })
+
+        data = translations.values(*fields).annotate(
+            Sum('translated'), Sum('fuzzy'), Sum('total'), Count('id')
+        ).order_by()
+
+        result = {}
+        for item in data:
+            scope = tuple([
+                item[field] if field in fields else None
+                for field in SCOPE_FIELDS
+            ])
+            result[scope] = item
+        return result
+
+    def calculate(self, project_id, subproject_id, language_id):
+        '''
+        Calculates and stores statistics for given scope.
+        '''
+        scope = (project_id, subproject_id, language_id)
+        return self.calculate_scopes([scope])[scope]
+
+    def calculate_scopes(self, scopes):
+        '''
+        Calculates and stores statistics for list of scopes of same kind,
+        returns dictionary keyed by scope.
+
+        The statistics are stored first and then calculated again with the
+        rows locked, so that changes applied by apply_deltas meanwhile are
+        not lost (update_stats_delta changes translation and aggregated
+        statistics in single transaction). Statistics stored by other
+        request meanwhile are just read.
+        '''
+        data = self.sum_scopes(scopes)
+        created = []
+        for scope in scopes:
+            stats = AggregateStats(
+                scope=get_scope_key(*scope),
+                project_id=scope[0],
+                subproject_id=scope[1],
+                language_id=scope[2],
+            )
+            stats.set_data(data.get(scope))
+            created.append(stats)
+
+        try:
+            with transaction.commit_on_success():
+                for start in xrange(0, len(created), BULK_BATCH):
+                    self.bulk_create(created[start:start + BULK_BATCH])
+        except IntegrityError:
+            if len(scopes) > 1:
+                # Process one by one to find out which already exist
+                result = {}
+                for scope in scopes:
+                    result.update(self.calculate_scopes([scope]))
+                return result
+            return {scopes[0]: self.get(scope=created[0].scope)}
+
+        result = {}
+        with transaction.commit_on_success():
+            locked = self.select_for_update().filter(
+                scope__in=[stats.scope for stats in created]
+            )
+            locked = list(locked)
+            data = self.sum_scopes(scopes)
+            for stats in locked:
+                scope = (
+                    stats.project_id, stats.subproject_id, stats.language_id
+                )
+                stats.set_data(data.get(scope))
+                stats.save()
+                result[scope] = stats
+        return result
+
+    def get_translation_keys(self, translation):
+        '''
+        Returns keys of all statistics including given translation.
+        '''
+        subproject = translation.subproject
+        return [
+            get_scope_key(subproject.project_id, None, None),
+            get_scope_key(subproject.project_id, subproject.pk, None),
+            get_scope_key(None, None, translation.language_id),
+            get_scope_key(
+                subproject.project_id, None, translation.language_id
+            ),
+        ]
+
+    def apply_deltas(self, translation, translated, fuzzy):
+        '''
+        Applies changes of translation statistics to aggregated ones.
+        '''
+        # Statistics which do not exist yet will be calculated on first
+        # access
+        self.filter(scope__in=self.get_translation_keys(translation)).update(
+            translated=F('translated') + translated,
+            fuzzy=F('fuzzy') + fuzzy,
+        )
+
+    def invalidate(self, translation):
+        '''
+        Removes all statistics including given translation, they will be
+        calculated again on first access.
+        '''
+        self.filter(scope__in=self.get_translation_keys(translation)).delete()
+
+
+class AggregateStats(models.Model):
+    '''
+    Summed statistics of translations in project, subproject, language or
+    project and language, used on listing pages.
+    '''
+    scope = models.CharField(max_length=100, unique=True)
+    project = models.ForeignKey(Project, null=True, blank=True)
+    subproject = models.ForeignKey(SubProject, null=True, blank=True)
+    language = models.ForeignKey(Language, null=True, blank=True)
+    translated = models.IntegerField(default=0)
+    fuzzy = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    translations = models.IntegerField(default=0)
+
+    objects = AggregateStatsManager()
+
+    class Meta:
+        app_label = 'trans'
+
+    def set_data(self, data):
+        '''
+        Sets statistics from values returned by
+        AggregateStatsManager.sum_scopes.
+        '''
+        if data is None:
+            self.translated = self.fuzzy = self.total = self.translations = 0
+            return
+        self.translated = data['translated__sum'] or 0
+        self.fuzzy = data['fuzzy__sum'] or 0
+        self.total = data['total__sum'] or 0
+        self.translations = data['id__count']
+
+    def get_translated_percent(self):
+        '''
+        Returns percent of translated strings.
+        '''
+        if self.total == 0:
+            return 0
+        return round(self.translated * 100.0 / self.total, 1)
+
+    def get_strings(self):
+        '''
+        Returns number of strings in subproject, assuming that all
+        translations have same number of strings.
+        '''
+        if self.translations == 0:
+            return 0
+        return self.total / self.translations
+
+
+def update_counts(project, checksum, instance, created, deleted):
+    '''
+    Updates counters on change of single check, suggestion or comment.
+    '''
+    checks, suggestions, comments = get_checksum_data(project, checksum)
+    before = (list(checks), list(suggestions), list(comments))
+
+    if isinstance(instance, Check):
+        item = (instance.language_id, instance.check)
+        if created:
+            before[0].remove(item)
+        elif deleted:
+            before[0].append(item)
+        elif instance.ignore:
+            before[0].append(item)
+        else:
+            before[0].remove(item)
+    else:
+        if isinstance(instance, Suggestion):
+            items = before[1]
+        else:
+            items = before[2]
+        if created:
+            items.remove(instance.language_id)
+        else:
+            items.append(instance.language_id)
+
+    TranslationCount.objects.update_checksum(
+        project, checksum, before, (checks, suggestions, comments)
+    )
+
+
+@receiver(pre_save, sender=Check)
+def check_pre_save(sender, instance, **kwargs):
+    '''
+    Remembers ignore flag of stored check.
+    '''
+    instance.old_ignore = None
+    if instance.pk is not None:
+        try:
+            instance.old_ignore = Check.objects.get(pk=instance.pk).ignore
+        except Check.DoesNotExist:
+            pass
+
+
+@receiver(post_save, sender=Check)
+def check_post_save(sender, instance, created, **kwargs):
+    '''
+    Updates counters on creating or (un)ignoring check.
+    '''
+    if created:
+        if not instance.ignore:
+            update_counts(
+                instance.project, instance.checksum, instance, True, False
+            )
+    elif instance.old_ignore != instance.ignore:
+        update_counts(
+            instance.project, instance.checksum, instance, False, False
+        )
+
+
+@receiver(post_delete, sender=Check)
+def check_post_delete(sender, instance, **kwargs):
+    '''
+    Updates counters on removing check.
+    '''
+    if not instance.ignore:
+        update_counts(
+            instance.project_id, instance.checksum, instance, False, True
+        )
+
+
+@receiver(pre_delete, sender=Translation)
+def translation_pre_delete(sender, instance, **kwargs):
+    '''
+    Removes aggregated statistics including deleted translation.
+    '''
+    AggregateStats.objects.invalidate(instance)
+
+
+@receiver(post_save, sender=Suggestion)
+@receiver(post_save, sender=Comment)
+def post_save_handler(sender, instance, created, **kwargs):
+    '''
+    Updates counters on adding suggestion or comment.
+    '''
+    if created:
+        update_counts(
+            instance.project_id, instance.checksum, instance, True, False
+        )
+
+
+@receiver(post_delete, sender=Suggestion)
+@receiver(post_delete, sender=Comment)
+def post_delete_handler(sender, instance, **kwargs):
+    '''
+    Updates counters on removing suggestion or comment.
+    '''
+    update_counts(
+        instance.project_id, instance.checksum, instance, False, True
+    )
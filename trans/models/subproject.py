@@ -18,14 +18,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from django.db import models
-from django.db.models import Sum
+from django.db import models, connection
 from django.utils.translation import ugettext as _, ugettext_lazy
 from django.core.mail import mail_admins
 from django.core.exceptions import ValidationError
 from django.contrib import messages
 from django.core.urlresolvers import reverse
+from django.utils.datastructures import SortedDict
 from glob import glob
+from multiprocessing.pool import ThreadPool
 import os
 import os.path
 import logging
@@ -37,9 +38,13 @@ from trans.formats import (
 )
 from trans.models.project import Project
 from trans.filelock import FileLock
+from trans.flock import FlockLock, HAS_FLOCK
+from trans.storecache import STORE_CACHE
+from trans.gitstate import get_git_state
 from trans.util import is_repo_link
 from trans.util import get_site_url
 from trans.util import sleep_while_git_locked
+from weblate import appsettings
 from trans.validators import (
     validate_repoweb,
     validate_filemask,
@@ -49,6 +54,17 @@ from trans.validators import (
 logger = logging.getLogger('weblate')
 
 
+def fetch_subproject(subproject):
+    '''
+    Fetches remote repository, used in worker threads.
+    '''
+    try:
+        subproject.update_remote_branch()
+    finally:
+        # Close database connection opened by this thread
+        connection.close()
+
+
 class SubProjectManager(models.Manager):
     def all_acl(self, user):
         '''
@@ -68,6 +84,56 @@ class SubProjectManager(models.Manager):
         project, subproject = val[10:].split('/', 1)
         return self.get(slug=subproject, project__slug=project)
 
+    def do_update(self, subprojects, request=None, jobs=None):
+        '''
+        Updates repositories of given subprojects.
+
+        Remote repositories are fetched in parallel, merging and updating
+        translations is then done sequentially. Repositories shared by
+        linked subprojects are processed only once.
+        '''
+        if jobs is None:
+            jobs = appsettings.UPDATE_JOBS
+
+        # Group subprojects by repository
+        repos = SortedDict()
+        for subproject in subprojects.select_related('project'):
+            if subproject.is_repo_link():
+                owner = subproject.linked_subproject
+            else:
+                owner = subproject
+            path = owner.get_path()
+            if not path in repos:
+                repos[path] = (owner, [])
+            repos[path][1].append(subproject)
+
+        # Fetch remote repositories
+        owners = [owner for owner, linked in repos.values()]
+        if jobs > 1 and len(owners) > 1:
+            pool = ThreadPool(min(jobs, len(owners)))
+            try:
+                pool.map(fetch_subproject, owners)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for owner in owners:
+                owner.update_remote_branch()
+
+        # Merge and update translations
+        ret = True
+        for owner, linked in repos.values():
+            head = owner.git_state.get_head()
+            ret &= owner.do_update(request, fetch=False)
+            if owner.git_state.get_head() == head:
+                continue
+            # Repository was changed, rescan linked subprojects as well
+            for subproject in linked:
+                if subproject.is_repo_link():
+                    subproject.create_translations(request=request)
+
+        return ret
+
 
 class SubProject(models.Model):
     name = models.CharField(
@@ -170,8 +236,9 @@ class SubProject(models.Model):
         Constructor to initialize some cache properties.
         '''
         super(SubProject, self).__init__(*args, **kwargs)
-        self._lock = None
+        self._locks = {}
         self._git_repo = None
+        self._aggregate = None
         self._file_format = None
         self._template_store = None
 
@@ -272,16 +339,35 @@ class SubProject(models.Model):
         '''
         return os.path.join(self.project.get_path(), self.slug + '.lock')
 
-    def get_git_lock(self):
+    def get_git_lock(self, shared=False):
         '''
         Returns lock object for current translation instance.
-        '''
-        if self._lock is None:
-            self._lock = FileLock(
-                self.get_git_lock_path(),
-                timeout=20
-            )
-        return self._lock
+
+        Shared lock can be used by readers, it is exclusive with file
+        based locking. Shared and exclusive lock can be nested.
+        '''
+        use_flock = appsettings.GIT_LOCK_BACKEND == 'flock' and HAS_FLOCK
+        if not use_flock:
+            # File lock can not be shared
+            shared = False
+        if not shared in self._locks:
+            if use_flock and (not shared) in self._locks:
+                # Use same file descriptor as the other lock
+                self._locks[shared] = self._locks[not shared].get_variant(
+                    shared
+                )
+            elif use_flock:
+                self._locks[shared] = FlockLock(
+                    self.get_git_lock_path(),
+                    timeout=20,
+                    shared=shared
+                )
+            else:
+                self._locks[shared] = FileLock(
+                    self.get_git_lock_path(),
+                    timeout=20
+                )
+        return self._locks[shared]
 
     def can_push(self):
         '''
@@ -317,6 +403,13 @@ class SubProject(models.Model):
 
         return self._git_repo
 
+    @property
+    def git_state(self):
+        '''
+        Gets cached state of Git repository.
+        '''
+        return get_git_state(self.get_path())
+
     def get_last_remote_commit(self):
         '''
         Returns latest remote commit we know.
@@ -356,6 +449,7 @@ class SubProject(models.Model):
                 # so we will sleep a bit an retry
                 sleep_while_git_locked()
                 self.git_repo.git.remote('update', 'origin')
+            self.git_state.invalidate()
         except Exception as e:
             logger.error('Failed to update Git repo: %s', str(e))
             if validate:
@@ -411,15 +505,19 @@ class SubProject(models.Model):
         # switch to correct branch
         gitrepo.git.checkout(self.branch)
 
-    def do_update(self, request=None):
+    def do_update(self, request=None, fetch=True):
         '''
         Wrapper for doing repository update and pushing them to translations.
+
+        With fetch set to False, remote repository is expected to be already
+        fetched.
         '''
         if self.is_repo_link():
-            return self.linked_subproject.do_update(request)
+            return self.linked_subproject.do_update(request, fetch)
 
         # pull remote
-        self.update_remote_branch()
+        if fetch:
+            self.update_remote_branch()
 
         # do we have something to merge?
         if not self.git_needs_merge():
@@ -449,10 +547,13 @@ class SubProject(models.Model):
 
         # Do we have push configured
         if not self.can_push():
-            messages.error(
-                request,
-                _('Push is disabled for %s.') % self.__unicode__()
-            )
+            if request is not None:
+                messages.error(
+                    request,
+                    _('Push is disabled for %s.') % self.__unicode__()
+                )
+            else:
+                logger.info('push is disabled for %s', self.__unicode__())
             return False
 
         # Commit any pending changes
@@ -545,13 +646,127 @@ class SubProject(models.Model):
                 True, skip_push=skip_push
             )
 
-        for translation in self.translation_set.all():
-            translation.commit_pending(skip_push=skip_push)
+        if appsettings.GROUP_COMMITS:
+            self.commit_grouped(skip_push=skip_push)
+        else:
+            for translation in self.translation_set.all():
+                translation.commit_pending(skip_push=skip_push)
 
         # Process linked projects
         for subproject in self.get_linked_childs():
             subproject.commit_pending(True, skip_push=skip_push)
 
+    def commit_grouped(self, skip_push=False):
+        '''
+        Commits pending changes in all translations, creating single commit
+        for each author.
+        '''
+        from trans.models.unitdata import Change, PendingWrite
+
+        # Write changes waiting for backend
+        pending = PendingWrite.objects.filter(
+            unit__translation__subproject=self
+        ).values_list('unit__translation', flat=True).distinct()
+        for translation in self.translation_set.filter(pk__in=pending):
+            translation.flush_pending()
+
+        # Find changed files
+        translations = dict([
+            (translation.pk, translation)
+            for translation in self.translation_set.select_related('language')
+            if translation.git_needs_commit()
+        ])
+        if len(translations) == 0:
+            return
+
+        # Find last changes
+        last_changes = Change.objects.content().filter(
+            translation__in=translations.keys()
+        ).values('translation').annotate(
+            last=models.Max('id')
+        ).order_by()
+
+        changes = Change.objects.filter(
+            pk__in=[item['last'] for item in last_changes]
+        ).select_related('user')
+
+        # Group translations by author
+        authors = {}
+        for change in changes:
+            translation = translations[change.translation_id]
+            author = translation.get_author_name(change.user)
+            if not author in authors:
+                authors[author] = ([], change.timestamp)
+            files, timestamp = authors[author]
+            files.append(translation)
+            authors[author] = (files, max(timestamp, change.timestamp))
+
+        if len(authors) == 0:
+            return
+
+        with self.get_git_lock():
+            self.configure_committer()
+            for author, (files, timestamp) in authors.items():
+                logger.info(
+                    'Commiting %d files in %s as %s',
+                    len(files),
+                    self,
+                    author
+                )
+                self.git_repo.git.commit(
+                    *[translation.filename for translation in files],
+                    author=author.encode('utf-8'),
+                    date=timestamp.isoformat(),
+                    m='\n\n'.join([
+                        translation.get_commit_message()
+                        for translation in files
+                    ])
+                )
+                self.git_state.invalidate()
+                for translation in files:
+                    translation.store_hash()
+
+        # Push if we should
+        if self.project.push_on_commit and not skip_push:
+            self.do_push(force_commit=False)
+
+    def __configure_git(self, section, key, expected):
+        '''
+        Adjysts git config to ensure that section.key is set to expected.
+        '''
+        cnf = self.git_repo.config_writer()
+        try:
+            # Get value and if it matches we're done
+            value = cnf.get(section, key)
+            if value == expected:
+                return
+        except:
+            pass
+
+        # Try to add section (might fail if it exists)
+        try:
+            cnf.add_section(section)
+        except:
+            pass
+        # Update config
+        cnf.set(section, key, expected)
+
+    def configure_committer(self):
+        '''
+        Wrapper for setting proper committer. As this can not be done by
+        passing parameter, we need to check config on every commit.
+        '''
+        self.__configure_git(
+            'user',
+            'name',
+            self.project.committer_name
+        )
+        self.__configure_git(
+            'user',
+            'email',
+            self.project.committer_email
+        )
+
     def notify_merge_failure(self, error, status):
         '''
         Sends out notifications on merge failure.
@@ -847,48 +1062,32 @@ class SubProject(models.Model):
         if changed_git:
             self.create_translations()
 
+    def get_stats(self):
+        '''
+        Returns aggregated statistics of subproject.
+        '''
+        from trans.models.stats import AggregateStats
+        if self._aggregate is None:
+            self._aggregate = AggregateStats.objects.get_stats(self)
+        return self._aggregate
+
     def get_translated_percent(self):
         '''
         Returns percent of translated strings.
         '''
-        translations = self.translation_set.aggregate(
-            Sum('translated'), Sum('total')
-        )
-
-        total = translations['total__sum']
-        translated = translations['translated__sum']
-
-        if total == 0:
-            return 0
-
-        return round(translated * 100.0 / total, 1)
+        return self.get_stats().get_translated_percent()
 
     def git_needs_commit(self):
         '''
         Checks whether there are some not commited changes.
         '''
-        status = self.git_repo.git.status('--porcelain')
-        if status == '':
-            # No changes to commit
-            return False
-        return True
-
-    def git_check_merge(self, revision):
-        '''
-        Checks whether there are any unmerged commits compared to given
-        revision.
-        '''
-        status = self.git_repo.git.log(revision, '--')
-        if status == '':
-            # No changes to merge
-            return False
-        return True
+        return self.git_state.needs_commit()
 
     def git_needs_merge(self):
-        return self.git_check_merge('..origin/%s' % self.branch)
+        return self.git_state.needs_merge(self.branch)
 
     def git_needs_push(self):
-        return self.git_check_merge('origin/%s..' % self.branch)
+        return self.git_state.needs_push(self.branch)
 
     def get_file_format(self):
         '''
@@ -915,19 +1114,39 @@ class SubProject(models.Model):
         '''
         return self.get_file_format().mark_fuzzy
 
+    def load_store(self, filename):
+        '''
+        Parses ttkit store from file in this subproject, the result is
+        not cached.
+        '''
+        return ttkit(filename, self.file_format)
+
     def get_template_store(self):
         '''
         Gets ttkit store for template.
+
+        The store can be shared with other requests and must not be
+        changed.
         '''
         # Do we need template?
         if not self.has_template():
             return None
 
         if self._template_store is None:
-            self._template_store = ttkit(
-                self.get_template_filename(),
-                self.file_format
-            )
+            filename = self.get_template_filename()
+
+            def loader():
+                return self.load_store(filename)
+
+            try:
+                blob_hash = self.git_state.get_blob_hash(self.template)
+            except KeyError:
+                # File is not yet in Git, can not use cache
+                self._template_store = loader()
+            else:
+                self._template_store = STORE_CACHE.get(
+                    filename, blob_hash, loader
+                )
 
         return self._template_store
 
@@ -18,18 +18,19 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from weblate import appsettings
-from django.db.models import Q
+from django.db.models import Q, F
 from django.utils.translation import ugettext as _
 from django.utils.safestring import mark_safe
 from django.core.exceptions import ValidationError
-from django.core.cache import cache
 from django.utils import timezone
 from django.core.urlresolvers import reverse
+from django.contrib import messages
 import os.path
 import logging
+import itertools
 import git
 from translate.storage.lisa import LISAfile
 from translate.storage import poheader
@@ -37,7 +38,9 @@ from datetime import datetime, timedelta
 
 import weblate
 from lang.models import Language
-from trans.formats import ttkit
+from trans.formats import ttkit, StoreIndex
+from trans.storecache import STORE_CACHE
+from trans.filelock import FileLockException
 from trans.checks import CHECKS
 from trans.models.subproject import SubProject
 from trans.models.project import Project
@@ -125,6 +128,9 @@ class Translation(models.Model):
         '''
         super(Translation, self).__init__(*args, **kwargs)
         self._store = None
+        self._store_index = None
+        self._template_store = None
+        self._flushing = False
 
     def has_acl(self, user):
         '''
@@ -242,7 +248,7 @@ class Translation(models.Model):
         # Clean timestamp on unlock
         if user is None:
             self.lock_time = datetime.now()
-            self.save()
+            self.save_lock()
             return
 
         self.update_lock_time(explicit, is_new)
@@ -261,7 +267,19 @@ class Translation(models.Model):
         if is_new or new_lock_time > self.lock_time:
             self.lock_time = new_lock_time
 
-        self.save()
+        self.save_lock()
+
+    def save_lock(self):
+        '''
+        Stores lock in database.
+
+        Only lock fields are updated as saving whole object would overwrite
+        statistics changed by update_stats_delta in other requests.
+        '''
+        Translation.objects.filter(pk=self.pk).update(
+            lock_user=self.lock_user,
+            lock_time=self.lock_time,
+        )
 
     def update_lock(self, request):
         '''
@@ -369,6 +387,22 @@ class Translation(models.Model):
             'lang': self.language.code
         })
 
+    @models.permalink
+    def get_zen_url(self):
+        return ('zen', (), {
+            'project': self.subproject.project.slug,
+            'subproject': self.subproject.slug,
+            'lang': self.language.code
+        })
+
+    @models.permalink
+    def get_save_zen_url(self):
+        return ('save_zen', (), {
+            'project': self.subproject.project.slug,
+            'subproject': self.subproject.slug,
+            'lang': self.language.code
+        })
+
     @models.permalink
     def get_source_review_url(self):
         return ('review_source', (), {
@@ -393,12 +427,54 @@ class Translation(models.Model):
         Returns ttkit storage object for a translation.
         '''
         if self._store is None:
-            self._store = ttkit(
-                self.get_filename(),
-                self.subproject.file_format
-            )
+            filename = self.get_filename()
+
+            def loader():
+                return self.subproject.load_store(filename)
+
+            try:
+                blob_hash = self.get_git_blob_hash()
+            except KeyError:
+                # File is not yet in Git, can not use cache
+                self._store = loader()
+            else:
+                self._store = STORE_CACHE.get(filename, blob_hash, loader)
+        return self._store
+
+    def get_writable_store(self):
+        '''
+        Returns ttkit storage object which can be changed.
+
+        Stores in STORE_CACHE are shared by all requests and threads, so
+        the file is parsed again to get private store, which is used by
+        this object from now on. This should be called with git lock
+        acquired, the store is put to the cache once it is saved.
+        '''
+        self._store = self.subproject.load_store(self.get_filename())
+        self._store_index = None
+        self._template_store = None
         return self._store
 
+    def cache_store(self):
+        '''
+        Puts saved store back to the cache.
+
+        The store must not be changed afterwards.
+        '''
+        try:
+            blob_hash = self.get_git_blob_hash()
+        except KeyError:
+            return
+        STORE_CACHE.set(self.get_filename(), blob_hash, self._store)
+
+    def get_store_index(self):
+        '''
+        Returns lookup structure for units in ttkit store.
+        '''
+        if self._store_index is None:
+            self._store_index = StoreIndex(self.get_store())
+        return self._store_index
+
     def check_sync(self):
         '''
         Checks whether database is in sync with git and possibly does update.
@@ -411,6 +487,11 @@ class Translation(models.Model):
         '''
         from trans.models.unit import Unit
         from trans.models.unitdata import Check, Suggestion, Comment, Change
+        from trans.models.stats import TranslationCount, delete_without_signals
+
+        # Write changes waiting for backend, they would be lost otherwise
+        self.flush_pending()
+
         blob_hash = self.get_git_blob_hash()
 
         # Check if we're not already up to date
@@ -429,45 +510,20 @@ class Translation(models.Model):
         else:
             return
 
-        oldunits = set(self.unit_set.all().values_list('id', flat=True))
+        # Drop possibly outdated parsed file
+        self._store = None
+        self._store_index = None
 
-        # Was there change?
-        was_new = False
-        # Position of current unit
-        pos = 1
         # Load translation file
         store = self.get_store()
         # Load translation template
         template_store = self.subproject.get_template_store()
-        if template_store is None:
-            for unit in store.units:
-                # We care only about translatable strings
-                if not is_translatable(unit):
-                    continue
-                newunit, is_new = Unit.objects.update_from_unit(
-                    self, unit, pos
-                )
-                was_new = was_new or (is_new and not newunit.translated)
-                pos += 1
-                try:
-                    oldunits.remove(newunit.id)
-                except:
-                    pass
-        else:
-            for template_unit in template_store.units:
-                # We care only about translatable strings
-                if not is_translatable(template_unit):
-                    continue
-                unit = store.findid(template_unit.getid())
-                newunit, is_new = Unit.objects.update_from_unit(
-                    self, unit, pos, template=template_unit
-                )
-                was_new = was_new or (is_new and not newunit.translated)
-                pos += 1
-                try:
-                    oldunits.remove(newunit.id)
-                except:
-                    pass
+
+        # Process all units at once
+        oldunits, was_new = Unit.objects.import_units(
+            self,
+            self.get_import_units(store, template_store)
+        )
 
         # Delete not used units
         units_to_delete = Unit.objects.filter(
@@ -479,7 +535,8 @@ class Translation(models.Model):
         deleted_checksums = list(deleted_checksums)
         units_to_delete.delete()
 
-        # Cleanup checks for deleted units
+        # Cleanup checks for deleted units, these are not referenced by any
+        # other translation, so counters are updated only for this one below
         for checksum in deleted_checksums:
             units = Unit.objects.filter(
                 translation__language=self.language,
@@ -488,23 +545,23 @@ class Translation(models.Model):
             )
             if not units.exists():
                 # Last unit referencing to these checks
-                Check.objects.filter(
+                delete_without_signals(Check.objects.filter(
                     project=self.subproject.project,
                     language=self.language,
                     checksum=checksum
-                ).delete()
+                ))
                 # Delete suggestons referencing this unit
-                Suggestion.objects.filter(
+                delete_without_signals(Suggestion.objects.filter(
                     project=self.subproject.project,
                     language=self.language,
                     checksum=checksum
-                ).delete()
+                ))
                 # Delete translation comments referencing this unit
-                Comment.objects.filter(
+                delete_without_signals(Comment.objects.filter(
                     project=self.subproject.project,
                     language=self.language,
                     checksum=checksum
-                ).delete()
+                ))
                 # Check for other units with same source
                 other_units = Unit.objects.filter(
                     translation__subproject__project=self.subproject.project,
@@ -512,25 +569,26 @@ class Translation(models.Model):
                 )
                 if not other_units.exists():
                     # Delete source comments as well if this was last reference
-                    Comment.objects.filter(
+                    delete_without_signals(Comment.objects.filter(
                         project=self.subproject.project,
                         language=None,
                         checksum=checksum
-                    ).delete()
+                    ))
                     # Delete source checks as well if this was last reference
-                    Check.objects.filter(
+                    delete_without_signals(Check.objects.filter(
                         project=self.subproject.project,
                         language=None,
                         checksum=checksum
-                    ).delete()
+                    ))
             else:
                 # There are other units as well, but some checks
                 # (eg. consistency) needs update now
-                for unit in units:
-                    unit.check()
+                Unit.objects.update_checks(units)
 
         # Update revision and stats
         self.update_stats()
+        self.store_hash()
+        TranslationCount.objects.update_counts(self)
 
         # Store change entry
         if request is None:
@@ -552,6 +610,23 @@ class Translation(models.Model):
             for subscription in subscriptions:
                 subscription.notify_new_string(self)
 
+    def get_import_units(self, store, template_store):
+        '''
+        Iterator over translatable units in the store, yields tuples of
+        unit and matching template unit.
+        '''
+        if template_store is None:
+            for unit in store.units:
+                # We care only about translatable strings
+                if is_translatable(unit):
+                    yield unit, None
+        else:
+            for template_unit in template_store.units:
+                # We care only about translatable strings
+                if is_translatable(template_unit):
+                    unit = store.findid(template_unit.getid())
+                    yield unit, template_unit
+
     @property
     def git_repo(self):
         return self.subproject.git_repo
@@ -575,22 +650,48 @@ class Translation(models.Model):
         '''
         Returns current Git blob hash for file.
         '''
-        tree = self.git_repo.tree()
-        ret = tree[self.filename].hexsha
+        git_state = self.subproject.git_state
+        ret = git_state.get_blob_hash(self.filename)
         if self.subproject.has_template():
             ret += ','
-            ret += tree[self.subproject.template].hexsha
+            ret += git_state.get_blob_hash(self.subproject.template)
         return ret
 
     def update_stats(self):
         '''
-        Updates translation statistics.
+        Recalculates translation statistics.
+
+        This is needed only after import of translation file or to fix
+        inconsistencies, changes of single units are applied using
+        update_stats_delta.
         '''
+        from trans.models.stats import AggregateStats
         self.total = self.unit_set.count()
         self.fuzzy = self.unit_set.filter(fuzzy=True).count()
         self.translated = self.unit_set.filter(translated=True).count()
         self.save()
-        self.store_hash()
+        AggregateStats.objects.invalidate(self)
+
+    def update_stats_delta(self, translated=0, fuzzy=0):
+        '''
+        Updates translation statistics by given differences.
+
+        The counters (including aggregated ones for projects and languages)
+        are changed atomically in the database, so concurrent saves of units
+        do not need to count them again. Both are changed in single
+        transaction, see AggregateStatsManager.calculate_scopes.
+        '''
+        from trans.models.stats import AggregateStats
+        if translated == 0 and fuzzy == 0:
+            return
+        with transaction.commit_on_success():
+            Translation.objects.filter(pk=self.pk).update(
+                translated=F('translated') + translated,
+                fuzzy=F('fuzzy') + fuzzy,
+            )
+            AggregateStats.objects.apply_deltas(self, translated, fuzzy)
+        self.translated += translated
+        self.fuzzy += fuzzy
 
     def store_hash(self):
         '''
@@ -598,7 +699,8 @@ class Translation(models.Model):
         '''
         blob_hash = self.get_git_blob_hash()
         self.revision = blob_hash
-        self.save()
+        # Update only revision, see save_lock
+        Translation.objects.filter(pk=self.pk).update(revision=blob_hash)
 
     def get_last_author(self, email=True):
         '''
@@ -622,10 +724,55 @@ class Translation(models.Model):
         except IndexError:
             return None
 
+    def flush_pending(self):
+        '''
+        Writes changes recorded with OFFLOAD_WRITES to backend file.
+        '''
+        from trans.models.unitdata import PendingWrite
+        from trans.models.unit import BULK_BATCH
+
+        # Avoid recursion from commit_pending while writing
+        if self._flushing:
+            return
+
+        writes = list(PendingWrite.objects.filter(
+            unit__translation=self
+        ).select_related(
+            'unit', 'user'
+        ).order_by(
+            'id'
+        ))
+
+        if len(writes) == 0:
+            return
+
+        self._flushing = True
+        try:
+            # Write changes in batches by same author
+            for user, batch in itertools.groupby(writes, lambda x: x.user):
+                batch = list(batch)
+                units = {}
+                for write in batch:
+                    units[write.unit.id] = write.unit
+                self.update_units(units.values(), user)
+                # Remove only writes we have seen, transaction adding write
+                # with lower ID might have been commited after we've read
+                # later ones
+                ids = [write.id for write in batch]
+                for start in xrange(0, len(ids), BULK_BATCH):
+                    PendingWrite.objects.filter(
+                        id__in=ids[start:start + BULK_BATCH]
+                    ).delete()
+        finally:
+            self._flushing = False
+
     def commit_pending(self, author=None, skip_push=False):
         '''
         Commits any pending changes.
         '''
+        # Write changes waiting for backend
+        self.flush_pending()
+
         # Get author of last changes
         last = self.get_last_author()
 
@@ -668,51 +815,12 @@ class Translation(models.Model):
             'translated_percent': self.get_translated_percent(),
         }
 
-    def __configure_git(self, gitrepo, section, key, expected):
-        '''
-        Adjysts git config to ensure that section.key is set to expected.
-        '''
-        cnf = gitrepo.config_writer()
-        try:
-            # Get value and if it matches we're done
-            value = cnf.get(section, key)
-            if value == expected:
-                return
-        except:
-            pass
-
-        # Try to add section (might fail if it exists)
-        try:
-            cnf.add_section(section)
-        except:
-            pass
-        # Update config
-        cnf.set(section, key, expected)
-
-    def __configure_committer(self, gitrepo):
-        '''
-        Wrapper for setting proper committer. As this can not be done by
-        passing parameter, we need to check config on every commit.
-        '''
-        self.__configure_git(
-            gitrepo,
-            'user',
-            'name',
-            self.subproject.project.committer_name
-        )
-        self.__configure_git(
-            gitrepo,
-            'user',
-            'email',
-            self.subproject.project.committer_email
-        )
-
     def __git_commit(self, gitrepo, author, timestamp, sync=False):
         '''
         Commits translation to git.
         '''
         # Check git config
-        self.__configure_committer(gitrepo)
+        self.subproject.configure_committer()
 
         # Format commit message
         msg = self.get_commit_message()
@@ -724,6 +832,7 @@ class Translation(models.Model):
             date=timestamp.isoformat(),
             m=msg
         )
+        self.subproject.git_state.invalidate()
 
         # Optionally store updated hash
         if sync:
@@ -733,11 +842,7 @@ class Translation(models.Model):
         '''
         Checks whether there are some not commited changes.
         '''
-        status = self.git_repo.git.status('--porcelain', '--', self.filename)
-        if status == '':
-            # No changes to commit
-            return False
-        return True
+        return self.subproject.git_state.is_dirty(self.filename)
 
     def git_needs_merge(self):
         return self.subproject.git_needs_merge()
@@ -788,6 +893,102 @@ class Translation(models.Model):
 
         return True
 
+    def find_unit(self, store, unit):
+        '''
+        Finds ttkit unit matching database unit.
+
+        Returns tuple of ttkit unit (None if not found) and flag whether it
+        needs to be added to the store.
+        '''
+        index = self.get_store_index()
+
+        if self.subproject.has_template():
+            # We search by ID when using template
+            pounit = index.find_id(unit.context)
+            if pounit is not None:
+                return pounit, False
+            # Need to create new unit based on template, it is added to
+            # the store so it must not come from shared template store
+            if self._template_store is None:
+                self._template_store = self.subproject.load_store(
+                    self.subproject.get_template_filename()
+                )
+            return self._template_store.findid(unit.context), True
+
+        # Checksum is calculated from source and context
+        return index.find_checksum(unit.checksum), False
+
+    def update_store_unit(self, store, unit, pounit, add):
+        '''
+        Updates ttkit unit in the store from database unit.
+
+        Returns whether there was any change.
+        '''
+        # Detect changes
+        if unit.target == get_target(pounit) and unit.fuzzy == pounit.isfuzzy():
+            return False
+
+        # Store translations
+        if unit.is_plural():
+            pounit.settarget(unit.get_target_plurals())
+        else:
+            pounit.settarget(unit.target)
+        # Update fuzzy flag
+        pounit.markfuzzy(unit.fuzzy)
+        # Optionally add unit to translation file
+        if add:
+            if isinstance(store, LISAfile):
+                # LISA based stores need to know this
+                store.addunit(pounit, new=True)
+            else:
+                store.addunit(pounit)
+            self.get_store_index().add(pounit)
+        return True
+
+    def save_store(self, store, author):
+        '''
+        Saves changed store to backend file.
+        '''
+        # Update po file header
+        if hasattr(store, 'updateheader'):
+            po_revision_date = (
+                datetime.now().strftime('%Y-%m-%d %H:%M')
+                + poheader.tzstring()
+            )
+
+            # Update genric headers
+            store.updateheader(
+                add=True,
+                last_translator=author,
+                plural_forms=self.language.get_plural_form(),
+                language=self.language_code,
+                PO_Revision_Date=po_revision_date,
+                x_generator='Weblate %s' % weblate.VERSION
+            )
+
+            if self.subproject.project.set_translation_team:
+                # Store language team with link to website
+                store.updateheader(
+                    language_team='%s <%s>' % (
+                        self.language.name,
+                        get_site_url(self.get_absolute_url()),
+                    )
+                )
+                # Optionally store email for reporting bugs in source
+                report_source_bugs = self.subproject.report_source_bugs
+                if report_source_bugs != '':
+                    store.updateheader(
+                        report_msgid_bugs_to=report_source_bugs,
+                    )
+        # commit possible previous changes (by other author)
+        self.commit_pending(author)
+        # save translation changes
+        store.save()
+        # commit Git repo if needed
+        self.git_commit(author, timezone.now(), sync=True)
+        # keep parsed store for further use
+        self.cache_store()
+
     def update_unit(self, unit, request):
         '''
         Updates backend file and unit.
@@ -795,114 +996,263 @@ class Translation(models.Model):
         # Save with lock acquired
         with self.subproject.get_git_lock():
 
-            store = self.get_store()
-            src = unit.get_source_plurals()[0]
-            need_save = False
-            found = False
-            add = False
-
-            if self.subproject.has_template():
-                # We search by ID when using template
-                pounit = store.findid(unit.context)
-                if pounit is not None:
-                    found = True
-                else:
-                    # Need to create new unit based on template
-                    template_store = self.subproject.get_template_store()
-                    pounit = template_store.findid(unit.context)
-                    add = True
-                    found = pounit is not None
-            else:
-                # Find all units with same source
-                found_units = store.findunits(src)
-                if len(found_units) > 0:
-                    for pounit in found_units:
-                        # Does context match?
-                        if pounit.getcontext() == unit.context:
-                            # We should have only one match
-                            found = True
-                            break
-                else:
-                    # Fallback to manual find for value based files
-                    for pounit in store.units:
-                        if get_source(pounit) == src:
-                            found = True
-                            break
+            store = self.get_writable_store()
+            # Store is going to be changed, remove it from cache
+            STORE_CACHE.invalidate(self.get_filename())
+
+            pounit, add = self.find_unit(store, unit)
 
             # Bail out if we have not found anything
-            if not found:
+            if pounit is None:
                 return False, None
 
-            # Detect changes
-            if unit.target != get_target(pounit) or unit.fuzzy != pounit.isfuzzy():
-                # Store translations
-                if unit.is_plural():
-                    pounit.settarget(unit.get_target_plurals())
-                else:
-                    pounit.settarget(unit.target)
-                # Update fuzzy flag
-                pounit.markfuzzy(unit.fuzzy)
-                # Optionally add unit to translation file
-                if add:
-                    if isinstance(store, LISAfile):
-                        # LISA based stores need to know this
-                        store.addunit(pounit, new=True)
-                    else:
-                        store.addunit(pounit)
-                # We need to update backend
-                need_save = True
+            need_save = self.update_store_unit(store, unit, pounit, add)
 
             # Save backend if there was a change
             if need_save:
-                author = self.get_author_name(request.user)
-                # Update po file header
-                if hasattr(store, 'updateheader'):
-                    po_revision_date = (
-                        datetime.now().strftime('%Y-%m-%d %H:%M')
-                        + poheader.tzstring()
-                    )
+                self.save_store(store, self.get_author_name(request.user))
 
-                    # Update genric headers
-                    store.updateheader(
-                        add=True,
-                        last_translator=author,
-                        plural_forms=self.language.get_plural_form(),
-                        language=self.language_code,
-                        PO_Revision_Date=po_revision_date,
-                        x_generator='Weblate %s' % weblate.VERSION
-                    )
+        return need_save, pounit
 
-                    if self.subproject.project.set_translation_team:
-                        # Store language team with link to website
-                        store.updateheader(
-                            language_team='%s <%s>' % (
-                                self.language.name,
-                                get_site_url(self.get_absolute_url()),
-                            )
-                        )
-                        # Optionally store email for reporting bugs in source
-                        report_source_bugs = self.subproject.report_source_bugs
-                        if report_source_bugs != '':
-                            store.updateheader(
-                                report_msgid_bugs_to=report_source_bugs,
-                            )
-                # commit possible previous changes (by other author)
-                self.commit_pending(author)
-                # save translation changes
-                store.save()
-                # commit Git repo if needed
-                self.git_commit(author, timezone.now(), sync=True)
+    def update_units(self, units, user):
+        '''
+        Updates backend file and database for several units at once.
 
-        return need_save, pounit
+        The file is written and commited just once, checks, fulltext index
+        and stats are updated in bulk. Returns list of updated units.
+
+        Lock, Change objects and completing of translation (see
+        handle_complete) are left to the caller.
+        '''
+        from trans.models.unit import Unit
+        from trans.models.stats import TranslationCount
+
+        updated = []
+
+        # Update all units in backend with lock acquired
+        with self.subproject.get_git_lock():
+            store = self.get_writable_store()
+            # Store is going to be changed, remove it from cache
+            STORE_CACHE.invalidate(self.get_filename())
+
+            for unit in units:
+                pounit, add = self.find_unit(store, unit)
+                if pounit is None:
+                    logger.error('message %s disappeared!', unit)
+                    continue
+                if self.update_store_unit(store, unit, pounit, add):
+                    updated.append((unit, pounit))
+
+            if len(updated) == 0:
+                return []
+
+            self.save_store(store, self.get_author_name(user))
+
+        # Update database
+        units = []
+        translated = fuzzy = 0
+        with transaction.commit_on_success():
+            oldflags = dict([
+                (pk, (old_translated, old_fuzzy))
+                for pk, old_translated, old_fuzzy in Unit.objects.filter(
+                    pk__in=[unit.pk for unit, pounit in updated]
+                ).values_list('pk', 'translated', 'fuzzy')
+            ])
+            for unit, pounit in updated:
+                unit.translation = self
+                unit.translated = is_translated(pounit)
+                if hasattr(pounit, 'typecomments'):
+                    unit.flags = ', '.join(pounit.typecomments)
+                else:
+                    unit.flags = ''
+                Unit.objects.filter(pk=unit.pk).update(
+                    target=unit.target,
+                    fuzzy=unit.fuzzy,
+                    translated=unit.translated,
+                    flags=unit.flags,
+                )
+                units.append(unit)
+                old_translated, old_fuzzy = oldflags[unit.pk]
+                translated += int(unit.translated) - int(old_translated)
+                fuzzy += int(unit.fuzzy) - int(old_fuzzy)
+                # Update counters depending on translated flag
+                TranslationCount.objects.update_unit(unit, old_translated)
+
+        # Update checks, fulltext index and stats
+        Unit.objects.update_checks(units)
+        Unit.objects.add_batch_to_index(units, set())
+        self.update_stats_delta(translated, fuzzy)
+
+        return units
+
+    def handle_complete(self, old_translated, user):
+        '''
+        Commits pending changes and records change when translation has
+        just been completed.
+
+        Should be called after saving units and creating Change objects for
+        them, old_translated is number of translated units before saving.
+        '''
+        from trans.models.unitdata import Change
+
+        if old_translated < self.translated and self.translated == self.total:
+            self.commit_pending()
+            Change.objects.create(
+                translation=self,
+                action=Change.ACTION_COMPLETE,
+                user=user
+            )
+
+    def save_units(self, units, request, propagate=True):
+        '''
+        Stores several edited units at once.
+
+        This is batch variant of Unit.save_backend, the file is written
+        just once (see update_units) and changes, notifications and user
+        stats are handled in bulk. Returns list of updated units and
+        dictionary with newly failing checks keyed by unit checksum.
+        '''
+        from accounts.models import Profile
+        from trans.models.unit import Unit
+        from trans.models.unitdata import Change, Check
+
+        if len(units) == 0:
+            return [], {}
+
+        project = self.subproject.project
+        checksums = [unit.checksum for unit in units]
+
+        def get_active_checks():
+            result = {}
+            checks = Check.objects.filter(
+                project=project,
+                language=self.language,
+                checksum__in=checksums,
+                ignore=False
+            ).values_list('checksum', 'check')
+            for checksum, check in checks:
+                result.setdefault(checksum, set()).add(check)
+            return result
+
+        # Update lock timestamp
+        self.update_lock(request)
+
+        # Get old units (for notifications) and checks
+        oldunits = Unit.objects.in_bulk([unit.id for unit in units])
+        oldchecks = get_active_checks()
+        old_translated = self.translated
+
+        # Did user contribute before?
+        new_contributor = not Change.objects.filter(
+            translation=self,
+            user=request.user
+        ).exists()
+
+        # Store to backend and update database
+        try:
+            updated = self.update_units(units, request.user)
+        except FileLockException:
+            logger.error('failed to lock backend for %s!', self)
+            messages.error(
+                request,
+                _(
+                    'Failed to store message in the backend, '
+                    'lock timeout occurred!'
+                )
+            )
+            return [], {}
+
+        if len(updated) == 0:
+            return [], {}
+
+        # Find newly failing checks
+        newchecks = get_active_checks()
+        failing = {}
+        for unit in updated:
+            failing[unit.checksum] = (
+                newchecks.get(unit.checksum, set())
+                - oldchecks.get(unit.checksum, set())
+            )
+
+        # Generate Change objects
+        changes = []
+        for unit in updated:
+            if oldunits[unit.id].translated:
+                action = Change.ACTION_CHANGE
+            else:
+                action = Change.ACTION_NEW
+            changes.append(Change(
+                unit=unit,
+                translation=self,
+                action=action,
+                user=request.user,
+            ))
+        Change.objects.bulk_create(changes)
+
+        # Notify subscribed users about new translations
+        subscriptions = Profile.objects.subscribed_any_translation(
+            project,
+            self.language,
+            request.user
+        )
+        for subscription in subscriptions:
+            for unit in updated:
+                subscription.notify_any_translation(unit, oldunits[unit.id])
+
+        # Notify about new contributor
+        if new_contributor:
+            subscriptions = Profile.objects.subscribed_new_contributor(
+                project,
+                self.language,
+                request.user
+            )
+            for subscription in subscriptions:
+                subscription.notify_new_contributor(self, request.user)
+
+        # Update user stats
+        profile = request.user.get_profile()
+        profile.translated += len(updated)
+        profile.save()
+
+        # Force commiting on completing translation
+        self.handle_complete(old_translated, request.user)
+
+        # Propagate to other subprojects, single batch for each translation
+        if propagate:
+            allunits = Unit.objects.filter(
+                checksum__in=[unit.checksum for unit in updated],
+                translation__subproject__project=project,
+                translation__language=self.language,
+                translation__subproject__allow_translation_propagation=True
+            ).exclude(
+                translation=self
+            ).select_related(
+                'translation'
+            ).order_by(
+                'translation'
+            )
+            sources = dict([(unit.checksum, unit) for unit in updated])
+            groups = itertools.groupby(allunits, lambda x: x.translation_id)
+            for translation_id, others in groups:
+                others = list(others)
+                for unit in others:
+                    unit.target = sources[unit.checksum].target
+                    unit.fuzzy = sources[unit.checksum].fuzzy
+                others[0].translation.save_units(others, request, False)
+
+        return updated, failing
 
     def get_source_checks(self):
         '''
         Returns list of failing source checks on current subproject.
         '''
+        from trans.models.stats import TranslationCount
+        counts = TranslationCount.objects.get_counts(self)
+
         result = [('all', _('All strings'))]
 
         # All checks
-        sourcechecks = self.unit_set.count_type('sourcechecks', self)
+        sourcechecks = counts['sourcechecks']
         if sourcechecks > 0:
             result.append((
                 'sourcechecks',
@@ -913,13 +1263,13 @@ class Translation(models.Model):
         for check in CHECKS:
             if not CHECKS[check].source:
                 continue
-            cnt = self.unit_set.count_type(check, self)
+            cnt = counts[check]
             if cnt > 0:
                 desc = CHECKS[check].description + (' (%d)' % cnt)
                 result.append((check, desc))
 
         # Grab comments
-        sourcecomments = self.unit_set.count_type('sourcecomments', self)
+        sourcecomments = counts['sourcecomments']
         if sourcecomments > 0:
             result.append((
                 'sourcecomments',
@@ -932,10 +1282,13 @@ class Translation(models.Model):
         '''
         Returns list of failing checks on current translation.
         '''
+        from trans.models.stats import TranslationCount
+        counts = TranslationCount.objects.get_counts(self)
+
         result = [('all', _('All strings'))]
 
         # Untranslated strings
-        nottranslated = self.unit_set.count_type('untranslated', self)
+        nottranslated = self.total - self.translated
         if nottranslated > 0:
             result.append((
                 'untranslated',
@@ -943,7 +1296,7 @@ class Translation(models.Model):
             ))
 
         # Fuzzy strings
-        fuzzy = self.unit_set.count_type('fuzzy', self)
+        fuzzy = self.fuzzy
         if fuzzy > 0:
             result.append((
                 'fuzzy',
@@ -951,7 +1304,7 @@ class Translation(models.Model):
             ))
 
         # Translations with suggestions
-        suggestions = self.unit_set.count_type('suggestions', self)
+        suggestions = counts['suggestions']
         if suggestions > 0:
             result.append((
                 'suggestions',
@@ -959,7 +1312,7 @@ class Translation(models.Model):
             ))
 
         # All checks
-        allchecks = self.unit_set.count_type('allchecks', self)
+        allchecks = counts['allchecks']
         if allchecks > 0:
             result.append((
                 'allchecks',
@@ -970,13 +1323,13 @@ class Translation(models.Model):
         for check in CHECKS:
             if not CHECKS[check].target:
                 continue
-            cnt = self.unit_set.count_type(check, self)
+            cnt = counts[check]
             if cnt > 0:
                 desc = CHECKS[check].description + (' (%d)' % cnt)
                 result.append((check, desc))
 
         # Grab comments
-        targetcomments = self.unit_set.count_type('targetcomments', self)
+        targetcomments = counts['targetcomments']
         if targetcomments > 0:
             result.append((
                 'targetcomments',
@@ -989,11 +1342,16 @@ class Translation(models.Model):
         '''
         Merges ttkit store into current translation.
         '''
+        # Write changes waiting for backend
+        self.flush_pending()
+
         # Merge with lock acquired
         with self.subproject.get_git_lock():
 
-            store1 = self.get_store()
-            store1.require_index()
+            store1 = self.get_writable_store()
+            index = self.get_store_index()
+            # Store is going to be changed, remove it from cache
+            STORE_CACHE.invalidate(self.get_filename())
 
             for unit2 in store2.units:
                 # No translated -> skip
@@ -1007,11 +1365,11 @@ class Translation(models.Model):
                     continue
 
                 # Find unit by ID
-                unit1 = store1.findid(unit2.getid())
+                unit1 = index.find_id(unit2.getid())
 
                 # Fallback to finding by source
                 if unit1 is None:
-                    unit1 = store1.findunit(unit2.source)
+                    unit1 = index.find_source(get_source(unit2))
 
                 # Unit not found, nothing to do
                 if unit1 is None:
@@ -1032,6 +1390,7 @@ class Translation(models.Model):
             self.commit_pending(author)
             store1.save()
             ret = self.git_commit(author, timezone.now(), True)
+            self.cache_store()
             self.check_sync()
 
         return ret
@@ -1067,10 +1426,6 @@ class Translation(models.Model):
                 user=request.user
             )
 
-        # Invalidate cache if we've added something
-        if ret:
-            self.invalidate_cache('suggestions')
-
         return ret
 
     def merge_upload(self, request, fileobj, overwrite, author=None,
@@ -1137,22 +1492,3 @@ class Translation(models.Model):
         if self.total == 0:
             return 0
         return round(self.get_failing_checks(check) * 100.0 / self.total, 1)
-
-    def invalidate_cache(self, cache_type=None):
-        '''
-        Invalidates any cached stats.
-        '''
-        # Get parts of key cache
-        slug = self.subproject.get_full_slug()
-        code = self.language.code
-
-        # Are we asked for specific cache key?
-        if cache_type is None:
-            keys = ['allchecks'] + list(CHECKS)
-        else:
-            keys = [cache_type]
-
-        # Actually delete the cache
-        for rqtype in keys:
-            cache_key = 'counts-%s-%s-%s' % (slug, code, rqtype)
-            cache.delete(cache_key)
@@ -18,15 +18,19 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from django.db import models
+from django.db import models, transaction
 from weblate import appsettings
 from django.db.models import Q
 from django.utils.translation import ugettext as _
 from django.utils.safestring import mark_safe
 from django.contrib import messages
-from django.core.cache import cache
 from whoosh import qparser
-import itertools
+from whoosh.query import Or, Term
+try:
+    from whoosh.collectors import TimeLimitCollector, TimeLimit
+except ImportError:
+    # Whoosh < 2.4 does not have collectors
+    TimeLimitCollector = TimeLimit = None
 import logging
 import traceback
 from trans.checks import CHECKS
@@ -43,52 +47,350 @@ from trans.util import (
 
 logger = logging.getLogger('weblate')
 
+# Number of units to insert in single query
+BULK_BATCH = 50
+
+# Number of fulltext candidates for each wanted similar unit
+SIMILAR_CANDIDATES = 10
+
 
 class UnitManager(models.Manager):
-    def update_from_unit(self, translation, unit, pos, template=None):
+    def import_units(self, translation, units):
         '''
-        Process translation toolkit unit and stores/updates database entry.
+        Processes translation toolkit units and stores/updates database
+        entries for whole translation.
+
+        Takes iterable of (unit, template) tuples, all existing units are
+        loaded in single query and compared in memory. New units are
+        inserted in bulk, changed ones are updated in single transaction
+        and checks and fulltext index are updated once at the end.
+
+        Returns list of IDs of units which are no longer present and flag
+        whether there was new untranslated unit.
         '''
-        if template is None:
-            src = get_source(unit)
-            ctx = get_context(unit)
-        else:
-            src = get_target(template)
-            ctx = get_context(template)
-        checksum = msg_checksum(src, ctx)
+        # Load all existing units keyed by checksum
+        dbunits = {}
+        duplicates = []
+        for dbunit in self.filter(translation=translation):
+            if dbunit.checksum in dbunits:
+                # Some inconsistency (possibly race condition), recover
+                duplicates.append(dbunit.id)
+            else:
+                dbunits[dbunit.checksum] = dbunit
+        if len(duplicates) > 0:
+            self.filter(id__in=duplicates).delete()
+
+        new_units = []
+        changed_units = []
+        check_checksums = set()
+        index_checksums = set()
+        source_checksums = set()
+        seen = set()
+        was_new = False
+        pos = 1
+
+        for unit, template in units:
+            if template is None:
+                src = get_source(unit)
+                ctx = get_context(unit)
+            else:
+                src = get_target(template)
+                ctx = get_context(template)
+            checksum = msg_checksum(src, ctx)
+            seen.add(checksum)
+
+            # Create unit if it does not exist
+            dbunit = dbunits.get(checksum)
+            force = dbunit is None or dbunit.id is None
+            if dbunit is None:
+                dbunit = Unit(
+                    translation=translation,
+                    checksum=checksum,
+                    source=src,
+                    context=ctx
+                )
+                dbunits[checksum] = dbunit
+                new_units.append(dbunit)
+                source_checksums.add(checksum)
 
-        # Try getting existing unit
-        dbunit = None
-        try:
-            dbunit = self.get(
-                translation=translation,
-                checksum=checksum
+            # Update all details in memory
+            changed, content_changed = dbunit.update_from_unit(
+                unit, pos, force, template, save=False
+            )
+
+            if changed:
+                index_checksums.add(checksum)
+                if not force:
+                    changed_units.append(dbunit)
+            if content_changed:
+                check_checksums.add(checksum)
+
+            was_new = was_new or (force and not dbunit.translated)
+            pos += 1
+
+        with transaction.commit_on_success():
+            # Insert new units in batches (to stay within limits of
+            # number of query parameters)
+            for start in xrange(0, len(new_units), BULK_BATCH):
+                self.bulk_create(new_units[start:start + BULK_BATCH])
+
+            # Update changed units, there is no need to go through save()
+            # as checks and index are updated below
+            for dbunit in changed_units:
+                self.filter(pk=dbunit.pk).update(
+                    position=dbunit.position,
+                    location=dbunit.location,
+                    flags=dbunit.flags,
+                    target=dbunit.target,
+                    fuzzy=dbunit.fuzzy,
+                    translated=dbunit.translated,
+                    comment=dbunit.comment,
+                    previous_source=dbunit.previous_source,
+                )
+
+        # Reload touched units (bulk insert does not give us primary keys)
+        if len(index_checksums) > 0 or len(check_checksums) > 0:
+            touched = self.filter(translation=translation).select_related(
+                'translation__subproject__project', 'translation__language'
+            )
+            touched = [
+                dbunit for dbunit in touched
+                if dbunit.checksum in index_checksums
+                or dbunit.checksum in check_checksums
+            ]
+
+            # Update checks for units with changed content
+            self.update_checks([
+                dbunit for dbunit in touched
+                if dbunit.checksum in check_checksums
+            ])
+
+            # Update fulltext index
+            self.add_batch_to_index(
+                [
+                    dbunit for dbunit in touched
+                    if dbunit.checksum in index_checksums
+                ],
+                source_checksums
+            )
+
+        # Collect units which are no longer present in the file
+        stale = [
+            dbunit.id for dbunit in dbunits.values()
+            if dbunit.checksum not in seen
+        ]
+
+        return stale, was_new
+
+    def update_checks(self, units=None):
+        '''
+        Updates checks for set of units at once.
+
+        This is batch variant of Unit.check, existing checks are loaded for
+        each project and language pair in single query and differences are
+        stored using bulk operations. Accepts either queryset or list of
+        units.
+        '''
+        def group_key(unit):
+            return (
+                unit.translation.subproject.project_id,
+                unit.translation.language_id
             )
-            force = False
-        except Unit.MultipleObjectsReturned:
-            # Some inconsistency (possibly race condition), try to recover
-            self.filter(
-                translation=translation,
-                checksum=checksum
-            ).delete()
-        except Unit.DoesNotExist:
-            pass
-
-        # Create unit if it does not exist
-        if dbunit is None:
-            dbunit = Unit(
-                translation=translation,
+
+        if units is None:
+            units = self.all()
+
+        if isinstance(units, models.query.QuerySet):
+            units = units.select_related(
+                'translation__subproject__project', 'translation__language'
+            ).order_by(
+                'translation__subproject__project',
+                'translation__language',
+                'position',
+            ).iterator()
+        else:
+            units = sorted(
+                units,
+                key=lambda unit: group_key(unit) + (unit.position,)
+            )
+
+        group = []
+        current_key = None
+        for unit in units:
+            key = group_key(unit)
+            if key != current_key and len(group) > 0:
+                self.__update_checks_group(group)
+                group = []
+            current_key = key
+            group.append(unit)
+
+        if len(group) > 0:
+            self.__update_checks_group(group)
+
+    def __update_checks_group(self, units):
+        '''
+        Updates checks for units sharing project and language.
+        '''
+        from trans.models.unitdata import Check
+
+        project = units[0].translation.subproject.project
+        language = units[0].translation.language
+
+        # Load existing checks
+        existing = {}
+        for check in Check.objects.filter(
+                Q(language=language) | Q(language=None),
+                project=project):
+            existing[(check.checksum, check.language_id, check.check)] = check
+
+        # Current state of checks, updated while processing units
+        target_state = {}
+        source_state = {}
+        for checksum, language_id, check in existing:
+            if language_id is None:
+                state = source_state
+            else:
+                state = target_state
+            state.setdefault(checksum, set()).add(check)
+
+        # Lazily loaded map of non fuzzy units
+        non_fuzzy = None
+
+        for unit in units:
+            checks_to_run = CHECKS
+            cleanup_checks = True
+
+            if unit.fuzzy or not unit.translated:
+                if non_fuzzy is None:
+                    non_fuzzy = {}
+                    same_source = self.filter(
+                        translation__language=language,
+                        translation__subproject__project=project,
+                        fuzzy=False,
+                    ).values_list('checksum', 'id')
+                    for checksum, unit_id in same_source.iterator():
+                        non_fuzzy.setdefault(checksum, set()).add(unit_id)
+
+                # Delete all checks if only message with this source is
+                # fuzzy
+                others = non_fuzzy.get(unit.checksum, set()) - set([unit.id])
+                if len(others) == 0:
+                    target_state[unit.checksum] = set()
+                    continue
+
+                # If there is no consistency checking, we can skip it
+                if not 'inconsistent' in CHECKS:
+                    continue
+
+                # Limit checks to consistency check for fuzzy messages
+                checks_to_run = {'inconsistent': CHECKS['inconsistent']}
+                cleanup_checks = False
+
+            src = unit.get_source_plurals()
+            tgt = unit.get_target_plurals()
+            failing_target = set()
+            failing_source = set()
+
+            # Run all checks
+            for check in checks_to_run:
+                check_obj = CHECKS[check]
+                # Target check
+                if check_obj.target and check_obj.check(src, tgt, unit.flags, language, unit):
+                    failing_target.add(check)
+                # Source check
+                if check_obj.source and check_obj.check_source(src, unit.flags, unit):
+                    failing_source.add(check)
+
+            # Update state
+            if cleanup_checks:
+                target_state[unit.checksum] = failing_target
+                source_state[unit.checksum] = failing_source
+            else:
+                target_state.setdefault(unit.checksum, set()).update(
+                    failing_target
+                )
+
+        # Calculate differences
+        wanted = set()
+        for language_id, state in ((language.id, target_state),
+                                   (None, source_state)):
+            for checksum in state:
+                for check in state[checksum]:
+                    wanted.add((checksum, language_id, check))
+
+        deleted = [key for key in existing if key not in wanted]
+        to_delete = [existing[key].id for key in deleted]
+        to_create = [
+            Check(
                 checksum=checksum,
-                source=src,
-                context=ctx
+                project=project,
+                language_id=language_id,
+                ignore=False,
+                check=check
+            )
+            for checksum, language_id, check in wanted
+            if (checksum, language_id, check) not in existing
+        ]
+
+        # Apply differences
+        from trans.models.stats import (
+            TranslationCount, delete_without_signals, get_checksum_data
+        )
+        with transaction.commit_on_success():
+            for start in xrange(0, len(to_delete), BULK_BATCH):
+                delete_without_signals(Check.objects.filter(
+                    id__in=to_delete[start:start + BULK_BATCH]
+                ))
+            for start in xrange(0, len(to_create), BULK_BATCH):
+                Check.objects.bulk_create(
+                    to_create[start:start + BULK_BATCH]
+                )
+
+        # Collect changed checks affecting counters
+        changed = {}
+        for item in to_create:
+            changed.setdefault(item.checksum, ([], []))[0].append(
+                (item.language_id, item.check)
             )
-            force = True
+        for key in deleted:
+            if not existing[key].ignore:
+                changed.setdefault(key[0], ([], []))[1].append(
+                    (key[1], key[2])
+                )
 
-        # Update all details
-        dbunit.update_from_unit(unit, pos, force, template)
+        if len(changed) == 0:
+            return
 
-        # Return result
-        return dbunit, force
+        # Apply differences for few changed checksums (eg. saving units),
+        # checks are shared by all translations of the project
+        if len(changed) <= BULK_BATCH:
+            for checksum in changed:
+                created, removed = changed[checksum]
+                checks, suggestions, comments = get_checksum_data(
+                    project, checksum
+                )
+                before = [
+                    item for item in checks if item not in created
+                ] + removed
+                TranslationCount.objects.update_checksum(
+                    project,
+                    checksum,
+                    (before, suggestions, comments),
+                    (checks, suggestions, comments)
+                )
+            return
+
+        # Recalculate counters once for many changes
+        translations = Translation.objects.filter(
+            subproject__project=project
+        )
+        source_changed = len([
+            item for item in to_create if item.language_id is None
+        ]) or len([key for key in deleted if key[1] is None])
+        if not source_changed:
+            translations = translations.filter(language=language)
+        for translation in translations:
+            TranslationCount.objects.update_counts(translation)
 
     def filter_checks(self, rqtype, translation):
         '''
@@ -170,7 +472,7 @@ class UnitManager(models.Manager):
 
     def count_type(self, rqtype, translation):
         '''
-        Cached counting of failing checks (and other stats).
+        Counting of failing checks (and other stats).
         '''
         # Use precalculated data if we can
         if rqtype == 'all':
@@ -180,22 +482,14 @@ class UnitManager(models.Manager):
         elif rqtype == 'untranslated':
             return translation.total - translation.translated
 
-        # Try to get value from cache
-        cache_key = 'counts-%s-%s-%s' % (
-            translation.subproject.get_full_slug(),
-            translation.language.code,
-            rqtype
-        )
-        ret = cache.get(cache_key)
-        if ret is not None:
-            return ret
+        # Use stored counters
+        from trans.models.stats import TranslationCount
+        counts = TranslationCount.objects.get_counts(translation)
+        if rqtype in counts:
+            return counts[rqtype]
 
         # Actually count units
-        ret = self.filter_type(rqtype, translation).count()
-
-        # Update cache
-        cache.set(cache_key, ret)
-        return ret
+        return self.filter_type(rqtype, translation).count()
 
     def review(self, date, user):
         '''
@@ -255,6 +549,48 @@ class UnitManager(models.Manager):
             unit.target,
             writer_target)
 
+    def add_batch_to_index(self, units, source_checksums):
+        '''
+        Updates/Adds to all indices given list of units. Source index is
+        updated only for units listed in source_checksums.
+        '''
+        if len(units) == 0:
+            return
+
+        if appsettings.OFFLOAD_INDEXING:
+            from trans.models.unitdata import IndexUpdate
+            updates = [
+                IndexUpdate(
+                    unit=unit,
+                    source=(unit.checksum in source_checksums)
+                )
+                for unit in units
+            ]
+            for start in xrange(0, len(updates), BULK_BATCH):
+                IndexUpdate.objects.bulk_create(
+                    updates[start:start + BULK_BATCH]
+                )
+            return
+
+        writer_target = FULLTEXT_INDEX.target_writer(
+            units[0].translation.language.code
+        )
+        writer_source = FULLTEXT_INDEX.source_writer()
+
+        for unit in units:
+            if unit.checksum in source_checksums:
+                self.add_to_source_index(
+                    unit.checksum,
+                    unit.source,
+                    unit.context,
+                    writer_source
+                )
+            self.add_to_target_index(
+                unit.checksum,
+                unit.target,
+                writer_target
+            )
+
     def __search(self, searcher, field, schema, query):
         '''
         Wrapper for fulltext search.
@@ -317,9 +653,13 @@ class UnitManager(models.Manager):
 
         return self.filter(checksum__in=ret)
 
-    def similar(self, unit):
+    def similar(self, unit, timeout=None):
         '''
         Finds similar units to current unit.
+
+        Optional timeout limits time spent in the fulltext search, best
+        matches found so far are used when it is reached (it is ignored with
+        Whoosh < 2.4).
         '''
         ret = set([unit.checksum])
         index = FULLTEXT_INDEX.source_searcher(
@@ -332,23 +672,17 @@ class UnitManager(models.Manager):
                 unit.source,
                 numterms=10
             )
-            terms = [kw[0] for kw in key_terms if not kw in IGNORE_SIMILAR]
-            cnt = len(terms)
-            # Try to find at least configured number of similar strings,
-            # remove up to 4 words
-            while (len(ret) < appsettings.SIMILAR_MESSAGES
-                    and cnt > 0
-                    and len(terms) - cnt < 4):
-                for search in itertools.combinations(terms, cnt):
-                    results = self.search(
-                        ' '.join(search),
-                        True,
-                        False,
-                        False,
-                        True
-                    )
-                    ret = ret.union(results)
-                cnt -= 1
+            terms = [kw[0] for kw in key_terms if not kw[0] in IGNORE_SIMILAR]
+
+            # Accept strings which differ in up to 3 terms
+            minmatch = max(1, len(terms) - 3)
+            if TimeLimitCollector is None:
+                matches = self.__similar_terms(searcher, terms, minmatch)
+            else:
+                matches = self.__similar_scored(
+                    searcher, terms, minmatch, unit, timeout
+                )
+            ret.update(matches)
 
         project = unit.translation.subproject.project
         return self.filter(
@@ -359,6 +693,42 @@ class UnitManager(models.Manager):
             target__in=['', unit.target]
         )
 
+    def __similar_scored(self, searcher, terms, minmatch, unit, timeout):
+        '''
+        Returns checksums of strings matching at least minmatch of terms
+        using single scored query.
+        '''
+        query = Or([Term('source', term) for term in terms])
+        collector = searcher.collector(
+            limit=appsettings.SIMILAR_MESSAGES * SIMILAR_CANDIDATES,
+            terms=True
+        )
+        if timeout is not None:
+            collector = TimeLimitCollector(collector, timeout)
+        try:
+            searcher.search_with_collector(query, collector)
+        except TimeLimit:
+            logger.info('similar lookup timed out for %s', unit)
+        return [
+            hit['checksum'] for hit in collector.results()
+            if len(hit.matched_terms()) >= minmatch
+        ]
+
+    def __similar_terms(self, searcher, terms, minmatch):
+        '''
+        Returns checksums of strings matching at least minmatch of terms
+        by counting matches of each term, used with Whoosh < 2.4 which can
+        not report matched terms.
+        '''
+        matches = {}
+        for term in terms:
+            for docnum in searcher.docs_for_query(Term('source', term)):
+                matches[docnum] = matches.get(docnum, 0) + 1
+        return [
+            searcher.stored_fields(docnum)['checksum']
+            for docnum in matches if matches[docnum] >= minmatch
+        ]
+
     def same(self, unit):
         '''
         Units with same source withing same project.
@@ -370,6 +740,72 @@ class UnitManager(models.Manager):
             translation__language=unit.translation.language
         )
 
+    def select_translation(self):
+        '''
+        Returns queryset loading translation, subproject, project and
+        language together with units.
+        '''
+        return self.select_related(
+            'translation__subproject__project',
+            'translation__language',
+        )
+
+    def load_context(self, units):
+        '''
+        Loads checks, suggestions and comments for list of units.
+
+        Constant number of queries is used regardless number of units and
+        the loaded data are then returned by unit methods instead of
+        querying database for each unit. Translations of the units should
+        be already loaded (see select_translation).
+        '''
+        from trans.models.unitdata import Check, Suggestion, Comment
+
+        if len(units) == 0:
+            return units
+
+        checksums = set()
+        projects = set()
+        languages = set()
+        for unit in units:
+            checksums.add(unit.checksum)
+            projects.add(unit.translation.subproject.project_id)
+            languages.add(unit.translation.language_id)
+
+        data = {}
+        for name, queryset in (
+                ('checks', Check.objects.all()),
+                ('suggestions', Suggestion.objects.select_related('user')),
+                ('comments', Comment.objects.select_related('user'))):
+            objects = queryset.filter(
+                Q(language__in=languages) | Q(language=None),
+                checksum__in=checksums,
+                project__in=projects,
+            )
+            for obj in objects:
+                key = (name, obj.checksum, obj.project_id, obj.language_id)
+                data.setdefault(key, []).append(obj)
+
+        for unit in units:
+            project_id = unit.translation.subproject.project_id
+            language_id = unit.translation.language_id
+            unit._context = {}
+            for name, language in (
+                    ('checks', language_id),
+                    ('source_checks', None),
+                    ('suggestions', language_id),
+                    ('comments', language_id),
+                    ('source_comments', None)):
+                key = (
+                    name.replace('source_', ''),
+                    unit.checksum,
+                    project_id,
+                    language
+                )
+                unit._context[name] = data.get(key, [])
+
+        return units
+
 
 class Unit(models.Model):
     translation = models.ForeignKey(Translation)
@@ -394,6 +830,13 @@ class Unit(models.Model):
         ordering = ['position']
         app_label = 'trans'
 
+    def __init__(self, *args, **kwargs):
+        '''
+        Constructor to initialize some cache properties.
+        '''
+        super(Unit, self).__init__(*args, **kwargs)
+        self._context = None
+
     def has_acl(self, user):
         '''
         Checks whether current user is allowed to access this
@@ -418,9 +861,13 @@ class Unit(models.Model):
             self.translation.get_translate_url(), self.checksum
         )
 
-    def update_from_unit(self, unit, pos, force, template=None):
+    def update_from_unit(self, unit, pos, force, template=None, save=True):
         '''
         Updates Unit from ttkit unit.
+
+        Returns tuple of flags whether the unit has been changed and whether
+        its content (or fuzzy flag) has changed. With save disabled, caller
+        is responsible for storing the unit and updating checks and index.
         '''
         # Template is optional
         if template is None:
@@ -476,7 +923,7 @@ class Unit(models.Model):
                 comment == self.comment and
                 pos == self.position and
                 previous_source == self.previous_source):
-            return
+            return False, False
 
         # Store updated values
         self.position = pos
@@ -487,12 +934,15 @@ class Unit(models.Model):
         self.translated = translated
         self.comment = comment
         self.previous_source = previous_source
-        self.save(
-            force_insert=force,
-            backend=True,
-            same_content=same_content,
-            same_fuzzy=same_fuzzy
-        )
+        if save:
+            self.save(
+                force_insert=force,
+                backend=True,
+                same_content=same_content,
+                same_fuzzy=same_fuzzy
+            )
+
+        return True, not same_content or not same_fuzzy
 
     def is_plural(self):
         '''
@@ -544,43 +994,62 @@ class Unit(models.Model):
             unit.fuzzy = self.fuzzy
             unit.save_backend(request, False)
 
-    def save_backend(self, request, propagate=True, gen_change=True):
+    def save_backend(self, request, propagate=True, gen_change=True,
+                     update_checks=True):
         '''
         Stores unit to backend.
+
+        With update_checks disabled, caller is responsible for updating
+        checks (eg. using UnitManager.update_checks for batch of units).
         '''
         from accounts.models import Profile
         from trans.models.unitdata import Change
+        from trans.models.stats import TranslationCount
 
         # Update lock timestamp
         self.translation.update_lock(request)
 
-        # Store to backend
-        try:
-            (saved, pounit) = self.translation.update_unit(self, request)
-        except FileLockException:
-            logger.error('failed to lock backend for %s!', self)
-            messages.error(
-                request,
-                _(
-                    'Failed to store message in the backend, '
-                    'lock timeout occurred!'
+        if appsettings.OFFLOAD_WRITES:
+            # Backend is updated later (see Translation.flush_pending)
+            saved = self.queue_write(request)
+        else:
+            # Store to backend
+            try:
+                (saved, pounit) = self.translation.update_unit(self, request)
+            except FileLockException:
+                logger.error('failed to lock backend for %s!', self)
+                messages.error(
+                    request,
+                    _(
+                        'Failed to store message in the backend, '
+                        'lock timeout occurred!'
+                    )
                 )
-            )
-            return False
-
-        # Handle situation when backend did not find the message
-        if pounit is None:
-            logger.error('message %s disappeared!', self)
-            messages.error(
-                request,
-                _(
-                    'Message not found in backend storage, '
-                    'it is probably corrupted.'
+                return False
+
+            # Handle situation when backend did not find the message
+            if pounit is None:
+                logger.error('message %s disappeared!', self)
+                messages.error(
+                    request,
+                    _(
+                        'Message not found in backend storage, '
+                        'it is probably corrupted.'
+                    )
                 )
-            )
-            # Try reloading from backend
-            self.translation.update_from_blob(True)
-            return False
+                # Try reloading from backend
+                self.translation.update_from_blob(True)
+                return False
+
+            # Update translated flag
+            self.translated = is_translated(pounit)
+
+            # Update comments as they might have been changed (eg, fuzzy
+            # flag removed)
+            if hasattr(pounit, 'typecomments'):
+                self.flags = ', '.join(pounit.typecomments)
+            else:
+                self.flags = ''
 
         # Return if there was no change
         if not saved:
@@ -589,25 +1058,21 @@ class Unit(models.Model):
                 self.propagate(request)
             return False
 
-        # Update translated flag
-        self.translated = is_translated(pounit)
-
-        # Update comments as they might have been changed (eg, fuzzy flag
-        # removed)
-        if hasattr(pounit, 'typecomments'):
-            self.flags = ', '.join(pounit.typecomments)
-        else:
-            self.flags = ''
-
         # Get old unit from database (for notifications)
         oldunit = Unit.objects.get(id=self.id)
 
+        # Update counters depending on translated flag
+        TranslationCount.objects.update_unit(self, oldunit.translated)
+
         # Save updated unit to database
-        self.save(backend=True)
+        self.save(backend=True, update_checks=update_checks)
 
         # Update translation stats
         old_translated = self.translation.translated
-        self.translation.update_stats()
+        self.translation.update_stats_delta(
+            int(self.translated) - int(oldunit.translated),
+            int(self.fuzzy) - int(oldunit.fuzzy)
+        )
 
         # Notify subscribed users about new translation
         subscriptions = Profile.objects.subscribed_any_translation(
@@ -651,13 +1116,7 @@ class Unit(models.Model):
             )
 
         # Force commiting on completing translation
-        if old_translated < self.translation.translated and self.translation.translated == self.translation.total:
-            self.translation.commit_pending()
-            Change.objects.create(
-                translation=self.translation,
-                action=Change.ACTION_COMPLETE,
-                user=request.user
-            )
+        self.translation.handle_complete(old_translated, request.user)
 
         # Propagate to other projects
         if propagate:
@@ -665,6 +1124,27 @@ class Unit(models.Model):
 
         return True
 
+    def queue_write(self, request):
+        '''
+        Records change to be written to backend file later.
+
+        Returns whether there was any change. The translated flag and
+        flags are updated from backend once the change is written.
+        '''
+        from trans.models.unitdata import PendingWrite
+        from trans.models.jobs import Job
+
+        oldunit = Unit.objects.get(id=self.id)
+        if oldunit.target == self.target and oldunit.fuzzy == self.fuzzy:
+            return False
+
+        self.translated = not self.fuzzy and self.target != ''
+        PendingWrite.objects.create(unit=self, user=request.user)
+
+        # Let job_daemon write the change
+        Job.objects.enqueue_object(self.translation, Job.ACTION_FLUSH)
+        return True
+
     def save(self, *args, **kwargs):
         '''
         Wrapper around save to warn when save did not come from
@@ -682,13 +1162,14 @@ class Unit(models.Model):
         # Pop parameter indicating that we don't have to process content
         same_content = kwargs.pop('same_content', False)
         same_fuzzy = kwargs.pop('same_fuzzy', False)
+        update_checks = kwargs.pop('update_checks', True)
         force_insert = kwargs.get('force_insert', False)
 
         # Actually save the unit
         super(Unit, self).save(*args, **kwargs)
 
         # Update checks if content or fuzzy flag has changed
-        if not same_content or not same_fuzzy:
+        if update_checks and (not same_content or not same_fuzzy):
             self.check()
 
         # Update fulltext index if content has changed or this is a new unit
@@ -735,6 +1216,8 @@ class Unit(models.Model):
         '''
         Returns all suggestions for this unit.
         '''
+        if self._context is not None:
+            return self._context['suggestions']
         from trans.models.unitdata import Suggestion
         return Suggestion.objects.filter(
             checksum=self.checksum,
@@ -768,6 +1251,12 @@ class Unit(models.Model):
         '''
         Returns all active (not ignored) checks for this unit.
         '''
+        if self._context is not None:
+            return [
+                check
+                for check in self._context['checks']
+                if not check.ignore
+            ]
         from trans.models.unitdata import Check
         return Check.objects.filter(
             checksum=self.checksum,
@@ -780,6 +1269,12 @@ class Unit(models.Model):
         '''
         Returns all active (not ignored) source checks for this unit.
         '''
+        if self._context is not None:
+            return [
+                check
+                for check in self._context['source_checks']
+                if not check.ignore
+            ]
         from trans.models.unitdata import Check
         return Check.objects.filter(
             checksum=self.checksum,
@@ -792,6 +1287,8 @@ class Unit(models.Model):
         '''
         Returns list of target comments.
         '''
+        if self._context is not None:
+            return self._context['comments']
         from trans.models.unitdata import Comment
         return Comment.objects.filter(
             checksum=self.checksum,
@@ -803,6 +1300,8 @@ class Unit(models.Model):
         '''
         Returns list of target comments.
         '''
+        if self._context is not None:
+            return self._context['source_comments']
         from trans.models.unitdata import Comment
         return Comment.objects.filter(
             checksum=self.checksum,
@@ -849,8 +1348,6 @@ class Unit(models.Model):
         failing_target = []
         failing_source = []
 
-        change = False
-
         # Run all checks
         for check in checks_to_run:
             check_obj = CHECKS[check]
@@ -868,7 +1365,6 @@ class Unit(models.Model):
                 continue
             if cleanup_checks:
                 check.delete()
-                change = True
 
         # Compare to existing source checks, delete non failing ones
         for check in self.source_checks():
@@ -877,7 +1373,6 @@ class Unit(models.Model):
                 continue
             if cleanup_checks:
                 check.delete()
-                change = True
 
         # Store new checks in database
         for check in failing_target:
@@ -888,7 +1383,6 @@ class Unit(models.Model):
                 ignore=False,
                 check=check
             )
-            change = True
 
         # Store new checks in database
         for check in failing_source:
@@ -899,11 +1393,21 @@ class Unit(models.Model):
                 ignore=False,
                 check=check
             )
-            change = True
 
-        # Invalidate checks cache
-        if change:
-            self.translation.invalidate_cache()
+    def get_last_changes(self):
+        '''
+        Returns list of recent changes of this unit.
+        '''
+        from trans.models.unitdata import Change
+        changes = list(Change.objects.filter(
+            unit=self
+        ).select_related(
+            'user'
+        )[:10])
+        for change in changes:
+            change.unit = self
+            change.translation = self.translation
+        return changes
 
     def nearby(self):
         '''
@@ -143,6 +143,19 @@ class ChangeManager(models.Manager):
             user__isnull=False,
         )
 
+    def last_content_ids(self, translations):
+        '''
+        Returns dictionary with ids of last content changes keyed by
+        translation id.
+        '''
+        return dict(self.content().filter(
+            translation__in=translations
+        ).values_list(
+            'translation'
+        ).annotate(
+            models.Max('id')
+        ).order_by())
+
     def count_stats(self, days, step, dtstart, base):
         '''
         Counts number of changes in given dataset and period groupped by
@@ -272,3 +285,12 @@ class IndexUpdate(models.Model):
 
     class Meta:
         app_label = 'trans'
+
+
+class PendingWrite(models.Model):
+    unit = models.ForeignKey(Unit)
+    user = models.ForeignKey(User, null=True)
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'trans'
@@ -24,6 +24,8 @@ Whoosh based full text search.
 
 import whoosh
 import os
+import threading
+from contextlib import contextmanager
 from whoosh.fields import Schema, TEXT, ID
 from django.db.models.signals import post_syncdb
 from weblate import appsettings
@@ -74,49 +76,70 @@ def flush_index():
     FULLTEXT_INDEX.commit()
 
 
-def update_index(units, source_units=None):
+def update_source_index(units, writer):
     '''
-    Updates fulltext index for given set of units.
+    Updates source index for given set of units.
     '''
     from trans.models import Unit
-    languages = Language.objects.all()
+    # Same source string is usually present in several translations
+    units = units.values('checksum', 'source', 'context').order_by().distinct()
+    for unit in units.iterator():
+        Unit.objects.add_to_source_index(
+            unit['checksum'],
+            unit['source'],
+            unit['context'],
+            writer
+        )
+
 
+def update_target_index(units, lang, writer):
+    '''
+    Updates target index for given language and set of units.
+    '''
+    from trans.models import Unit
+    units = units.filter(
+        translation__language__code=lang
+    ).exclude(
+        target=''
+    ).values(
+        'checksum', 'target'
+    )
+    for unit in units.iterator():
+        Unit.objects.add_to_target_index(
+            unit['checksum'],
+            unit['target'],
+            writer
+        )
+
+
+def get_index_languages(units):
+    '''
+    Returns list of language codes used in given set of units.
+    '''
+    return Language.objects.filter(
+        translation__unit__in=units
+    ).values_list('code', flat=True).distinct()
+
+
+def update_index(units, source_units=None):
+    '''
+    Updates fulltext index for given set of units.
+    '''
     # Default to same set for both updates
     if source_units is None:
         source_units = units
 
     # Update source index
     with FULLTEXT_INDEX.source_writer(buffered=False) as writer:
-        source_units = source_units.values('checksum', 'source', 'context')
-        for unit in source_units.iterator():
-            Unit.objects.add_to_source_index(
-                unit['checksum'],
-                unit['source'],
-                unit['context'],
-                writer
-            )
+        update_source_index(source_units, writer)
 
     # Update per language indices
-    for lang in languages:
+    for lang in get_index_languages(units):
         index = FULLTEXT_INDEX.target_writer(
-            lang=lang.code, buffered=False
+            lang=lang, buffered=False
         )
         with index as writer:
-
-            language_units = units.filter(
-                translation__language=lang
-            ).exclude(
-                target=''
-            ).values(
-                'checksum', 'target'
-            )
-
-            for unit in language_units.iterator():
-                Unit.objects.add_to_target_index(
-                    unit['checksum'],
-                    unit['target'],
-                    writer
-                )
+            update_target_index(units, lang, writer)
 
 
 class Index(object):
@@ -128,6 +151,7 @@ class Index(object):
     _target = {}
     _source_writer = None
     _target_writer = {}
+    _searchers = threading.local()
 
     def source(self):
         '''
@@ -160,11 +184,16 @@ class Index(object):
                 self._target[lang] = create_target_index(lang)
         return self._target[lang]
 
-    def source_writer(self, buffered=True):
+    def source_writer(self, buffered=True, procs=1):
         '''
         Returns source index writer (by default buffered).
+
+        Unbuffered writer can use several processes, in that case the
+        segments written by them are not merged.
         '''
         if not buffered:
+            if procs > 1:
+                return self.source().writer(procs=procs, multisegment=True)
             return self.source().writer()
         if self._source_writer is None:
             self._source_writer = BufferedWriter(self.source())
@@ -180,12 +209,32 @@ class Index(object):
             self._target_writer[lang] = BufferedWriter(self.target(lang))
         return self._target_writer[lang]
 
+    @contextmanager
+    def _searcher(self, name, index):
+        '''
+        Returns read only searcher for index, which is kept open between
+        calls (per thread) and refreshed only when index generation changes.
+        '''
+        if not hasattr(self._searchers, 'cache'):
+            self._searchers.cache = {}
+        cache = self._searchers.cache
+        if name in cache:
+            searcher = cache[name].refresh()
+            # Refresh returns new searcher if index has changed, the old
+            # one has to be closed to release index files
+            if searcher is not cache[name]:
+                cache[name].close()
+                cache[name] = searcher
+        else:
+            cache[name] = index.searcher()
+        yield cache[name]
+
     def source_searcher(self, buffered=True):
         '''
         Returns source index searcher (on buffered writer).
         '''
         if not buffered:
-            return self.source().searcher()
+            return self._searcher('source', self.source())
         return self.source_writer(buffered).searcher()
 
     def target_searcher(self, lang, buffered=True):
@@ -193,7 +242,7 @@ class Index(object):
         Returns target index searcher (on buffered writer) for given language.
         '''
         if not buffered:
-            return self.target(lang).searcher()
+            return self._searcher('target-%s' % lang, self.target(lang))
         return self.target_writer(lang, buffered).searcher()
 
     def commit(self):
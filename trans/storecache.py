@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2013 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <http://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+'''
+Process wide cache of parsed translation files.
+'''
+
+from django.core.cache import cache
+from weblate import appsettings
+from collections import OrderedDict
+import threading
+import hashlib
+import pickle
+import os
+
+
+class StoreCache(object):
+    '''
+    LRU cache of parsed ttkit stores.
+
+    Stores are keyed by filename and git blob hash, the modification time
+    of the file is checked as well to catch changes done by other
+    processes. Size of the cache is approximated by size of the files.
+
+    Cached stores are shared by all threads and must not be changed, stores
+    being edited are parsed separately (see Translation.get_writable_store).
+    '''
+    def __init__(self):
+        self._stores = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_shared_key(self, filename, blob_hash, mtime):
+        '''
+        Returns key for shared cache.
+        '''
+        return 'store-%s' % hashlib.md5(
+            (u'%s-%s-%s' % (filename, blob_hash, mtime)).encode('utf-8')
+        ).hexdigest()
+
+    def get(self, filename, blob_hash, loader):
+        '''
+        Returns cached store or loads it using loader.
+        '''
+        stat = os.stat(filename)
+        key = (filename, blob_hash)
+
+        with self._lock:
+            if key in self._stores:
+                store, mtime, size = self._stores.pop(key)
+                if mtime == stat.st_mtime:
+                    # Move to the end as most recently used
+                    self._stores[key] = (store, mtime, size)
+                    return store
+                self._size -= size
+
+        store = None
+
+        # Try shared cache
+        if appsettings.STORE_CACHE_SHARED:
+            shared_key = self.get_shared_key(
+                filename, blob_hash, stat.st_mtime
+            )
+            store = cache.get(shared_key)
+
+        # Parse the file
+        if store is None:
+            store = loader()
+            if appsettings.STORE_CACHE_SHARED:
+                try:
+                    cache.set(shared_key, store)
+                except (pickle.PicklingError, TypeError):
+                    # Some stores (eg. lxml based) can not be pickled
+                    pass
+
+        self.set(filename, blob_hash, store, stat)
+        return store
+
+    def set(self, filename, blob_hash, store, stat=None):
+        '''
+        Stores parsed store in the cache.
+        '''
+        if stat is None:
+            stat = os.stat(filename)
+        size = stat.st_size
+        if size > appsettings.STORE_CACHE_SIZE:
+            return
+
+        with self._lock:
+            self.remove(filename)
+            self._stores[(filename, blob_hash)] = (store, stat.st_mtime, size)
+            self._size += size
+
+            # Drop least recently used stores
+            while self._size > appsettings.STORE_CACHE_SIZE:
+                dummy, (store, mtime, size) = self._stores.popitem(False)
+                self._size -= size
+
+    def remove(self, filename):
+        '''
+        Removes all cached stores for given file.
+        '''
+        for key in self._stores.keys():
+            if key[0] == filename:
+                self._size -= self._stores.pop(key)[2]
+
+    def invalidate(self, filename):
+        '''
+        Invalidates cached stores for file, used before changing it.
+        '''
+        with self._lock:
+            self.remove(filename)
+
+
+STORE_CACHE = StoreCache()
@@ -25,6 +25,9 @@ Tests for management commands.
 from trans.tests.models import RepoTestCase
 from django.core.management import call_command
 from trans.search import flush_index
+from trans.models import Translation
+import tempfile
+import zipfile
 
 
 class ImportProjectTest(RepoTestCase):
@@ -188,10 +191,40 @@ class UpdateChecksTest(CheckGitTest):
     command_name = 'updatechecks'
 
 
+class UpdateStatsTest(CheckGitTest):
+    command_name = 'updatestats'
+
+    def test_recount(self):
+        translation = Translation.objects.get(language_code='cs')
+        translation.update_stats_delta(translated=10, fuzzy=1)
+        self.do_test('test/test')
+        translation = Translation.objects.get(language_code='cs')
+        self.assertEqual(translation.translated, 0)
+        self.assertEqual(translation.fuzzy, 0)
+
+
 class UpdateGitTest(CheckGitTest):
     command_name = 'updategit'
 
 
+class ExportZipTest(CheckGitTest):
+    command_name = 'export_zip'
+
+    def setUp(self):
+        super(ExportZipTest, self).setUp()
+        self.output = tempfile.NamedTemporaryFile(suffix='.zip')
+
+    def tearDown(self):
+        super(ExportZipTest, self).tearDown()
+        self.output.close()
+
+    def do_test(self, *args, **kwargs):
+        kwargs['output'] = self.output.name
+        super(ExportZipTest, self).do_test(*args, **kwargs)
+        archive = zipfile.ZipFile(self.output.name)
+        self.assertIn('test/test/po/cs.po', archive.namelist())
+
+
 class RebuildIndexTest(CheckGitTest):
     command_name = 'rebuild_index'
 
@@ -25,6 +25,11 @@ Tests for data exports.
 from django.core.urlresolvers import reverse
 from django.utils import simplejson
 from trans.tests.views import ViewTestCase
+from weblate import appsettings
+from cStringIO import StringIO
+import tempfile
+import zipfile
+import shutil
 
 
 class ExportsViewTest(ViewTestCase):
@@ -70,3 +75,106 @@ class ExportsViewTest(ViewTestCase):
         )
         parsed = simplejson.loads(response.content)
         self.assertEqual(parsed[0]['name'], 'Czech')
+
+    def test_export_stats_etag(self):
+        url = reverse('export_stats', kwargs={
+            'project': self.subproject.project.slug,
+            'subproject': self.subproject.slug,
+        })
+        response = self.client.get(url)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Changing translation changes statistics
+        self.change_unit(u'Nazdar světe!\n')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        parsed = simplejson.loads(response.content)
+        self.assertEqual(parsed[0]['translated'], 1)
+        self.assertEqual(parsed[0]['last_author'], 'testuser')
+
+    def test_export_stats_project(self):
+        response = self.client.get(
+            reverse('export_stats_project', kwargs={
+                'project': self.subproject.project.slug,
+            })
+        )
+        parsed = simplejson.loads(response.content)
+        self.assertEqual(parsed[0]['name'], 'Czech')
+        self.assertEqual(parsed[0]['subproject'], self.subproject.slug)
+
+    def test_export_stats_language(self):
+        response = self.client.get(
+            reverse('export_stats_language', kwargs={
+                'lang': 'cs',
+            })
+        )
+        parsed = simplejson.loads(response.content)
+        self.assertEqual(len(parsed), 1)
+        self.assertEqual(parsed[0]['code'], 'cs')
+
+
+class ZipExportTest(ViewTestCase):
+    def setUp(self):
+        super(ZipExportTest, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.orig_cache_dir = appsettings.ZIP_CACHE_DIR
+        appsettings.ZIP_CACHE_DIR = self.cache_dir
+
+    def tearDown(self):
+        super(ZipExportTest, self).tearDown()
+        appsettings.ZIP_CACHE_DIR = self.orig_cache_dir
+        shutil.rmtree(self.cache_dir)
+
+    def get_archive(self, response):
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(StringIO(response.content))
+
+    def test_export_zip(self):
+        url = reverse('download_subproject_archive', kwargs={
+            'project': self.subproject.project.slug,
+            'subproject': self.subproject.slug,
+        })
+        response = self.client.get(url)
+        archive = self.get_archive(response)
+        self.assertIn('test/test/po/cs.po', archive.namelist())
+        self.assertIn(
+            'Weblate Hello World 2012',
+            archive.read('test/test/po/cs.po')
+        )
+
+        # Second download is served from cache
+        etag = response['ETag']
+        response = self.client.get(url)
+        self.assertEqual(response['ETag'], etag)
+        self.assertTrue(response.has_header('Content-Length'))
+        archive = self.get_archive(response)
+        self.assertIn('test/test/po/cs.po', archive.namelist())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Not committed changes are exported, but not cached
+        self.change_unit(u'Nazdar světe!\n')
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('ETag'))
+        archive = self.get_archive(response)
+        self.assertIn('Nazdar', archive.read('test/test/po/cs.po'))
+
+    def test_export_zip_project(self):
+        response = self.client.get(
+            reverse('download_project_archive', kwargs={
+                'project': self.subproject.project.slug,
+            })
+        )
+        archive = self.get_archive(response)
+        self.assertIn('test/test/po/cs.po', archive.namelist())
+
+    def test_export_zip_language(self):
+        response = self.client.get(
+            reverse('download_language_archive', kwargs={
+                'lang': 'cs',
+            })
+        )
+        archive = self.get_archive(response)
+        self.assertEqual(archive.namelist(), ['test/test/po/cs.po'])
@@ -24,7 +24,12 @@ Tests for import and export.
 
 from trans.tests.views import ViewTestCase
 from django.core.urlresolvers import reverse
+from django.test import TestCase
 from trans.tests.util import get_test_file
+from trans.formats import ttkit, StoreIndex
+from trans.exporters import EXPORTERS
+from trans.util import msg_checksum
+import json
 
 TEST_PO = get_test_file('cs.po')
 
@@ -175,3 +180,43 @@ class ExportTest(ViewTestCase):
             )
         )
         self.assertContains(response, 'Weblate Hello World 2012')
+
+    def test_export_formats(self):
+        url = reverse('download_translation', kwargs=self.kw_translation)
+        for export_format in EXPORTERS:
+            response = self.client.get(url, {'format': export_format})
+            self.assertContains(response, 'Orangutan has %d banana')
+        response = self.client.get(url, {'format': 'json'})
+        data = json.loads(response.content)
+        self.assertEquals(len(data), 4)
+        response = self.client.get(url, {'format': 'invalid'})
+        self.assertEquals(response.status_code, 404)
+
+    def test_export_etag(self):
+        url = reverse('download_translation', kwargs=self.kw_translation)
+        response = self.client.get(url, {'format': 'po'})
+        etag = response['ETag']
+        response = self.client.get(
+            url, {'format': 'po'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEquals(response.status_code, 304)
+        # Changing translation changes ETag
+        self.change_unit(u'Nazdar světe!\n')
+        response = self.client.get(
+            url, {'format': 'po'}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertContains(response, u'Nazdar světe!')
+
+
+class StoreIndexTest(TestCase):
+    '''
+    Testing of lookups in ttkit store.
+    '''
+    def test_lookup(self):
+        store = ttkit(TEST_PO)
+        index = StoreIndex(store)
+        unit = index.find_checksum(msg_checksum(u'Hello, world!\n', u''))
+        self.assertEquals(unit.target, TRANSLATION_PO)
+        self.assertEquals(index.find_source(u'Hello, world!\n'), unit)
+        self.assertEquals(index.find_id(unit.getid()), unit)
+        self.assertEquals(index.find_checksum('x'), None)
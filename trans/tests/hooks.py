@@ -24,6 +24,7 @@ Tests for notification hooks.
 
 from django.core.urlresolvers import reverse
 from trans.tests.views import ViewTestCase
+from trans.models import Job
 from weblate import appsettings
 
 GITHUB_PAYLOAD = '''
@@ -145,3 +146,25 @@ class HooksViewTest(ViewTestCase):
             {'payload': BITBUCKET_PAYLOAD}
         )
         self.assertContains(response, 'update triggered')
+
+    def test_view_hook_queue(self):
+        appsettings.BACKGROUND_HOOKS = True
+        for dummy in range(2):
+            response = self.client.get(
+                reverse('hook-subproject', kwargs={
+                    'project': self.subproject.project.slug,
+                    'subproject': self.subproject.slug,
+                })
+            )
+            self.assertContains(response, 'update triggered')
+        appsettings.BACKGROUND_HOOKS = False
+        # Repeated updates are coalesced
+        self.assertEqual(Job.objects.count(), 1)
+        job = Job.objects.claim(1)
+        self.assertEqual(job.action, Job.ACTION_UPDATE)
+        # Only one job runs on repository
+        Job.objects.enqueue(self.subproject, Job.ACTION_PUSH)
+        self.assertIsNone(Job.objects.claim(2))
+        job.run()
+        self.assertEqual(job.state, Job.STATE_DONE)
+        self.assertEqual(Job.objects.claim(2).action, Job.ACTION_PUSH)
@@ -23,6 +23,11 @@ Tests for AJAX/JS views.
 """
 
 from trans.tests.views import ViewTestCase
+from trans.models import Unit
+from trans.memory import (
+    create_memory_index, get_memory_index, update_memory,
+    lookup_exact, lookup_fuzzy,
+)
 from django.core.urlresolvers import reverse
 
 
@@ -46,6 +51,60 @@ class JSViewsTest(ViewTestCase):
         )
         self.assertContains(response, 'No similar strings found')
 
+    def update_memory(self):
+        '''
+        Builds translation memory from scratch.
+        '''
+        with create_memory_index().writer() as writer:
+            update_memory(Unit.objects.all(), writer)
+
+    def test_get_memory(self):
+        self.update_memory()
+        unit = self.get_unit()
+        response = self.client.get(
+            reverse('js-memory', kwargs={'unit_id': unit.id}),
+        )
+        self.assertContains(response, 'No matches found in translation memory')
+
+    def test_get_memory_match(self):
+        self.change_unit(u'Nazdar svete!\n')
+        self.update_memory()
+        unit = self.get_unit()
+        response = self.client.get(
+            reverse('js-memory', kwargs={'unit_id': unit.id}),
+        )
+        self.assertContains(response, 'Nazdar svete!')
+        self.assertContains(response, 'Test/Test')
+        self.assertEqual(
+            lookup_exact('cs', [unit.source]),
+            {unit.source: u'Nazdar svete!\n'}
+        )
+
+        # Changed translation replaces old one
+        self.change_unit(u'Ahoj svete!\n')
+        with get_memory_index().writer() as writer:
+            update_memory(Unit.objects.all(), writer)
+        self.assertEqual(
+            lookup_exact('cs', [unit.source]),
+            {unit.source: u'Ahoj svete!\n'}
+        )
+
+    def test_get_memory_acl(self):
+        self.change_unit(u'Nazdar svete!\n')
+        self.update_memory()
+        unit = self.get_unit()
+        self.assertEqual(len(lookup_fuzzy('cs', unit.source)), 1)
+
+        # Enabling access control removes project from memory
+        self.project.enable_acl = True
+        self.project.save()
+        self.assertEqual(lookup_fuzzy('cs', unit.source), [])
+
+        # And the project is not added back
+        self.update_memory()
+        self.assertEqual(lookup_fuzzy('cs', unit.source), [])
+        self.assertEqual(lookup_exact('cs', [unit.source]), {})
+
     def test_get_other(self):
         unit = self.get_unit()
         response = self.client.get(
@@ -26,12 +26,16 @@ from django.test import TestCase
 from django.conf import settings
 from django.contrib.auth.models import Permission, User
 from django.core.exceptions import ValidationError
+import threading
 import shutil
 import os
 import git
 from trans.models import (
-    Project, SubProject
+    Project, SubProject, Unit, Check, TranslationCount, AggregateStats
 )
+from trans.checks import CHECKS
+from trans.flock import FlockLock
+from trans.filelock import FileLockException
 
 
 class RepoTestCase(TestCase):
@@ -243,6 +247,57 @@ class SubProjectTest(RepoTestCase):
             project.full_clean
         )
 
+    def test_git_state(self):
+        '''
+        Cached repository state should match git.
+        '''
+        project = self.create_subproject()
+        self.assertFalse(project.git_needs_commit())
+        self.assertFalse(project.git_needs_merge())
+        self.assertFalse(project.git_needs_push())
+        translation = project.translation_set.get(language_code='cs')
+        self.assertEqual(
+            translation.get_git_blob_hash(),
+            project.git_repo.tree()[translation.filename].hexsha
+        )
+        with open(translation.get_filename(), 'a') as handle:
+            handle.write('\n')
+        self.assertTrue(project.git_needs_commit())
+        self.assertTrue(translation.git_needs_commit())
+
+    def test_git_lock(self):
+        '''
+        Shared locks can be held at once, exclusive lock can not.
+        '''
+        project = self.create_subproject()
+        other = SubProject.objects.get(pk=project.pk)
+        with project.get_git_lock(shared=True):
+            with other.get_git_lock(shared=True):
+                lock = FlockLock(project.get_git_lock_path(), timeout=0.1)
+                self.assertRaises(FileLockException, lock.acquire)
+        with project.get_git_lock():
+            # Lock is reentrant
+            with project.get_git_lock():
+                pass
+            self.assertTrue(project.get_git_lock().is_locked)
+        with project.get_git_lock(shared=True):
+            # Shared lock can be upgraded and downgraded
+            with project.get_git_lock():
+                lock = FlockLock(
+                    project.get_git_lock_path(), timeout=0.1, shared=True
+                )
+                self.assertRaises(FileLockException, lock.acquire)
+            with lock:
+                pass
+        # Waiting lock gets the lock once it is released
+        lock = project.get_git_lock()
+        lock.acquire()
+        timer = threading.Timer(0.1, lock.release)
+        timer.start()
+        with other.get_git_lock():
+            self.assertFalse(lock.is_locked)
+        timer.join()
+
 
 class TranslationTest(RepoTestCase):
     '''
@@ -254,3 +309,130 @@ class TranslationTest(RepoTestCase):
         self.assertEqual(translation.translated, 0)
         self.assertEqual(translation.total, 4)
         self.assertEqual(translation.fuzzy, 0)
+
+    def test_update_checks(self):
+        '''
+        Batch update of checks should give same result as checking
+        units one by one.
+        '''
+        self.create_subproject()
+        Unit.objects.update_checks()
+        batch = set(
+            Check.objects.values_list('checksum', 'language', 'check')
+        )
+        Check.objects.all().delete()
+        for unit in Unit.objects.all():
+            unit.check()
+        single = set(
+            Check.objects.values_list('checksum', 'language', 'check')
+        )
+        self.assertEqual(batch, single)
+
+    def test_counts(self):
+        '''
+        Stored counters should match actual counts.
+        '''
+        project = self.create_subproject()
+        translation = project.translation_set.get(language_code='cs')
+        Unit.objects.update_checks()
+        for check in Check.objects.all()[:1]:
+            check.ignore = True
+            check.save()
+        counts = TranslationCount.objects.get_counts(translation)
+        for rqtype in counts:
+            self.assertEqual(
+                counts[rqtype],
+                translation.unit_set.filter_type(rqtype, translation).count()
+            )
+
+    def test_counts_bulk_delete(self):
+        '''
+        Counters should be updated when batch update removes checks.
+        '''
+        project = self.create_subproject()
+        translation = project.translation_set.get(language_code='cs')
+        Unit.objects.update_checks()
+        unit = translation.unit_set.all()[0]
+        failing = set(unit.checks().values_list('check', flat=True))
+        check = [
+            item for item in CHECKS
+            if CHECKS[item].target and not item in failing
+        ][0]
+        # Stale check which is removed by batch update
+        Check.objects.create(
+            checksum=unit.checksum,
+            project=project.project,
+            language=translation.language,
+            check=check,
+            ignore=False
+        )
+        Unit.objects.update_checks()
+        counts = TranslationCount.objects.get_counts(translation)
+        for rqtype in counts:
+            self.assertEqual(
+                counts[rqtype],
+                translation.unit_set.filter_type(rqtype, translation).count()
+            )
+
+    def test_aggregate_stats(self):
+        '''
+        Aggregated statistics should follow changes in translations.
+        '''
+        subproject = self.create_subproject()
+        translation = subproject.translation_set.get(language_code='cs')
+        project = subproject.project
+        language = translation.language
+        self.assertEqual(project.get_total(), 4)
+        self.assertEqual(project.get_translated_percent(language), 0)
+        self.assertEqual(language.get_translated_percent(), 0)
+
+        # Stored statistics are updated by changes
+        translation.update_stats_delta(translated=2, fuzzy=1)
+        stored = [
+            AggregateStats.objects.get_stats(obj)
+            for obj in (project, subproject, language)
+        ]
+        stored.append(AggregateStats.objects.get_stats(project, language))
+        AggregateStats.objects.all().delete()
+        for stats in stored:
+            calculated = AggregateStats.objects.calculate(
+                stats.project_id, stats.subproject_id, stats.language_id
+            )
+            self.assertEqual(stats.translated, calculated.translated)
+            self.assertEqual(stats.fuzzy, calculated.fuzzy)
+            self.assertEqual(stats.total, calculated.total)
+
+        # Statistics stored meanwhile are just read
+        stats = stored[-1]
+        self.assertEqual(
+            AggregateStats.objects.calculate(
+                stats.project_id, stats.subproject_id, stats.language_id
+            ).pk,
+            AggregateStats.objects.get_stats(project, language).pk
+        )
+        self.assertEqual(
+            AggregateStats.objects.filter(language=language).count(), 2
+        )
+
+        # Statistics for all languages of project are loaded at once
+        project = Project.objects.get(pk=project.pk)
+        self.assertEqual(project.get_translated_percent(language), 50)
+        with self.assertNumQueries(0):
+            project.get_translated_percent(language)
+
+        # Listing loads projects and their statistics at once
+        with self.assertNumQueries(2):
+            projects = AggregateStats.objects.load_stats(
+                Project.objects.all()
+            )
+            for item in projects:
+                item.get_translated_percent()
+
+        # Deleting translation removes affected statistics
+        translation.delete()
+        self.assertEqual(
+            Project.objects.get(pk=project.pk).get_translated_percent(
+                language
+            ),
+            0
+        )
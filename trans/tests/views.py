@@ -27,7 +27,14 @@ from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.contrib.messages.storage.fallback import FallbackStorage
 from trans.tests.models import RepoTestCase
+from trans.models import (
+    Unit, Comment, Suggestion, Change, Job, PendingWrite, TranslationCount
+)
+from trans.util import get_source, get_target
 from accounts.models import Profile
+from weblate import appsettings
+import trans.views.edit
+import json
 
 
 class ViewTestCase(RepoTestCase):
@@ -181,6 +188,78 @@ class EditTest(ViewTestCase):
         self.assertEqual(unit.target, 'Nazdar svete!')
         self.assertEqual(len(unit.checks()), 2)
 
+    def test_edit_stats(self):
+        self.edit_unit(
+            'Hello, world!\n',
+            'Nazdar svete!\n'
+        )
+        translation = self.get_translation()
+        self.assertEqual(translation.translated, 1)
+        self.assertEqual(translation.fuzzy, 0)
+        # Mark as fuzzy
+        unit = translation.unit_set.get(source='Hello, world!\n')
+        unit.fuzzy = True
+        unit.save_backend(self.get_request('/'))
+        translation = self.get_translation()
+        stats = (translation.translated, translation.fuzzy)
+        # Counters match full recount
+        translation.update_stats()
+        self.assertEqual(stats, (translation.translated, translation.fuzzy))
+
+    def test_edit_offload(self):
+        appsettings.OFFLOAD_WRITES = True
+        try:
+            self.edit_unit(
+                'Hello, world!\n',
+                'Nazdar svete!\n'
+            )
+        finally:
+            appsettings.OFFLOAD_WRITES = False
+        self.assertFalse(self.translation.git_needs_commit())
+        # Change is written by queued job
+        job = Job.objects.claim(1)
+        self.assertEqual(job.action, Job.ACTION_FLUSH)
+        job.run()
+        self.assertEqual(job.state, Job.STATE_DONE)
+        self.assertFalse(PendingWrite.objects.exists())
+        self.assertTrue(self.translation.git_needs_commit())
+
+    def test_update_units(self):
+        unit = self.translation.unit_set.get(source='Hello, world!\n')
+        unit.target = 'Nazdar svete!\n'
+        updated = self.translation.update_units(
+            [unit], self.user
+        )
+        self.assertEqual(updated, [unit])
+        unit = self.translation.unit_set.get(source='Hello, world!\n')
+        self.assertEqual(unit.target, 'Nazdar svete!\n')
+        self.assertTrue(unit.translated)
+        self.assertEqual(len(unit.checks()), 0)
+        self.assertEqual(self.translation.translated, 1)
+
+    def test_update_units_counts(self):
+        translation = self.get_translation()
+        TranslationCount.objects.get_counts(translation)
+        unit = translation.unit_set.get(source='Hello, world!\n')
+        unit.target = 'Nazdar svete'
+        translation.update_units([unit], self.user)
+        # Counters match full recount
+        counts = TranslationCount.objects.get_counts(translation)
+        self.assertEqual(
+            counts, TranslationCount.objects.update_counts(translation)
+        )
+        self.assertTrue(counts['allchecks'] > 0)
+
+    def test_update_units_cached_store(self):
+        # Store handed out before is not changed by saving
+        store = self.translation.get_store()
+        unit = self.translation.unit_set.get(source='Hello, world!\n')
+        unit.target = 'Nazdar svete!\n'
+        self.translation.update_units([unit], self.user)
+        for pounit in store.units:
+            if get_source(pounit) == 'Hello, world!\n':
+                self.assertEqual(get_target(pounit), '')
+
     def test_commit_push(self):
         response = self.edit_unit(
             'Hello, world!\n',
@@ -208,6 +287,225 @@ class EditTest(ViewTestCase):
         self.assertFalse(self.subproject.git_needs_push())
         self.assertFalse(self.subproject.project.git_needs_push())
 
+    def test_navigation(self):
+        # Start new navigation session
+        response = self.client.get(self.translate_url, {'type': 'all'})
+        self.assertEqual(response.context['unit'].position, 1)
+        self.assertEqual(response.context['filter_pos'], 1)
+        self.assertEqual(
+            response.context['filter_count'],
+            self.translation.unit_set.count()
+        )
+        # Next
+        response = self.client.get(
+            self.translate_url, {'type': 'all', 'pos': '1'}
+        )
+        self.assertEqual(response.context['unit'].position, 2)
+        self.assertEqual(response.context['filter_pos'], 2)
+        # Previous
+        response = self.client.get(
+            self.translate_url, {'type': 'all', 'pos': '2', 'dir': 'back'}
+        )
+        self.assertEqual(response.context['unit'].position, 1)
+        # Nothing before first unit
+        response = self.client.get(
+            self.translate_url, {'type': 'all', 'pos': '1', 'dir': 'back'}
+        )
+        self.assertRedirects(response, self.translation.get_absolute_url())
+
+    def test_navigation_uncached(self):
+        # Too many units are navigated without cursor
+        limit = trans.views.edit.CURSOR_LIMIT
+        trans.views.edit.CURSOR_LIMIT = 1
+        try:
+            response = self.client.get(self.translate_url, {'type': 'all'})
+            self.assertEqual(response.context['unit'].position, 1)
+            response = self.client.get(
+                self.translate_url, {'type': 'all', 'pos': '1'}
+            )
+            self.assertEqual(response.context['unit'].position, 2)
+            self.assertEqual(response.context['filter_pos'], 2)
+            self.assertEqual(
+                response.context['filter_count'],
+                self.translation.unit_set.count()
+            )
+            response = self.client.get(
+                self.translate_url, {'type': 'all', 'pos': '2', 'dir': 'back'}
+            )
+            self.assertEqual(response.context['unit'].position, 1)
+        finally:
+            trans.views.edit.CURSOR_LIMIT = limit
+
+    def test_navigation_cursor(self):
+        response = self.client.get(
+            self.translate_url, {'type': 'untranslated'}
+        )
+        count = response.context['filter_count']
+        self.edit_unit(
+            'Hello, world!\n',
+            'Nazdar svete!\n'
+        )
+        # Units matching filter are kept during navigation
+        response = self.client.get(
+            self.translate_url, {'type': 'untranslated', 'pos': '1'}
+        )
+        self.assertEqual(response.context['filter_count'], count)
+        # And calculated again for new navigation
+        response = self.client.get(
+            self.translate_url, {'type': 'untranslated'}
+        )
+        self.assertEqual(response.context['filter_count'], count - 1)
+
+    def test_load_context(self):
+        unit = self.translation.unit_set.get(source='Hello, world!\n')
+        Comment.objects.create(
+            checksum=unit.checksum,
+            comment='Source comment',
+            user=self.user,
+            project=self.project,
+            language=None,
+        )
+        Suggestion.objects.create(
+            checksum=unit.checksum,
+            target='Ahoj svete!\n',
+            user=self.user,
+            project=self.project,
+            language=self.translation.language,
+        )
+        units = list(
+            self.translation.unit_set.select_translation().all()
+        )
+        with self.assertNumQueries(3):
+            Unit.objects.load_context(units)
+        with self.assertNumQueries(0):
+            for item in units:
+                self.assertEqual(
+                    len(item.get_source_comments()),
+                    int(item.checksum == unit.checksum)
+                )
+                self.assertEqual(
+                    len(item.suggestions()),
+                    int(item.checksum == unit.checksum)
+                )
+                self.assertEqual(len(item.get_comments()), 0)
+                self.assertEqual(len(item.active_source_checks()), 0)
+                item.active_checks()
+
+        # Translate page renders using loaded context
+        response = self.client.get(
+            self.translate_url, {'checksum': unit.checksum}
+        )
+        self.assertContains(response, 'Source comment')
+        self.assertContains(response, 'Ahoj svete!')
+
+    def test_zen(self):
+        response = self.client.get(
+            self.translation.get_zen_url(), {'type': 'all'}
+        )
+        self.assertContains(response, 'Thank you for using Weblate.')
+        self.assertEqual(
+            len(response.context['forms']),
+            self.translation.unit_set.count()
+        )
+        self.assertIsNone(response.context['next_pos'])
+
+    def save_zen(self, data, **kwargs):
+        unit = self.translation.unit_set.get(source='Hello, world!\n')
+        other = self.translation.unit_set.get(
+            source='Thank you for using Weblate.'
+        )
+        params = {
+            'checksum': [unit.checksum, other.checksum, 'invalid'],
+            'type': 'all',
+            'pos': '-1',
+        }
+        params.update(data(unit, other))
+        return self.client.post(
+            self.translation.get_save_zen_url(),
+            params,
+            **kwargs
+        )
+
+    def test_save_zen(self):
+        response = self.save_zen(
+            lambda unit, other: {
+                '%s-target' % unit.checksum: 'Nazdar svete!',
+                '%s-target' % other.checksum: 'Diky za pouzivani Weblate.',
+            },
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        results = json.loads(response.content)
+        self.assertEqual(len(results), 3)
+        # Newly failing checks are reported
+        self.assertTrue(results[0]['saved'])
+        self.assertTrue(results[0]['translated'])
+        self.assertEqual(
+            results[0]['failing_checks'],
+            ['end_exclamation', 'end_newline']
+        )
+        self.assertTrue(results[1]['saved'])
+        self.assertEqual(results[1]['failing_checks'], [])
+        self.assertIsNone(results[1]['error'])
+        self.assertFalse(results[2]['saved'])
+        self.assertIsNotNone(results[2]['error'])
+
+        # Database and stats are updated
+        translation = self.subproject.translation_set.get(
+            language_code='cs'
+        )
+        self.assertEqual(translation.translated, 2)
+        other = translation.unit_set.get(
+            source='Thank you for using Weblate.'
+        )
+        self.assertEqual(other.target, 'Diky za pouzivani Weblate.')
+        self.assertEqual(
+            Change.objects.filter(
+                translation=translation,
+                action=Change.ACTION_NEW
+            ).count(),
+            2
+        )
+        self.assertEqual(
+            Profile.objects.get(user=self.user).translated,
+            2
+        )
+
+    def test_save_zen_redirect(self):
+        response = self.save_zen(
+            lambda unit, other: {
+                '%s-target' % unit.checksum: 'Nazdar svete!\n',
+            }
+        )
+        # Invalid checksum is reported and user stays on the page
+        self.assertRedirects(
+            response,
+            self.translation.get_zen_url() + '?type=all&pos=-1'
+        )
+        unit = self.translation.unit_set.get(source='Hello, world!\n')
+        self.assertEqual(unit.target, 'Nazdar svete!\n')
+
+    def test_commit_grouped(self):
+        self.edit_unit(
+            'Hello, world!\n',
+            'Nazdar svete!\n'
+        )
+        head = self.subproject.git_repo.head.commit
+        appsettings.GROUP_COMMITS = True
+        try:
+            self.subproject.commit_pending()
+        finally:
+            appsettings.GROUP_COMMITS = False
+        self.assertFalse(self.subproject.git_needs_commit())
+        commit = self.subproject.git_repo.head.commit
+        self.assertEqual(commit.parents[0], head)
+        translation = self.subproject.translation_set.get(
+            language_code='cs'
+        )
+        self.assertEqual(
+            commit.message.strip(),
+            translation.get_commit_message().strip()
+        )
+
 
 class EditResourceTest(EditTest):
     def create_subproject(self, file_format='aresource',
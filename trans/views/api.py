@@ -21,16 +21,24 @@
 from weblate import appsettings
 from django.views.decorators.csrf import csrf_exempt
 from django.http import (
-    HttpResponse, HttpResponseNotAllowed, HttpResponseBadRequest
+    HttpResponse, HttpResponseNotAllowed, HttpResponseBadRequest,
+    HttpResponseNotModified
 )
+from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, quote_etag
+from django.core.cache import cache
 
-from trans.models import SubProject
+from trans.models import (
+    SubProject, Project, Translation, Change, TranslationCount, Job
+)
 from trans.views.helper import get_project, get_subproject
 from trans.util import get_site_url
+from lang.models import Language
 
+import weblate
+import hashlib
 import json
 import logging
-import threading
 
 logger = logging.getLogger('weblate')
 
@@ -47,6 +55,16 @@ GITHUB_REPOS = (
 )
 
 
+def perform_update(obj):
+    '''
+    Triggers update of project or subproject, either queued or immediate.
+    '''
+    if appsettings.BACKGROUND_HOOKS:
+        Job.objects.enqueue_object(obj, Job.ACTION_UPDATE)
+    else:
+        obj.do_update()
+
+
 @csrf_exempt
 def update_subproject(request, project, subproject):
     '''
@@ -55,11 +73,7 @@ def update_subproject(request, project, subproject):
     if not appsettings.ENABLE_HOOKS:
         return HttpResponseNotAllowed([])
     obj = get_subproject(request, project, subproject, True)
-    if appsettings.BACKGROUND_HOOKS:
-        thread = threading.Thread(target=obj.do_update)
-        thread.start()
-    else:
-        obj.do_update()
+    perform_update(obj)
     return HttpResponse('update triggered')
 
 
@@ -71,11 +85,7 @@ def update_project(request, project):
     if not appsettings.ENABLE_HOOKS:
         return HttpResponseNotAllowed([])
     obj = get_project(request, project, True)
-    if appsettings.BACKGROUND_HOOKS:
-        thread = threading.Thread(target=obj.do_update)
-        thread.start()
-    else:
-        obj.do_update()
+    perform_update(obj)
     return HttpResponse('update triggered')
 
 
@@ -140,11 +150,7 @@ def git_service_hook(request, service):
             service_long_name,
             obj
         )
-        if appsettings.BACKGROUND_HOOKS:
-            thread = threading.Thread(target=obj.do_update)
-            thread.start()
-        else:
-            obj.do_update()
+        perform_update(obj)
 
     return HttpResponse('update triggered')
 
@@ -199,29 +205,139 @@ def dt_handler(obj):
         )
 
 
-def export_stats(request, project, subproject):
+def get_stats_key(scope, translations, last_changes, failing):
     '''
-    Exports stats in JSON format.
+    Returns key identifying current state of statistics.
     '''
-    subprj = get_subproject(request, project, subproject)
+    items = [weblate.VERSION, scope]
+    for trans in translations:
+        items.append('%d:%s:%d:%d:%d:%s:%d' % (
+            trans.id,
+            trans.revision,
+            trans.total,
+            trans.translated,
+            trans.fuzzy,
+            last_changes.get(trans.id),
+            failing[trans.id],
+        ))
+    return hashlib.sha1('\n'.join(items)).hexdigest()
+
+
+def get_stats_data(translations, last_changes, failing):
+    '''
+    Returns list of statistics for translations.
+    '''
+    changes = Change.objects.filter(
+        id__in=last_changes.values()
+    ).select_related('user')
+    changes = dict([(change.id, change) for change in changes])
+
     response = []
-    for trans in subprj.translation_set.all():
+    for trans in translations:
+        change = changes.get(last_changes.get(trans.id))
+        if change is None:
+            last_change = None
+            last_author = None
+        else:
+            last_change = change.timestamp
+            last_author = trans.get_author_name(change.user, False)
+        if trans.total == 0:
+            failing_percent = 0
+        else:
+            failing_percent = round(failing[trans.id] * 100.0 / trans.total, 1)
         response.append({
             'code': trans.language.code,
             'name': trans.language.name,
+            'project': trans.subproject.project.slug,
+            'subproject': trans.subproject.slug,
             'total': trans.total,
-            'last_change': trans.get_last_change(),
-            'last_author': trans.get_last_author(False),
+            'last_change': last_change,
+            'last_author': last_author,
             'translated': trans.translated,
             'translated_percent': trans.get_translated_percent(),
             'fuzzy': trans.fuzzy,
             'fuzzy_percent': trans.get_fuzzy_percent(),
-            'failing': trans.get_failing_checks(),
-            'failing_percent': trans.get_failing_checks_percent(),
+            'failing': failing[trans.id],
+            'failing_percent': failing_percent,
             'url': trans.get_share_url(),
             'url_translate': get_site_url(trans.get_absolute_url()),
         })
-    return HttpResponse(
-        json.dumps(response, default=dt_handler),
-        mimetype='application/json'
+    return response
+
+
+def stats_response(request, scope, translations):
+    '''
+    Returns JSON response with statistics for translations.
+
+    The data are built using constant number of queries and are cached
+    until any of the translations is changed.
+    '''
+    translations = list(translations.select_related(
+        'language', 'subproject', 'subproject__project'
+    ).order_by(
+        'subproject__project__slug', 'subproject__slug', 'language__code'
+    ))
+    last_changes = Change.objects.last_content_ids(translations)
+    failing = TranslationCount.objects.get_bulk_counts(
+        translations, 'allchecks'
+    )
+
+    key = get_stats_key(scope, translations, last_changes, failing)
+    if key in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        return HttpResponseNotModified()
+
+    cache_key = 'stats-%s' % key
+    data = cache.get(cache_key)
+    if data is None:
+        data = json.dumps(
+            get_stats_data(translations, last_changes, failing),
+            default=dt_handler
+        )
+        cache.set(cache_key, data)
+
+    response = HttpResponse(data, mimetype='application/json')
+    response['ETag'] = quote_etag(key)
+    return response
+
+
+def export_stats(request, project, subproject):
+    '''
+    Exports stats for subproject in JSON format.
+    '''
+    subprj = get_subproject(request, project, subproject)
+    return stats_response(
+        request,
+        'subproject-%d' % subprj.id,
+        Translation.objects.filter(subproject=subprj)
+    )
+
+
+def export_stats_project(request, project):
+    '''
+    Exports stats for project in JSON format.
+    '''
+    prj = get_project(request, project)
+    return stats_response(
+        request,
+        'project-%d' % prj.id,
+        Translation.objects.filter(subproject__project=prj)
+    )
+
+
+def export_stats_language(request, lang):
+    '''
+    Exports stats for language in JSON format.
+    '''
+    language = get_object_or_404(Language, code=lang)
+    projects = Project.objects.all_acl(request.user)
+    return stats_response(
+        request,
+        'language-%d-%s' % (
+            language.id,
+            ','.join([str(project.id) for project in projects])
+        ),
+        Translation.objects.filter(
+            language=language,
+            subproject__project__in=projects
+        )
     )
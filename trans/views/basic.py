@@ -30,9 +30,10 @@ from django.utils.safestring import mark_safe
 
 from trans.models import (
     Project, SubProject, Translation, Check,
-    Dictionary, Change,
+    Dictionary, Change, AggregateStats,
 )
 from trans.requirements import get_versions
+from trans.exporters import EXPORTERS
 from lang.models import Language
 from trans.forms import (
     UploadForm, SimpleUploadForm, ExtraUploadForm, SearchForm,
@@ -85,7 +86,7 @@ def home(request):
     ).order_by('-timestamp')[:10]
 
     return render_to_response('index.html', RequestContext(request, {
-        'projects': projects,
+        'projects': AggregateStats.objects.load_stats(projects),
         'top_translations': top_translations,
         'top_suggestions': top_suggestions,
         'last_changes': last_changes,
@@ -96,7 +97,9 @@ def home(request):
 
 def show_languages(request):
     return render_to_response('languages.html', RequestContext(request, {
-        'languages': Language.objects.have_translation(),
+        'languages': AggregateStats.objects.load_stats(
+            Language.objects.have_translation()
+        ),
         'title': _('Languages'),
     }))
 
@@ -176,6 +179,9 @@ def show_project(request, project):
 
     return render_to_response('project.html', RequestContext(request, {
         'object': obj,
+        'subprojects': AggregateStats.objects.load_stats(
+            obj.subproject_set.all()
+        ),
         'dicts': Language.objects.filter(id__in=dicts),
         'last_changes': last_changes,
         'last_changes_rss': reverse(
@@ -312,6 +318,7 @@ def show_translation(request, project, subproject, lang):
                 'project': obj.subproject.project.slug
             }
         ),
+        'exporters': sorted(EXPORTERS.values(), key=lambda x: x.format_id),
     }))
 
 
@@ -368,4 +375,5 @@ def data_project(request, project):
         'object': obj,
         'api_docs': weblate.get_doc_url('api', 'exports'),
         'rss_docs': weblate.get_doc_url('api', 'rss'),
+        'zip_docs': weblate.get_doc_url('api', 'zip-export'),
     }))
@@ -21,15 +21,18 @@
 from django.shortcuts import render_to_response, get_object_or_404
 from django.utils.translation import ugettext as _
 from django.template import RequestContext
-from django.http import HttpResponseRedirect
+from django.http import (
+    HttpResponse, HttpResponseRedirect, HttpResponseNotAllowed
+)
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.models import AnonymousUser
 from django.db.models import Q
+from django.core.cache import cache
 
 from trans.models import SubProject, Unit, Suggestion, Change, Comment
 from trans.forms import (
-    TranslationForm,
+    TranslationForm, ZenTranslationForm,
     MergeForm, AutoForm, ReviewForm,
     AntispamForm, CommentForm
 )
@@ -37,12 +40,148 @@ from trans.views.helper import (
     get_translation, SearchOptions, bool2str, get_filter_name
 )
 from trans.util import join_plural
+from trans.memory import lookup_exact
 from accounts.models import Profile, send_notification_email
 
 import logging
+import hashlib
+import json
+import bisect
+import array
 
 logger = logging.getLogger('weblate')
 
+# Number of units shown on single page in zen mode
+ZEN_BATCH_SIZE = 50
+
+# Maximal number of units in cached navigation cursor, it has to fit into
+# single cache item (4 bytes per unit)
+CURSOR_LIMIT = 100000
+
+
+def get_filtered_units(request, obj, search_options):
+    '''
+    Returns queryset of units matching current filter.
+    '''
+    reviewform = ReviewForm(request.GET)
+
+    if reviewform.is_valid():
+        # Review
+        return obj.unit_set.review(
+            reviewform.cleaned_data['date'],
+            request.user
+        )
+    elif search_options.query != '':
+        # Apply search conditions
+        if search_options.type == 'exact':
+            query = Q()
+            if search_options.source:
+                query |= Q(source=search_options.query)
+            if search_options.target:
+                query |= Q(target=search_options.query)
+            if search_options.context:
+                query |= Q(context=search_options.query)
+            return obj.unit_set.filter(query)
+        elif search_options.type == 'substring':
+            query = Q()
+            if search_options.source:
+                query |= Q(source__icontains=search_options.query)
+            if search_options.target:
+                query |= Q(target__icontains=search_options.query)
+            if search_options.context:
+                query |= Q(context__icontains=search_options.query)
+            return obj.unit_set.filter(query)
+        else:
+            return obj.unit_set.search(
+                search_options.query,
+                search_options.source,
+                search_options.context,
+                search_options.target
+            )
+    elif 'checksum' in request.GET:
+        return obj.unit_set.filter(checksum=request.GET['checksum'])
+    return obj.unit_set.filter_type(search_options.rqtype, obj)
+
+
+def get_unit_cursor(request, obj, search_options, force=False):
+    '''
+    Returns array of positions of units matching current filter.
+
+    It is calculated once for a navigation session (it starts by opening
+    translate page without position) and cached, so moving through the
+    units does not need to query the filtered set again. For more than
+    CURSOR_LIMIT units False is returned and the units are navigated using
+    queries on the filtered set.
+    '''
+    key = 'unit-cursor-%s' % hashlib.sha1((u'%d-%s-%s-%s-%s-%s' % (
+        obj.id,
+        obj.revision,
+        search_options.rqtype,
+        search_options.url,
+        request.GET.get('checksum', ''),
+        request.user.id,
+    )).encode('utf-8')).hexdigest()
+
+    if search_options.pos != -1 and not force:
+        cursor = cache.get(key)
+        if cursor is not None:
+            return cursor
+
+    cursor = array.array('i')
+    units = get_filtered_units(request, obj, search_options).order_by(
+        'position'
+    ).values_list('position', flat=True)
+    for position in units[:CURSOR_LIMIT + 1].iterator():
+        cursor.append(position)
+
+    if len(cursor) > CURSOR_LIMIT:
+        cursor = False
+
+    cache.set(key, cursor)
+    return cursor
+
+
+def get_cursor_unit(request, obj, cursor, search_options):
+    '''
+    Returns unit to show based on navigation direction.
+
+    Raises IndexError if there is no such unit.
+    '''
+    if search_options.direction == 'stay':
+        return obj.unit_set.filter(position=search_options.pos)[0]
+
+    if cursor is False:
+        units = get_filtered_units(request, obj, search_options)
+        if search_options.direction == 'back':
+            return units.filter(
+                position__lt=search_options.pos
+            ).order_by('-position')[0]
+        return units.filter(
+            position__gt=search_options.pos
+        ).order_by('position')[0]
+
+    if search_options.direction == 'back':
+        index = bisect.bisect_left(cursor, search_options.pos) - 1
+        if index < 0:
+            raise IndexError('No previous unit')
+    else:
+        index = bisect.bisect_right(cursor, search_options.pos)
+    return obj.unit_set.get(position=cursor[index])
+
+
+def get_cursor_stats(request, obj, cursor, search_options, position):
+    '''
+    Returns number of units matching current filter and number of them
+    up to given position.
+    '''
+    if cursor is False:
+        units = get_filtered_units(request, obj, search_options)
+        return (
+            units.count(),
+            units.filter(position__lte=position).count()
+        )
+    return len(cursor), bisect.bisect_right(cursor, position)
+
 
 def translate(request, project, subproject, lang):
     obj = get_translation(request, project, subproject, lang)
@@ -126,8 +265,6 @@ def translate(request, project, subproject, lang):
                         translation=unit.translation,
                         user=user
                     )
-                    # Invalidate counts cache
-                    unit.translation.invalidate_cache('suggestions')
                     # Invite user to become translator if there is nobody else
                     recent_changes = Change.objects.content().filter(
                         translation=unit.translation,
@@ -315,9 +452,6 @@ def translate(request, project, subproject, lang):
             if 'accept' in request.GET:
                 # Accept suggesiont
                 suggestion.accept(request)
-            # Invalidate caches
-            for unit in Unit.objects.filter(checksum=suggestion.checksum):
-                unit.translation.invalidate_cache('suggestions')
             # Delete suggestion in both cases (accepted ones are no longer
             # needed)
             suggestion.delete()
@@ -332,90 +466,22 @@ def translate(request, project, subproject, lang):
             search_options.url
         ))
 
-    reviewform = ReviewForm(request.GET)
-
-    if reviewform.is_valid():
-        allunits = obj.unit_set.review(
-            reviewform.cleaned_data['date'],
-            request.user
-        )
-        # Review
-        if search_options.direction == 'stay':
-            units = allunits.filter(
-                position=search_options.pos
-            )
-        elif search_options.direction == 'back':
-            units = allunits.filter(
-                position__lt=search_options.pos
-            ).order_by('-position')
-        else:
-            units = allunits.filter(
-                position__gt=search_options.pos
-            )
-    elif search_options.query != '':
-        # Apply search conditions
-        if search_options.type == 'exact':
-            query = Q()
-            if search_options.source:
-                query |= Q(source=search_options.query)
-            if search_options.target:
-                query |= Q(target=search_options.query)
-            if search_options.context:
-                query |= Q(context=search_options.query)
-            allunits = obj.unit_set.filter(query)
-        elif search_options.type == 'substring':
-            query = Q()
-            if search_options.source:
-                query |= Q(source__icontains=search_options.query)
-            if search_options.target:
-                query |= Q(target__icontains=search_options.query)
-            if search_options.context:
-                query |= Q(context__icontains=search_options.query)
-            allunits = obj.unit_set.filter(query)
-        else:
-            allunits = obj.unit_set.search(
-                search_options.query,
-                search_options.source,
-                search_options.context,
-                search_options.target
-            )
-        if search_options.direction == 'stay':
-            units = obj.unit_set.filter(
-                position=search_options.pos
-            )
-        elif search_options.direction == 'back':
-            units = allunits.filter(
-                position__lt=search_options.pos
-            ).order_by('-position')
-        else:
-            units = allunits.filter(
-                position__gt=search_options.pos
-            )
-    elif 'checksum' in request.GET:
-        allunits = obj.unit_set.filter(checksum=request.GET['checksum'])
-        units = allunits
-    else:
-        allunits = obj.unit_set.filter_type(search_options.rqtype, obj)
-        # What unit set is about to show
-        if search_options.direction == 'stay':
-            units = obj.unit_set.filter(
-                position=search_options.pos
-            )
-        elif search_options.direction == 'back':
-            units = allunits.filter(
-                position__lt=search_options.pos
-            ).order_by('-position')
-        else:
-            units = allunits.filter(
-                position__gt=search_options.pos
-            )
+    # Get units matching current filter
+    cursor = get_unit_cursor(request, obj, search_options)
 
     # If we failed to get unit above or on no POST
     if unit is None:
         # Grab actual unit
         try:
-            unit = units[0]
-        except IndexError:
+            try:
+                unit = get_cursor_unit(request, obj, cursor, search_options)
+            except Unit.DoesNotExist:
+                # Cached units are outdated
+                cursor = get_unit_cursor(request, obj, search_options, True)
+                unit = get_cursor_unit(
+                    request, obj, cursor, search_options
+                )
+        except (IndexError, Unit.DoesNotExist):
             messages.info(request, _('You have reached end of translating.'))
             return HttpResponseRedirect(obj.get_absolute_url())
 
@@ -425,7 +491,7 @@ def translate(request, project, subproject, lang):
                 id=unit.translation.language.id
             )
             project = unit.translation.subproject.project
-            secondary = Unit.objects.filter(
+            secondary = Unit.objects.select_translation().filter(
                 checksum=unit.checksum,
                 translated=True,
                 translation__subproject__project=project,
@@ -449,8 +515,16 @@ def translate(request, project, subproject, lang):
             'fuzzy': unit.fuzzy,
         })
 
-    total = obj.unit_set.all().count()
-    filter_count = allunits.count()
+    filter_count, filter_pos = get_cursor_stats(
+        request, obj, cursor, search_options, unit.position
+    )
+
+    # Load data needed for rendering the unit and nearby units in batches
+    unit.translation = obj
+    nearby = list(unit.nearby())
+    for item in nearby:
+        item.translation = obj
+    Unit.objects.load_context([unit] + nearby)
 
     return render_to_response(
         'translate.html',
@@ -459,14 +533,15 @@ def translate(request, project, subproject, lang):
             {
                 'object': obj,
                 'unit': unit,
-                'last_changes': unit.change_set.all()[:10],
-                'total': total,
+                'last_changes': unit.get_last_changes(),
+                'nearby': nearby,
+                'total': obj.total,
                 'type': search_options.rqtype,
                 'filter_name': get_filter_name(
                     search_options.rqtype, search_options.query
                 ),
                 'filter_count': filter_count,
-                'filter_pos': filter_count + 1 - units.count(),
+                'filter_pos': filter_pos,
                 'form': form,
                 'antispam': antispam,
                 'comment_form': CommentForm(),
@@ -487,13 +562,198 @@ def translate(request, project, subproject, lang):
     )
 
 
+def zen(request, project, subproject, lang):
+    '''
+    Shows batch of units matching current filter for translating them at
+    once.
+    '''
+    obj = get_translation(request, project, subproject, lang)
+
+    # Check locks
+    project_locked, user_locked, own_lock = obj.is_locked(request, True)
+    locked = project_locked or user_locked
+
+    search_options = SearchOptions(request)
+
+    # Get units following current position
+    cursor = get_unit_cursor(request, obj, search_options)
+    filter_count, offset = get_cursor_stats(
+        request, obj, cursor, search_options, search_options.pos
+    )
+    if cursor is False:
+        units = get_filtered_units(request, obj, search_options).filter(
+            position__gt=search_options.pos
+        )
+    else:
+        units = obj.unit_set.filter(
+            position__in=list(cursor[offset:offset + ZEN_BATCH_SIZE])
+        )
+    units = list(units.order_by('position')[:ZEN_BATCH_SIZE])
+
+    if len(units) == 0:
+        messages.info(request, _('You have reached end of translating.'))
+        return HttpResponseRedirect(obj.get_absolute_url())
+
+    for unit in units:
+        unit.translation = obj
+    Unit.objects.load_context(units)
+
+    forms = [
+        (unit, ZenTranslationForm(unit.checksum, initial={
+            'target': (obj.language, unit.get_target_plurals()),
+            'fuzzy': unit.fuzzy,
+        }))
+        for unit in units
+    ]
+
+    if offset + ZEN_BATCH_SIZE < filter_count:
+        next_pos = units[-1].position
+    else:
+        next_pos = None
+
+    return render_to_response(
+        'zen.html',
+        RequestContext(
+            request,
+            {
+                'object': obj,
+                'forms': forms,
+                'type': search_options.rqtype,
+                'pos': search_options.pos,
+                'next_pos': next_pos,
+                'filter_name': get_filter_name(
+                    search_options.rqtype, search_options.query
+                ),
+                'filter_count': filter_count,
+                'filter_pos': offset + 1,
+                'search_query': search_options.query,
+                'search_url': search_options.url,
+                'search_source': bool2str(search_options.source),
+                'search_type': search_options.type,
+                'search_target': bool2str(search_options.target),
+                'search_context': bool2str(search_options.context),
+                'update_lock': own_lock,
+                'locked': locked,
+                'user_locked': user_locked,
+                'project_locked': project_locked,
+            },
+        )
+    )
+
+
+@login_required
+@permission_required('trans.save_translation')
+def save_zen(request, project, subproject, lang):
+    '''
+    Saves several units at once.
+
+    The units are listed in checksum parameter, their fields are prefixed
+    by the checksum. Results for each unit are returned as JSON for AJAX
+    requests or with format=json, otherwise user is redirected back to
+    zen mode.
+    '''
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    obj = get_translation(request, project, subproject, lang)
+
+    # Check locks
+    project_locked, user_locked, own_lock = obj.is_locked(request, True)
+    locked = project_locked or user_locked
+
+    search_options = SearchOptions(request)
+
+    checksums = request.POST.getlist('checksum')
+    units = dict([
+        (unit.checksum, unit)
+        for unit in obj.unit_set.filter(checksum__in=checksums)
+    ])
+
+    # Validate submitted translations
+    results = []
+    tosave = []
+    for checksum in checksums:
+        result = {
+            'checksum': checksum,
+            'saved': False,
+            'failing_checks': [],
+            'error': None,
+        }
+        results.append(result)
+        form = ZenTranslationForm(checksum, request.POST)
+        if locked:
+            result['error'] = _(
+                'This translation is currently locked for updates!'
+            )
+        elif not checksum in units:
+            result['error'] = _(
+                'Message you wanted to translate is no longer available!'
+            )
+        elif (not '%s-target' % checksum in request.POST
+                or not form.is_valid()):
+            result['error'] = _('Invalid translation!')
+        else:
+            unit = units[checksum]
+            target = join_plural(form.cleaned_data['target'])
+            fuzzy = form.cleaned_data['fuzzy']
+            if unit.target != target or unit.fuzzy != fuzzy:
+                unit.target = target
+                unit.fuzzy = fuzzy
+                tosave.append(unit)
+
+    # Store all units at once
+    failing = {}
+    if len(tosave) > 0:
+        # Check whether translation is not outdated
+        obj.check_sync()
+        updated, failing = obj.save_units(tosave, request)
+        updated = dict([(unit.checksum, unit) for unit in updated])
+    else:
+        updated = {}
+
+    for result in results:
+        checksum = result['checksum']
+        if checksum in units:
+            result['translated'] = units[checksum].translated
+            result['fuzzy'] = units[checksum].fuzzy
+        if checksum in updated:
+            result['saved'] = True
+            result['failing_checks'] = sorted(failing[checksum])
+
+    if request.is_ajax() or request.GET.get('format') == 'json':
+        return HttpResponse(
+            json.dumps(results, indent=2),
+            mimetype='application/json'
+        )
+
+    # Report problems
+    errors = set([result['error'] for result in results if result['error']])
+    for error in errors:
+        messages.error(request, error)
+    pos = search_options.pos
+    if len([result for result in results if result['failing_checks']]):
+        messages.error(
+            request,
+            _('Some checks have failed on your translation!')
+        )
+    elif len(errors) == 0 and len(units) > 0:
+        # Continue with next batch
+        pos = max([unit.position for unit in units.values()])
+
+    return HttpResponseRedirect('%s?type=%s&pos=%d%s' % (
+        obj.get_zen_url(),
+        search_options.rqtype,
+        pos,
+        search_options.url
+    ))
+
+
 @login_required
 @permission_required('trans.automatic_translation')
 def auto_translation(request, project, subproject, lang):
     obj = get_translation(request, project, subproject, lang)
     obj.commit_pending()
     autoform = AutoForm(obj, request.POST)
-    change = None
     if not obj.subproject.locked and autoform.is_valid():
         if autoform.cleaned_data['inconsistent']:
             units = obj.unit_set.filter_type('inconsistent', obj)
@@ -519,26 +779,61 @@ def auto_translation(request, project, subproject, lang):
             )
             sources = sources.filter(translation__subproject=subprj)
 
+        # Lookup all translations at once
+        if autoform.cleaned_data['memory']:
+            memory = lookup_exact(
+                obj.language.code,
+                set(units.values_list('source', flat=True))
+            )
+            translations = {}
+            for checksum, source in units.values_list('checksum', 'source'):
+                if source in memory:
+                    translations[checksum] = (False, memory[source])
+        else:
+            sources = sources.filter(
+                checksum__in=units.values('checksum')
+            ).values_list(
+                'checksum', 'fuzzy', 'target'
+            )
+            translations = {}
+            for checksum, fuzzy, target in sources.iterator():
+                # Use first entry
+                if not checksum in translations:
+                    translations[checksum] = (fuzzy, target)
+
+        changed = []
         for unit in units.iterator():
-            update = sources.filter(checksum=unit.checksum)
-            if update.exists():
-                # Get first entry
-                update = update[0]
-                # No save if translation is same
-                if unit.fuzzy == update.fuzzy and unit.target == update.target:
-                    continue
-                # Copy translation
-                unit.fuzzy = update.fuzzy
-                unit.target = update.target
-                # Create signle change object for whole merge
-                if change is None:
-                    change = Change.objects.create(
-                        unit=unit,
-                        translation=unit.translation,
-                        user=request.user
-                    )
-                # Save unit to backend
-                unit.save_backend(request, False, False)
+            if not unit.checksum in translations:
+                continue
+            fuzzy, target = translations[unit.checksum]
+            # No save if translation is same
+            if unit.fuzzy == fuzzy and unit.target == target:
+                continue
+            # Copy translation
+            unit.fuzzy = fuzzy
+            unit.target = target
+            changed.append(unit)
+
+        # Update lock timestamp
+        obj.update_lock(request)
+
+        # Save all units to backend at once
+        old_translated = obj.translated
+        updated = obj.update_units(changed, request.user)
+
+        if len(updated) > 0:
+            # Create signle change object for whole merge
+            Change.objects.create(
+                unit=updated[0],
+                translation=obj,
+                user=request.user
+            )
+            # Update user stats
+            profile = request.user.get_profile()
+            profile.translated += len(updated)
+            profile.save()
+            # Force commiting on completing translation
+            obj.handle_complete(old_translated, request.user)
 
         messages.info(request, _('Automatic translation completed.'))
     else:
@@ -576,11 +871,6 @@ def comment(request, pk):
             user=request.user
         )
 
-        # Invalidate counts cache
-        if lang is None:
-            obj.translation.invalidate_cache('sourcecomments')
-        else:
-            obj.translation.invalidate_cache('targetcomments')
         messages.info(request, _('Posted new comment'))
         # Notify subscribed users
         subscriptions = Profile.objects.subscribed_new_comment(
@@ -18,30 +18,84 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from django.core.servers.basehttp import FileWrapper
 from django.utils.translation import ugettext as _
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, Http404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
+from django.views.decorators.http import condition
+from django.shortcuts import get_object_or_404
+from django.core.servers.basehttp import FileWrapper
 
 from trans.forms import UploadForm, SimpleUploadForm, ExtraUploadForm
-from trans.views.helper import get_translation
+from trans.views.helper import get_translation, get_subproject, get_project
+from trans.exporters import get_exporter
+from trans.archive import TranslationArchive
+from trans.models import Change, Translation, Project
+from lang.models import Language
 
+import weblate
+import hashlib
 import logging
-import os.path
+import os
 
 logger = logging.getLogger('weblate')
 
 
-# See https://code.djangoproject.com/ticket/6027
-class FixedFileWrapper(FileWrapper):
-    def __iter__(self):
-        self.filelike.seek(0)
-        return self
+def get_download_translation(request, project, subproject, lang):
+    '''
+    Returns translation for download.
+
+    It is needed for both ETag calculation and the download itself, so it
+    is stored in the request to look it up just once.
+    '''
+    if not hasattr(request, 'download_translation'):
+        request.download_translation = get_translation(
+            request, project, subproject, lang
+        )
+    return request.download_translation
+
 
+def get_download_etag(request, project, subproject, lang):
+    '''
+    Calculates ETag for translation download.
 
+    It is based on Git blob hash of the file and last change done in
+    Weblate (which might not yet be written or committed).
+    '''
+    obj = get_download_translation(request, project, subproject, lang)
+    try:
+        blob_hash = obj.get_git_blob_hash()
+    except KeyError:
+        return None
+    last_change = Change.objects.filter(
+        translation=obj
+    ).order_by('-id').values_list('id', flat=True)[:1]
+    return hashlib.sha1((u'%s-%s-%s-%s' % (
+        weblate.VERSION,
+        blob_hash,
+        list(last_change),
+        request.GET.get('format', ''),
+    )).encode('utf-8')).hexdigest()
+
+
+@condition(etag_func=get_download_etag)
 def download_translation(request, project, subproject, lang):
-    obj = get_translation(request, project, subproject, lang)
+    obj = get_download_translation(request, project, subproject, lang)
+
+    # Export in requested format
+    if 'format' in request.GET:
+        exporter_class = get_exporter(request.GET['format'])
+        if exporter_class is None:
+            raise Http404('Unsupported format')
+        exporter = exporter_class(obj)
+        response = HttpResponse(
+            exporter.generate(),
+            mimetype='%s; charset=utf-8' % exporter.mimetype
+        )
+        response['Content-Disposition'] = 'attachment; filename=%s' % (
+            exporter.get_filename()
+        )
+        return response
 
     # Retrieve ttkit store to get extension and mime type
     store = obj.get_store()
@@ -67,14 +121,85 @@ def download_translation(request, project, subproject, lang):
     # that useful)
     filename = '%s-%s-%s.%s' % (project, subproject, lang, ext)
 
-    # Django wrapper for sending file
-    wrapper = FixedFileWrapper(file(srcfilename))
+    # Read the file with shared lock to get consistent content while
+    # not blocking other readers, the file is rewritten in place on save
+    with obj.subproject.get_git_lock(shared=True):
+        with open(srcfilename, 'rb') as handle:
+            content = handle.read()
 
-    response = HttpResponse(wrapper, mimetype=mime)
+    response = HttpResponse(content, mimetype=mime)
 
     # Fill in response headers
     response['Content-Disposition'] = 'attachment; filename=%s' % filename
-    response['Content-Length'] = os.path.getsize(srcfilename)
+    response['Content-Length'] = len(content)
+
+    return response
+
+
+def get_archive(request, project=None, subproject=None, lang=None):
+    '''
+    Returns archive of translations matching parameters.
+    '''
+    translations = Translation.objects.filter(enabled=True)
+    if lang is not None:
+        language = get_object_or_404(Language, code=lang)
+        return TranslationArchive(
+            translations.filter(
+                language=language,
+                subproject__project__in=Project.objects.all_acl(
+                    request.user
+                )
+            ),
+            'language.%s' % language.code,
+            language.code
+        )
+    elif subproject is not None:
+        obj = get_subproject(request, project, subproject)
+        return TranslationArchive(
+            translations.filter(subproject=obj),
+            'subproject.%s.%s' % (obj.project.slug, obj.slug),
+            '%s-%s' % (obj.project.slug, obj.slug)
+        )
+    obj = get_project(request, project)
+    return TranslationArchive(
+        translations.filter(subproject__project=obj),
+        'project.%s' % obj.slug,
+        obj.slug
+    )
+
+
+def get_archive_etag(request, project=None, subproject=None, lang=None):
+    '''
+    Returns ETag for archive download, it is available only for committed
+    content.
+    '''
+    return get_archive(request, project, subproject, lang).get_key()
+
+
+@condition(etag_func=get_archive_etag)
+def download_archive(request, project=None, subproject=None, lang=None):
+    '''
+    Downloads ZIP archive of translations.
+    '''
+    archive = get_archive(request, project, subproject, lang)
+
+    key = archive.get_key()
+    cached = archive.get_cached(key)
+    if cached is not None:
+        response = HttpResponse(
+            FileWrapper(cached),
+            mimetype='application/zip'
+        )
+        response['Content-Length'] = os.fstat(cached.fileno()).st_size
+    else:
+        response = HttpResponse(
+            archive.generate(key),
+            mimetype='application/zip'
+        )
+
+    response['Content-Disposition'] = 'attachment; filename=%s' % (
+        archive.get_filename()
+    )
 
     return response
 
@@ -22,42 +22,75 @@ from django.utils.translation import ugettext as _
 from django.http import HttpResponseRedirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
+from weblate import appsettings
+from trans.models import Job
 from trans.views.helper import (
     get_project, get_subproject, get_translation
 )
 
 
+def perform_commit(request, obj):
+    '''
+    Commits pending changes or schedules the commit.
+    '''
+    if appsettings.OFFLOAD_GIT:
+        Job.objects.enqueue_object(obj, Job.ACTION_COMMIT)
+        messages.info(request, _('Commit of pending translations was queued.'))
+    else:
+        obj.commit_pending()
+        messages.info(request, _('All pending translations were committed.'))
+
+    return HttpResponseRedirect(obj.get_absolute_url())
+
+
+def perform_update(request, obj):
+    '''
+    Updates repositories or schedules the update.
+    '''
+    if appsettings.OFFLOAD_GIT:
+        Job.objects.enqueue_object(obj, Job.ACTION_UPDATE)
+        messages.info(request, _('Update of repositories was queued.'))
+    elif obj.do_update(request):
+        messages.info(request, _('All repositories were updated.'))
+
+    return HttpResponseRedirect(obj.get_absolute_url())
+
+
+def perform_push(request, obj):
+    '''
+    Pushes repositories or schedules the push.
+    '''
+    if appsettings.OFFLOAD_GIT:
+        Job.objects.enqueue_object(obj, Job.ACTION_PUSH)
+        messages.info(request, _('Push of repositories was queued.'))
+    elif obj.do_push(request):
+        messages.info(request, _('All repositories were pushed.'))
+
+    return HttpResponseRedirect(obj.get_absolute_url())
+
+
 @login_required
 @permission_required('trans.commit_translation')
 def commit_project(request, project):
     obj = get_project(request, project)
-    obj.commit_pending()
 
-    messages.info(request, _('All pending translations were committed.'))
-
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_commit(request, obj)
 
 
 @login_required
 @permission_required('trans.commit_translation')
 def commit_subproject(request, project, subproject):
     obj = get_subproject(request, project, subproject)
-    obj.commit_pending()
-
-    messages.info(request, _('All pending translations were committed.'))
 
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_commit(request, obj)
 
 
 @login_required
 @permission_required('trans.commit_translation')
 def commit_translation(request, project, subproject, lang):
     obj = get_translation(request, project, subproject, lang)
-    obj.commit_pending()
-
-    messages.info(request, _('All pending translations were committed.'))
 
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_commit(request, obj)
 
 
 @login_required
@@ -65,10 +98,7 @@ def commit_translation(request, project, subproject, lang):
 def update_project(request, project):
     obj = get_project(request, project)
 
-    if obj.do_update(request):
-        messages.info(request, _('All repositories were updated.'))
-
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_update(request, obj)
 
 
 @login_required
@@ -76,10 +106,7 @@ def update_project(request, project):
 def update_subproject(request, project, subproject):
     obj = get_subproject(request, project, subproject)
 
-    if obj.do_update(request):
-        messages.info(request, _('All repositories were updated.'))
-
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_update(request, obj)
 
 
 @login_required
@@ -87,10 +114,7 @@ def update_subproject(request, project, subproject):
 def update_translation(request, project, subproject, lang):
     obj = get_translation(request, project, subproject, lang)
 
-    if obj.do_update(request):
-        messages.info(request, _('All repositories were updated.'))
-
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_update(request, obj)
 
 
 @login_required
@@ -98,10 +122,7 @@ def update_translation(request, project, subproject, lang):
 def push_project(request, project):
     obj = get_project(request, project)
 
-    if obj.do_push(request):
-        messages.info(request, _('All repositories were pushed.'))
-
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_push(request, obj)
 
 
 @login_required
@@ -109,10 +130,7 @@ def push_project(request, project):
 def push_subproject(request, project, subproject):
     obj = get_subproject(request, project, subproject)
 
-    if obj.do_push(request):
-        messages.info(request, _('All repositories were pushed.'))
-
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_push(request, obj)
 
 
 @login_required
@@ -120,10 +138,7 @@ def push_subproject(request, project, subproject):
 def push_translation(request, project, subproject, lang):
     obj = get_translation(request, project, subproject, lang)
 
-    if obj.do_push(request):
-        messages.info(request, _('All repositories were pushed.'))
-
-    return HttpResponseRedirect(obj.get_absolute_url())
+    return perform_push(request, obj)
 
 
 @login_required
@@ -28,6 +28,7 @@ from django.db.models import Q
 
 from trans.models import Unit, Check, Dictionary
 from trans.views.helper import SearchOptions
+from trans.memory import lookup_fuzzy
 from trans.decorators import any_permission_required
 from trans.views.helper import (
     get_project, get_subproject, get_translation
@@ -61,7 +62,7 @@ def get_similar(request, unit_id):
     unit = get_object_or_404(Unit, pk=int(unit_id))
     unit.check_acl(request)
 
-    similar_units = Unit.objects.similar(unit)
+    similar_units = Unit.objects.similar(unit, appsettings.SIMILAR_TIMEOUT)
 
     # distinct('target') works with Django 1.4 so let's emulate that
     # based on presumption we won't get too many results
@@ -79,14 +80,36 @@ def get_similar(request, unit_id):
     }))
 
 
+def get_memory(request, unit_id):
+    '''
+    AJAX handler for getting translation memory matches.
+    '''
+    unit = get_object_or_404(Unit, pk=int(unit_id))
+    unit.check_acl(request)
+
+    memory = lookup_fuzzy(unit.translation.language.code, unit.source)
+
+    return render_to_response('js/memory.html', RequestContext(request, {
+        'memory': memory,
+        'language': unit.translation.language,
+    }))
+
+
 def get_other(request, unit_id):
     '''
     AJAX handler for same strings in other subprojects.
     '''
-    unit = get_object_or_404(Unit, pk=int(unit_id))
+    unit = get_object_or_404(
+        Unit.objects.select_translation(),
+        pk=int(unit_id)
+    )
     unit.check_acl(request)
 
-    other = Unit.objects.same(unit)
+    other = Unit.objects.same(unit).select_related(
+        'translation__subproject__project',
+        'translation__language',
+    )
+    other = Unit.objects.load_context(list(other))
 
     search_options = SearchOptions(request)
 
@@ -102,7 +125,10 @@ def get_dictionary(request, unit_id):
     '''
     Lists words from dictionary for current translation.
     '''
-    unit = get_object_or_404(Unit, pk=int(unit_id))
+    unit = get_object_or_404(
+        Unit.objects.select_translation(),
+        pk=int(unit_id)
+    )
     unit.check_acl(request)
     words = set()
 
@@ -146,9 +172,6 @@ def ignore_check(request, check_id):
     # Mark check for ignoring
     obj.ignore = True
     obj.save()
-    # Invalidate caches
-    for unit in Unit.objects.filter(checksum=obj.checksum):
-        unit.translation.invalidate_cache()
     # response for AJAX
     return HttpResponse('ok')
 
@@ -62,12 +62,36 @@ NEARBY_MESSAGES = get('NEARBY_MESSAGES', 5)
 # Minimal number of similar messages to show
 SIMILAR_MESSAGES = get('SIMILAR_MESSAGES', 5)
 
+# Time limit for similar messages lookup (in seconds)
+SIMILAR_TIMEOUT = get('SIMILAR_TIMEOUT', 1)
+
 # Enable lazy commits
 LAZY_COMMITS = get('LAZY_COMMITS', True)
 
 # Offload indexing
 OFFLOAD_INDEXING = get('OFFLOAD_INDEXING', False)
 
+# Offload writing of translation files
+OFFLOAD_WRITES = get('OFFLOAD_WRITES', False)
+
+# Offload git operations from web interface to job queue
+OFFLOAD_GIT = get('OFFLOAD_GIT', False)
+
+# Commit all translations changed by same author at once
+GROUP_COMMITS = get('GROUP_COMMITS', False)
+
+# Number of repositories fetched in parallel
+UPDATE_JOBS = get('UPDATE_JOBS', 4)
+
+# Size of cache for parsed translation files (in bytes of the files)
+STORE_CACHE_SIZE = get('STORE_CACHE_SIZE', 32 * 1024 * 1024)
+
+# Share parsed translation files using Django cache
+STORE_CACHE_SHARED = get('STORE_CACHE_SHARED', False)
+
+# Locking of Git repositories, either flock or file
+GIT_LOCK_BACKEND = get('GIT_LOCK_BACKEND', 'flock')
+
 # Translation locking
 AUTO_LOCK = get('AUTO_LOCK', True)
 AUTO_LOCK_TIME = get('AUTO_LOCK_TIME', 60)
@@ -76,6 +100,9 @@ LOCK_TIME = get('LOCK_TIME', 15 * 60)
 # Where to put Whoosh index
 WHOOSH_INDEX = get('WHOOSH_INDEX', os.path.join(WEB_ROOT, 'whoosh-index'))
 
+# Where to cache generated ZIP archives
+ZIP_CACHE_DIR = get('ZIP_CACHE_DIR', os.path.join(WEB_ROOT, 'zip-cache'))
+
 # List of quality checks
 CHECK_LIST = get('CHECK_LIST', (
     'trans.checks.same.SameCheck',
@@ -323,6 +323,25 @@ LAZY_COMMITS = True
 # Offload indexing
 OFFLOAD_INDEXING = False
 
+# Offload writing of translation files
+OFFLOAD_WRITES = False
+
+# Offload git operations to job queue
+OFFLOAD_GIT = False
+
+# Commit all translations changed by same author at once
+GROUP_COMMITS = False
+
+# Number of repositories fetched in parallel
+UPDATE_JOBS = 4
+
+# Cache of parsed translation files
+STORE_CACHE_SIZE = 32 * 1024 * 1024
+STORE_CACHE_SHARED = False
+
+# Locking of Git repositories (flock or file)
+GIT_LOCK_BACKEND = 'flock'
+
 # Translation locking
 AUTO_LOCK = True
 AUTO_LOCK_TIME = 60
@@ -331,6 +350,9 @@ LOCK_TIME = 15 * 60
 # Where to put Whoosh index
 WHOOSH_INDEX = os.path.join(WEB_ROOT, 'whoosh-index')
 
+# Where to cache generated ZIP archives
+ZIP_CACHE_DIR = os.path.join(WEB_ROOT, 'zip-cache')
+
 # List of quality checks
 #CHECK_LIST = (
 #    'trans.checks.same.SameCheck',
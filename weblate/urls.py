@@ -143,6 +143,16 @@ urlpatterns = patterns(
         'trans.views.edit.translate',
         name='translate',
     ),
+    url(
+        r'^projects/' + TRANSLATION + 'zen/$',
+        'trans.views.edit.zen',
+        name='zen',
+    ),
+    url(
+        r'^projects/' + TRANSLATION + 'zen/save/$',
+        'trans.views.edit.save_zen',
+        name='save_zen',
+    ),
     url(
         r'^projects/' + TRANSLATION + 'download/$',
         'trans.views.files.download_translation',
@@ -418,12 +428,39 @@ urlpatterns = patterns(
     ),
 
     # Stats exports
+    url(
+        r'^exports/stats/language/' + LANGUAGE + '/$',
+        'trans.views.api.export_stats_language',
+        name='export_stats_language',
+    ),
+    url(
+        r'^exports/stats/' + PROJECT + '$',
+        'trans.views.api.export_stats_project',
+        name='export_stats_project',
+    ),
     url(
         r'^exports/stats/' + SUBPROJECT + '$',
         'trans.views.api.export_stats',
         name='export_stats',
     ),
 
+    # ZIP exports
+    url(
+        r'^exports/zip/language/' + LANGUAGE + '/$',
+        'trans.views.files.download_archive',
+        name='download_language_archive',
+    ),
+    url(
+        r'^exports/zip/' + PROJECT + '$',
+        'trans.views.files.download_archive',
+        name='download_project_archive',
+    ),
+    url(
+        r'^exports/zip/' + SUBPROJECT + '$',
+        'trans.views.files.download_archive',
+        name='download_subproject_archive',
+    ),
+
     # RSS exports
     url(
         r'^exports/rss/$',
@@ -528,6 +565,11 @@ urlpatterns = patterns(
         'trans.views.js.get_similar',
         name='js-similar',
     ),
+    url(
+        r'^js/memory/(?P<unit_id>[0-9]+)/$',
+        'trans.views.js.get_memory',
+        name='js-memory',
+    ),
     url(
         r'^js/other/(?P<unit_id>[0-9]+)/$',
         'trans.views.js.get_other',